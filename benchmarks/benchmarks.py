@@ -0,0 +1,302 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from math import inf
+
+from fivecarddraw import Card, ChipTracker, Deck, DeucesHandTracker, HandTracker, HeadlessTable, SeatTracker
+from handhistory import HistoryWriter
+from mcts import MCTSPolicy
+from replay import Replayer
+
+
+# seed every benchmark is set up with, so each run measures the same work
+SEED = 0
+# benchmarks by name, as (setup, number of operations per repeat)
+BENCHMARKS = {}
+# hands recorded for the replay benchmark, and the fewest hands a second a core must replay them at
+REPLAY_HANDS = 1000
+REPLAY_RATE = 15000
+# most seconds some benchmarks may take, whatever the baseline
+BUDGETS = {"startup" : 0.15, "replay_file" : REPLAY_HANDS / REPLAY_RATE}
+# root of the repository, so the game can be imported from anywhere
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# script a new worker runs, from importing the game to the first dealt hand
+STARTUP = """
+from fivecarddraw import Dealer
+dealer = Dealer(6)
+dealer.InitializeTable([], ["Bot 0", "Bot 1", "Bot 2", "Bot 3", "Bot 4", "Bot 5"], 500)
+dealer.UpdateAnte(5)
+dealer.ShuffleDeck()
+dealer.MoveButton()
+dealer.TakeAnte()
+dealer.DealHands()
+"""
+
+
+def Benchmark(name : str, number : int):
+    """Registers a setup function, which prepares the state of a benchmark and returns the operation to time."""
+    def Register(setup):
+        BENCHMARKS[name] = (setup, number)
+        return setup
+    return Register
+
+
+@Benchmark("card_construction", 1000)
+def CardConstruction():
+    cards = [(v, s) for v in range(13) for s in range(4)]
+    return lambda: [Card(v, s) for v, s in cards]
+
+
+@Benchmark("deck_shuffle", 10000)
+def DeckShuffle():
+    deck = Deck()
+    return deck.Shuffle
+
+
+@Benchmark("deck_next", 10000)
+def DeckNext():
+    deck = Deck()
+    def DealDeck():
+        deck.CollectCards()
+        for _ in range(52):
+            next(deck)
+    return DealDeck
+
+
+@Benchmark("handtracker_loaddata", 10)
+def HandTrackerLoadData():
+    tracker = HandTracker()
+    return tracker.LoadData
+
+
+@Benchmark("startup", 5)
+def Startup():
+    # launch workers outside the repository, so the game can't rely on the working directory
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    directory = tempfile.gettempdir()
+    return lambda: subprocess.run([sys.executable, "-c", STARTUP], cwd=directory, env=env, check=True)
+
+
+@Benchmark("evaluate_hand", 100)
+def EvaluateHand():
+    tracker = HandTracker()
+    deck = [Card(v, s) for v in range(13) for s in range(4)]
+    hands = [random.sample(deck, 5) for _ in range(1000)]
+    return lambda: [tracker.EvaluateHand(hand) for hand in hands]
+
+
+@Benchmark("evaluate_wild_hand", 100)
+def EvaluateWildHand():
+    tracker = DeucesHandTracker()
+    deck = [Card(v, s) for v in range(13) for s in range(4)]
+    hands = [random.sample(deck, 5) for _ in range(1000)]
+    return lambda: [tracker.EvaluateHand(hand) for hand in hands]
+
+
+@Benchmark("split_contributions", 10000)
+def SplitContributions():
+    chips = ChipTracker()
+    names = [f"Bot {i}" for i in range(6)]
+    contributions = [random.randint(0, 500) for _ in names]
+    def Split():
+        # rebuild the pot, since splitting it pays it out
+        chips.TrackPlayers(names)
+        for name, contribution in zip(names, contributions):
+            chips.players[name]["contribution"] = contribution
+        chips.SplitContributions(names[::-1])
+    return Split
+
+
+@Benchmark("seattracker_iteration", 10000)
+def SeatTrackerIteration():
+    seats = SeatTracker(10)
+    names = [f"Bot {i}" for i in range(10)]
+    seats.TrackPlayers(names)
+    seats.SeatPlayers()
+    seats.MoveButton()
+    return lambda: list(seats)
+
+
+@Benchmark("dealer_clone", 10000)
+def DealerClone():
+    table = HeadlessTable(6)
+    table.dealer.ShuffleDeck()
+    table.dealer.MoveButton()
+    table.dealer.TakeAnte()
+    table.dealer.DealHands()
+    return table.dealer.Clone
+
+
+@Benchmark("mcts_iteration", 200)
+def MCTSIteration():
+    table = HeadlessTable(6)
+    table.dealer.ShuffleDeck()
+    table.dealer.MoveButton()
+    table.dealer.TakeAnte()
+    table.dealer.DealHands()
+    policy = MCTSPolicy(table.dealer, seed = SEED)
+    name = table.dealer.PreflopOrder()[0]
+    return lambda: policy.Iterate(name, "preflop")
+
+
+@Benchmark("hand_2_seats", 200)
+def Hand2Seats():
+    return HeadlessTable(2).PlayHand
+
+
+@Benchmark("hand_6_seats", 100)
+def Hand6Seats():
+    return HeadlessTable(6).PlayHand
+
+
+@Benchmark("hand_10_seats", 50)
+def Hand10Seats():
+    return HeadlessTable(10).PlayHand
+
+
+@Benchmark("replay_file", 5)
+def ReplayFile():
+    # record hands at a full table, decoding and replaying them all each operation
+    directory = tempfile.TemporaryDirectory()
+    with HistoryWriter(os.path.join(directory.name, "hands.fcdh")) as writer:
+        table = HeadlessTable(6)
+        table.dealer.RecordHistory(writer)
+        for _ in range(REPLAY_HANDS):
+            table.PlayHand()
+    replayer = Replayer()
+    def Replay():
+        # find the file through the directory, so it isn't removed while the operation is in use
+        return replayer.ReplayFile(os.path.join(directory.name, "hands.fcdh"))
+    return Replay
+
+
+def RunBenchmark(name : str, repeats : int = 5) -> dict:
+    """
+    Times a benchmark, keeping the fastest of some repeats to reduce noise from the rest of the system.
+
+    Parameters
+    ----------
+        name : name of benchmark
+        repeats : amount of times to time the operations
+
+    """
+    setup, number = BENCHMARKS[name]
+    random.seed(SEED)
+    result = {"number" : number, "repeats" : repeats}
+    try:
+        operation = setup()
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(number):
+                operation()
+            timings.append((time.perf_counter() - start) / number)
+    except Exception as error:
+        # record benchmarks the engine can't run, such as tables too big for the deck, instead of aborting the suite
+        result["error"] = f"{type(error).__name__}: {error}"
+        return result
+    result["seconds"] = min(timings)
+    return result
+
+
+def RunBenchmarks(names : list[str] = None, repeats : int = 5) -> dict:
+    """Times benchmarks, defaulting to all of them, and provides the results with details of the machine."""
+    names = names or [*BENCHMARKS]
+    return {
+        "python" : platform.python_version(),
+        "machine" : platform.machine(),
+        "results" : {name : RunBenchmark(name, repeats) for name in names}}
+
+
+def Regressions(results : dict, baseline : dict, threshold : float) -> dict:
+    """
+    Compares results against a baseline.
+
+    Parameters
+    ----------
+        results : results of a run
+        baseline : results of a previous run
+        threshold : the fraction a benchmark can slow down by before it's a regression
+
+    Returns
+    -------
+        The ratio of new to old time of each benchmark slower than the threshold allows.
+
+    """
+    regressions = {}
+    for name, result in results["results"].items():
+        old = baseline["results"].get(name, {})
+        # skip benchmarks new to this run, or that either run couldn't time
+        if "seconds" not in result or "seconds" not in old:
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        if ratio > 1 + threshold:
+            regressions[name] = ratio
+    return regressions
+
+
+def OverBudget(results : dict) -> dict:
+    """Provides the time of each benchmark slower than its budget."""
+    return {name : result["seconds"] for name, result in results["results"].items() if "seconds" in result and result["seconds"] > BUDGETS.get(name, inf)}
+
+
+def Main(argv : list[str] = None) -> int:
+    """Runs the suite from the command line, returning the exit status."""
+    parser = argparse.ArgumentParser(description="Benchmark fivecarddraw.")
+    parser.add_argument("names", nargs="*", help="benchmarks to run, defaulting to all")
+    parser.add_argument("--repeats", type=int, default=5, help="times to repeat each benchmark")
+    parser.add_argument("--save", help="path to save the results to as a baseline")
+    parser.add_argument("--baseline", help="path of a baseline to compare the results against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="fraction a benchmark can slow down by before failing")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks {unknown}, choose from {[*BENCHMARKS]}")
+
+    results = RunBenchmarks(args.names, args.repeats)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+    errors = [name for name, result in results["results"].items() if "error" in result]
+    for name, result in results["results"].items():
+        if "error" in result:
+            print(f"[BENCH] {name}: {result['error']}")
+            continue
+        line = f"[BENCH] {name}: {result['seconds'] * 1e6:.2f} us"
+        old = baseline["results"].get(name, {}) if baseline else {}
+        if "seconds" in old:
+            line += f" ({result['seconds'] / old['seconds']:.2f}x baseline)"
+        print(line)
+
+    # a benchmark that couldn't run fails the run, and can't be saved as a baseline to compare against
+    failed = bool(errors)
+    if errors:
+        print(f"[ERROR] {errors} couldn't be timed.")
+        if args.save:
+            print(f"[ERROR] Not saving results with errors to {args.save}.")
+    elif args.save:
+        with open(args.save + ".tmp", "w") as file:
+            json.dump(results, file, indent=2)
+        os.replace(args.save + ".tmp", args.save)
+
+    for name, seconds in OverBudget(results).items():
+        print(f"[BUDGET] {name} took {seconds:.3f} s, beyond its {BUDGETS[name]:.3f} s budget.")
+        failed = True
+    if baseline:
+        regressions = Regressions(results, baseline, args.threshold)
+        for name, ratio in regressions.items():
+            print(f"[REGRESSION] {name} is {ratio:.2f}x slower than baseline, beyond the {args.threshold:.0%} threshold.")
+            failed = True
+    return int(failed)
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
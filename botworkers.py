@@ -0,0 +1,422 @@
+import asyncio
+import multiprocessing
+from multiprocessing import shared_memory
+from struct import Struct
+
+from fivecarddraw import Card, Joker, RandomPolicy
+from handhistory import CardCode, FLAGS
+from tableserver import OTHER, StatusFlags
+
+
+# decision kinds, as in AsyncTable.Decide
+AMOUNT, DISCARDS = 0, 1
+KINDS = {"amount" : AMOUNT, "discards" : DISCARDS}
+
+# request record: id, kind, seat, stack, contribution, status flags, cards, call, pot and amount of others,
+# followed by room for every other player at a full table, so every record has the same size
+REQUEST = Struct("<IBBIIB5sIIB")
+MAX_OTHERS = 9
+REQUEST_SIZE = REQUEST.size + MAX_OTHERS * OTHER.size
+# response record: id of the request, and the amount to bet or mask of hand positions to discard
+RESPONSE = Struct("<II")
+
+# cards by their handhistory encoding, so workers can rebuild hands
+CARDS = [Card(value, suit) for value in range(13) for suit in range(4)] + [Joker()]
+
+# doorbell messages, sent down a pipe once per batch rather than once per decision
+READY, QUIT = b"r", b"q"
+
+
+class WorkerError(Exception):
+    """Raised when the worker process has stopped, so its requests will never be answered."""
+
+
+class Ring(object):
+    """
+    A class to pass fixed size records from one process to another through shared memory.
+
+    The header holds how many records have been written and read. Only the producer advances the first
+    and only the consumer the second, so neither needs a lock.
+
+    Attributes
+    ----------
+        memory : SharedMemory
+            the shared block holding the header and records
+        size : int
+            the size of each record in bytes
+        capacity : int
+            the amount of records the ring holds
+
+    Methods
+    -------
+        Free :
+            Get the amount of records that can be written.
+        Unread :
+            Get the amount of records that can be read.
+        WriteOffset :
+            Get the offset to write a record at.
+        Publish :
+            Make written records readable.
+        ReadOffset :
+            Get the offset to read a record at.
+        Release :
+            Make read records writable.
+        Close :
+            Detach from the shared block.
+
+    """
+
+    HEADER = Struct("<QQ")
+    COUNTER = Struct("<Q")
+
+    def __init__(self, size : int, capacity : int, name : str = None):
+        """
+        Constructs all the necessary attributes for the ring object.
+
+        Parameters
+        ----------
+            size : the size of each record in bytes
+            capacity : the amount of records the ring holds
+            name : the name of an existing ring to attach to, defaulting to creating a new one
+
+        """
+        self.size = size
+        self.capacity = capacity
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=self.HEADER.size + size * capacity)
+            self.HEADER.pack_into(self.memory.buf, 0, 0, 0)
+        else:
+            self.memory = shared_memory.SharedMemory(name)
+
+    def __reduce__(self):
+        """Attaches to the same ring when passed to a worker process that isn't forked."""
+        return (Ring, (self.size, self.capacity, self.memory.name))
+
+    def Free(self) -> int:
+        """Provides the amount of records that can be written."""
+        written, read = self.HEADER.unpack_from(self.memory.buf)
+        return self.capacity - (written - read)
+
+    def Unread(self) -> int:
+        """Provides the amount of records that can be read."""
+        written, read = self.HEADER.unpack_from(self.memory.buf)
+        return written - read
+
+    def WriteOffset(self, i : int) -> int:
+        """Provides the offset of the ith record to be written, which must be less than Free."""
+        written, _ = self.HEADER.unpack_from(self.memory.buf)
+        return self.HEADER.size + (written + i) % self.capacity * self.size
+
+    def Publish(self, n : int):
+        """Makes n written records readable."""
+        written, _ = self.HEADER.unpack_from(self.memory.buf)
+        self.COUNTER.pack_into(self.memory.buf, 0, written + n)
+
+    def ReadOffset(self, i : int) -> int:
+        """Provides the offset of the ith record to be read, which must be less than Unread."""
+        _, read = self.HEADER.unpack_from(self.memory.buf)
+        return self.HEADER.size + (read + i) % self.capacity * self.size
+
+    def Release(self, n : int):
+        """Makes n read records writable."""
+        _, read = self.HEADER.unpack_from(self.memory.buf)
+        self.COUNTER.pack_into(self.memory.buf, self.COUNTER.size, read + n)
+
+    def Close(self, unlink : bool = False):
+        """Detaches from the shared block, and destroys it if unlink."""
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+
+def PackRequest(buffer, offset : int, i : int, kind : int, info):
+    """
+    Packs a table view from Dealer.TableView into a request record in place.
+
+    Parameters
+    ----------
+        buffer : buffer to pack into
+        offset : offset of the record
+        i : id of the request
+        kind : AMOUNT or DISCARDS
+        info : table view of the player deciding
+
+    """
+    me, game = info["self"], info["game"]
+    REQUEST.pack_into(buffer, offset, i, kind, me["seat"], me["chips"]["stack"], me["chips"]["contribution"],
+                      StatusFlags(me["status"]), bytes(CardCode(card) for card in me["hand"]["cards"]),
+                      game["call"], game["pot"], len(info["others"]))
+    offset += REQUEST.size
+    for other in info["others"].values():
+        OTHER.pack_into(buffer, offset, other["seat"], other["chips"]["stack"], other["chips"]["contribution"], StatusFlags(other["status"]))
+        offset += OTHER.size
+
+
+def Status(flags : int) -> dict:
+    """Decodes status flags into the statuses of ActionTracker."""
+    return {key : bool(flags & flag) for key, flag in FLAGS if key != "has_raised"}
+
+
+def UnpackRequest(buffer, offset : int) -> tuple[int, int, dict]:
+    """Unpacks a request record into its id, its kind and a view shaped like Dealer.TableView, with others keyed by seat."""
+    i, kind, seat, stack, contribution, flags, cards, call, pot, n = REQUEST.unpack_from(buffer, offset)
+    others = {}
+    for j in range(n):
+        other_seat, other_stack, other_contribution, other_flags = OTHER.unpack_from(buffer, offset + REQUEST.size + j * OTHER.size)
+        others[other_seat] = {
+            "seat" : other_seat, "chips" : {"stack" : other_stack, "contribution" : other_contribution},
+            "status" : Status(other_flags), "hand" : ()}
+    info = {
+        "self" : {
+            "seat" : seat, "chips" : {"stack" : stack, "contribution" : contribution},
+            "status" : Status(flags), "hand" : {"cards" : tuple(CARDS[code] for code in cards)}},
+        "others" : others,
+        "game" : {"call" : call, "pot" : pot}}
+    return i, kind, info
+
+
+def Work(requests : Ring, responses : Ring, ready, done, policy):
+    """
+    Answers batches of requests until told to quit, as the target of a worker process.
+
+    Parameters
+    ----------
+        requests : ring to read requests from
+        responses : ring to write responses to
+        ready : end of a pipe rung when a batch of requests is ready
+        done : end of a pipe to ring when a batch of responses is ready
+        policy : fivecarddraw.Policy deciding each batch, without the names of players
+
+    """
+    buffer_in, buffer_out = requests.memory.buf, responses.memory.buf
+    try:
+        while ready.recv_bytes() == READY:
+            n = requests.Unread()
+            batch = [UnpackRequest(buffer_in, requests.ReadOffset(j)) for j in range(n)]
+            requests.Release(n)
+            # decide every bet in one call and every draw in another
+            amounts = [(i, info) for i, kind, info in batch if kind == AMOUNT]
+            draws = [(i, info) for i, kind, info in batch if kind == DISCARDS]
+            decisions = policy.SelectAmountBatch([(None, info) for _, info in amounts])
+            for discards, (_, info) in zip(policy.SelectDiscardsBatch([(None, info) for _, info in draws]), draws):
+                # send discards as a mask of positions in the hand
+                cards = info["self"]["hand"]["cards"]
+                decisions.append(sum(1 << cards.index(card) for card in discards))
+            for j, ((i, _), decision) in enumerate(zip(amounts + draws, decisions)):
+                RESPONSE.pack_into(buffer_out, responses.WriteOffset(j), i, decision)
+            responses.Publish(n)
+            done.send_bytes(READY)
+    except EOFError:
+        # the host went away
+        pass
+    finally:
+        del buffer_in, buffer_out
+        requests.Close()
+        responses.Close()
+
+
+class BotChannel(object):
+    """
+    A class to get bot decisions from a worker process through shared memory rings.
+
+    Table views are packed into fixed size records rather than pickled, and the worker hands each batch to
+    the batch methods of a policy. Requests made while a batch is being answered wait for the next batch,
+    so the decisions of many tables share one round trip.
+
+    Attributes
+    ----------
+        requests : Ring
+            ring of requests to the worker
+        responses : Ring
+            ring of responses from the worker
+        worker : multiprocessing.Process
+            the worker process
+        queued : list[tuple]
+            the kind, view and future of each request waiting for the next batch
+        in_flight : list[tuple]
+            the kind, view and future of each request in the batch being answered
+        round_trips : int
+            the amount of batches answered
+        decisions : int
+            the amount of decisions answered
+
+    Methods
+    -------
+        Start :
+            Start the worker.
+        Close :
+            Stop the worker and free the rings.
+        DecideBatch :
+            Get decisions for a batch of table views.
+        Decide :
+            Await a decision, batched with other decisions made at the same time.
+
+    """
+
+    def __init__(self, policy = None, capacity : int = 1024):
+        """
+        Constructs all the necessary attributes for the botchannel object.
+
+        Parameters
+        ----------
+            policy : fivecarddraw.Policy the worker decides with, defaulting to RandomPolicy, which must be
+                picklable unless workers are forked
+            capacity : most requests in a batch
+
+        """
+        self.policy = policy or RandomPolicy()
+        self.requests = Ring(REQUEST_SIZE, capacity)
+        self.responses = Ring(RESPONSE.size, capacity)
+        self.worker = None
+        self.queued = []
+        self.in_flight = []
+        self.round_trips = 0
+        self.decisions = 0
+
+    def __enter__(self):
+        self.Start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Close()
+
+    def Start(self):
+        """Starts the worker."""
+        ready_out, self.ready = multiprocessing.Pipe(duplex=False)
+        self.done, done_in = multiprocessing.Pipe(duplex=False)
+        self.worker = multiprocessing.Process(target=Work, args=(self.requests, self.responses, ready_out, done_in, self.policy), daemon=True)
+        self.worker.start()
+        ready_out.close()
+        done_in.close()
+
+    def Close(self):
+        """Stops the worker and frees the rings."""
+        if self.worker:
+            if self.worker.is_alive():
+                self.ready.send_bytes(QUIT)
+            self.worker.join()
+            self.ready.close()
+            self.done.close()
+            self.worker = None
+        self.requests.Close(unlink=True)
+        self.responses.Close(unlink=True)
+
+    def Stopped(self) -> WorkerError:
+        # describe a worker that has stopped, or was never started
+        if self.worker is None:
+            return WorkerError("The bot worker hasn't been started.")
+        return WorkerError(f"The bot worker stopped with exit code {self.worker.exitcode}.")
+
+    def Send(self, batch : list[tuple]):
+        # pack a batch of requests, led by their kind and view, and ring the worker
+        if self.worker is None or not self.worker.is_alive():
+            raise self.Stopped()
+        buffer = self.requests.memory.buf
+        for i, (kind, info, *_) in enumerate(batch):
+            PackRequest(buffer, self.requests.WriteOffset(i), i, KINDS[kind], info)
+        self.requests.Publish(len(batch))
+        try:
+            self.ready.send_bytes(READY)
+        except OSError:
+            raise self.Stopped() from None
+
+    def Receive(self, batch : list[tuple]) -> list:
+        # read the decisions of a batch once the worker has rung back, where a worker that stops closes the pipe
+        try:
+            self.done.recv_bytes()
+        except (EOFError, OSError):
+            self.worker.join()
+            raise self.Stopped() from None
+        buffer = self.responses.memory.buf
+        n = self.responses.Unread()
+        decisions = [None] * len(batch)
+        for j in range(n):
+            i, decision = RESPONSE.unpack_from(buffer, self.responses.ReadOffset(j))
+            kind, info = batch[i][:2]
+            if kind == "discards":
+                # turn the mask back into cards
+                decision = [card for k, card in enumerate(info["self"]["hand"]["cards"]) if decision >> k & 1]
+            decisions[i] = decision
+        self.responses.Release(n)
+        self.round_trips += 1
+        self.decisions += n
+        return decisions
+
+    def DecideBatch(self, batch : list[tuple]) -> list:
+        """
+        Gets decisions for a batch of table views, in as few round trips as the capacity allows, raising
+        WorkerError if the worker has stopped.
+
+        Parameters
+        ----------
+            batch : the kind of decision, "amount" or "discards", and table view of each request
+
+        Returns
+        -------
+            The amount to bet or the cards to discard for each request.
+
+        """
+        decisions = []
+        for start in range(0, len(batch), self.requests.capacity):
+            chunk = batch[start:start + self.requests.capacity]
+            self.Send(chunk)
+            decisions += self.Receive(chunk)
+        return decisions
+
+    async def Decide(self, name : str, kind : str, info) -> object:
+        """
+        Awaits a decision, sent in one batch with every other decision requested before the worker is free,
+        raising WorkerError if the worker has stopped, including while the decision waited.
+
+        Parameters
+        ----------
+            name : name of bot, which isn't sent to the worker
+            kind : "amount" to bet or "discards" to swap
+            info : the table view of the bot
+
+        """
+        if self.worker is None or not self.worker.is_alive():
+            raise self.Stopped()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.queued.append((kind, info, future))
+        # wait for the other tables to make their requests before sending them together
+        if len(self.queued) == 1 and not self.in_flight:
+            loop.call_soon(self.Flush)
+        return await future
+
+    def Flush(self):
+        # send the queued requests, unless a batch is already being answered
+        if self.in_flight or not self.queued:
+            return
+        self.in_flight = self.queued[:self.requests.capacity]
+        self.queued = self.queued[self.requests.capacity:]
+        try:
+            self.Send(self.in_flight)
+        except WorkerError as error:
+            self.Fail(error)
+            return
+        # answer the batch as soon as the worker rings back, or closes the pipe by stopping
+        asyncio.get_running_loop().add_reader(self.done.fileno(), self.Answer)
+
+    def Answer(self):
+        # resolve the batch being answered and send the next one
+        asyncio.get_running_loop().remove_reader(self.done.fileno())
+        batch, self.in_flight = self.in_flight, []
+        try:
+            decisions = self.Receive(batch)
+        except WorkerError as error:
+            self.in_flight = batch
+            self.Fail(error)
+            return
+        for (_, _, future), decision in zip(batch, decisions):
+            if not future.done():
+                future.set_result(decision)
+        self.Flush()
+
+    def Fail(self, error : WorkerError):
+        # fail every request waiting on a worker that has stopped, since none of them will be answered
+        batch, self.in_flight, self.queued = self.in_flight + self.queued, [], []
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(error)
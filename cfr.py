@@ -0,0 +1,450 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+from array import array
+from itertools import repeat
+from operator import add, mul, sub
+from struct import Struct
+
+from fivecarddraw import Card, Dealer, HandTracker, Policy
+from handstrength import Percentiles
+from ranktables import DATA
+
+
+# path of the solver checkpoint, and of the strategy exported from it
+CHECKPOINT = os.path.join(DATA, "cfr.bin")
+STRATEGY = os.path.join(DATA, "strategy.bin")
+
+# file layouts: magic, then the amount of buckets and of iterations trained, then the regrets and strategy sums of a
+# checkpoint, or the average strategy of an exported strategy, in the order of the abstraction's information sets
+CHECKPOINT_MAGIC = b"FCDC\x01"
+STRATEGY_MAGIC = b"FCDS\x01"
+HEADER = Struct("<IQ")
+
+# hand strength buckets, by percentile of rating
+BUCKETS = 10
+# amounts of cards the abstraction draws, leaving out four card draws, which are only legal while keeping an ace
+DRAWS = (0, 1, 2, 3)
+# betting histories of a round, where k checks, b bets the pot, r raises by the pot, c calls and f folds, with a bet
+# and a raise at most, so the first player acts after histories of even length and the second after odd lengths
+HISTORIES = ("", "k", "b", "kb", "br", "kbr")
+# ante each player puts in the pot of the abstract game
+ANTE = 1
+
+
+def Actions(history : str) -> str:
+    """Provides the actions after a betting history, as characters."""
+    if not history or history[-1] == "k":
+        return "kb"
+    return "fcr" if history.count("b") + history.count("r") < 2 else "fc"
+
+
+def InformationSets(buckets : int = BUCKETS) -> list[tuple]:
+    """
+    Enumerates the information sets of the abstract game, in the order of the solver's tables.
+
+    Returns
+    -------
+        The key of each information set and its amount of actions, where keys are the round, the bucket of the hand of
+        the player, the fewest cards drawn by an opponent, or -1 before any opponent has drawn, and the betting history.
+
+    """
+    sets = [((0, bucket, -1, history), len(Actions(history))) for bucket in range(buckets) for history in HISTORIES]
+    sets += [(("draw", bucket, drawn, ""), len(DRAWS)) for bucket in range(buckets) for drawn in (-1,) + DRAWS]
+    sets += [((1, bucket, drawn, history), len(Actions(history))) for bucket in range(buckets) for drawn in DRAWS for history in HISTORIES]
+    return sets
+
+
+def Discards(hand : list[Card], count : int) -> list[Card]:
+    """Chooses which cards to draw to, keeping cards sharing a value with others first, then the highest cards."""
+    values = [card.value_i for card in hand]
+    kept = sorted(hand, key = lambda card : (values.count(card.value_i), card.value_i), reverse = True)
+    return kept[5 - count :] if count else []
+
+
+class Solver(object):
+    """
+    A class to solve the abstract game by Monte Carlo counterfactual regret minimisation.
+
+    The abstract game is heads up. Both players ante, bet in a round before the draw, draw up to three cards and
+    bet in a round after it, seeing only the bucket of their own hand, how many cards their opponent drew and the
+    betting. Each iteration samples a deal and, in turn for each player, every action of that player and one action
+    of their opponent, as in external sampling. Regrets are floored at zero and the strategy is averaged with weights
+    growing with the iteration, as in CFR+.
+
+    Attributes
+    ----------
+        buckets : int
+            amount of hand strength buckets
+        sets : dict
+            the offset into the tables and the amount of actions of each information set, by key
+        regrets : array
+            the regret of each action of each information set
+        strategy : array
+            the weighted sum of the strategies played at each information set
+        iterations : int
+            the amount of iterations trained
+        tracker : HandTracker
+            the handtracker rating hands
+        percentiles : array
+            the percentile of each numerical rating
+        rng : Random
+            random number generator of the deals and sampled actions
+
+    Methods
+    -------
+        Train :
+            Run iterations of the solver.
+        Average :
+            Get the average strategy of an information set.
+        Save :
+            Write a checkpoint.
+        Load :
+            Read a checkpoint.
+        Export :
+            Write the average strategy as a lookup table.
+
+    """
+
+    def __init__(self, buckets : int = BUCKETS, seed : int = None):
+        """
+        Constructs all the necessary attributes for the solver object.
+
+        Parameters
+        ----------
+            buckets : amount of hand strength buckets
+            seed : seed of the deals and sampled actions
+
+        """
+        self.buckets = buckets
+        self.sets, size = {}, 0
+        for key, n in InformationSets(buckets):
+            self.sets[key] = (size, n)
+            size += n
+        self.regrets = array("d", [0.0]) * size
+        self.strategy = array("d", [0.0]) * size
+        self.iterations = 0
+        self.tracker = HandTracker()
+        self.percentiles = Percentiles()
+        self.rng = random.Random(seed)
+
+    def Bucket(self, rank_n : int) -> int:
+        """Provides the bucket of a numerical rating, by its percentile."""
+        return min(int(self.percentiles[rank_n] * self.buckets / 100), self.buckets - 1)
+
+    def Current(self, key : tuple) -> list[float]:
+        """Provides the strategy of an information set by regret matching, playing uniformly without regrets."""
+        offset, n = self.sets[key]
+        regrets = [max(regret, 0.0) for regret in self.regrets[offset : offset + n]]
+        total = sum(regrets)
+        return [regret / total for regret in regrets] if total else [1 / n] * n
+
+    def Average(self, key : tuple) -> list[float]:
+        """Provides the average strategy of an information set, uniform if it was never reached."""
+        offset, n = self.sets[key]
+        sums = self.strategy[offset : offset + n]
+        total = sum(sums)
+        return [s / total for s in sums] if total else [1 / n] * n
+
+    def Deal(self) -> list[dict]:
+        """
+        Samples a deal, rating the hand of each player before the draw and after each amount of cards drawn.
+
+        Each player draws from their own cards of the deck, so what one draws doesn't depend on the other.
+
+        """
+        deck = [Card(value, suit) for value in range(13) for suit in range(4)]
+        cards = self.rng.sample(deck, 20)
+        players = []
+        for i in range(2):
+            hand, stub = cards[5 * i : 5 * i + 5], cards[10 + 5 * i : 15 + 5 * i]
+            after = []
+            for count in DRAWS:
+                discards = Discards(hand, count)
+                after.append(self.tracker.EvaluateHand([card for card in hand if card not in discards] + stub[:count]))
+            players.append({"before" : self.Bucket(self.tracker.EvaluateHand(hand)), "after" : after})
+        return players
+
+    def Train(self, iterations : int):
+        """Runs iterations of the solver, each sampling a deal and updating the regrets of both players."""
+        for _ in range(iterations):
+            self.iterations += 1
+            deal = self.Deal()
+            for traverser in range(2):
+                self.Walk(traverser, deal, 0, "", [ANTE, ANTE], [None, None])
+
+    def Walk(self, traverser : int, deal : list[dict], stage, history : str, contributions : list[int], draws : list) -> float:
+        """
+        Walks the abstract game from a node, updating the regrets of the traverser and the strategy of their opponent.
+
+        Parameters
+        ----------
+            traverser : the player whose regrets are updated
+            deal : the sampled deal
+            stage : the betting round, 0 or 1, or "draw"
+            history : the betting history of the round
+            contributions : chips each player has put in the pot
+            draws : amount of cards each player drew, or None before they draw
+
+        Returns
+        -------
+            The chips the traverser wins, net of what they put in.
+
+        """
+        if stage == "draw":
+            actor = 0 if draws[0] is None else 1
+            key = ("draw", deal[actor]["before"], -1 if actor == 0 else draws[0], "")
+            actions = DRAWS
+        else:
+            actor = len(history) % 2
+            bucket = deal[actor]["before"] if stage == 0 else self.Bucket(deal[actor]["after"][draws[actor]])
+            key = (stage, bucket, -1 if stage == 0 else draws[1 - actor], history)
+            actions = Actions(history)
+
+        def Child(action):
+            # play an action, then score the hand if it ended
+            if stage == "draw":
+                drawn = draws[:]
+                drawn[actor] = action
+                return self.Walk(traverser, deal, "draw" if actor == 0 else 1, "", contributions, drawn)
+            paid = contributions[:]
+            pot, call = sum(contributions), contributions[1 - actor] - contributions[actor]
+            if action == "f":
+                return -paid[traverser] if actor == traverser else paid[1 - traverser]
+            paid[actor] += {"k" : 0, "c" : call, "b" : pot, "r" : 2 * call + pot}[action]
+            if action == "c" or history + action == "kk":
+                if stage == 0:
+                    return self.Walk(traverser, deal, "draw", "", paid, draws)
+                # compare hands at showdown, where lower ratings are better
+                mine, theirs = deal[traverser]["after"][draws[traverser]], deal[1 - traverser]["after"][draws[1 - traverser]]
+                return paid[1 - traverser] if mine < theirs else -paid[traverser] if mine > theirs else 0.0
+            return self.Walk(traverser, deal, stage, history + action, paid, draws)
+
+        offset, n = self.sets[key]
+        strategy = self.Current(key)
+        if actor != traverser:
+            # the opponent plays one sampled action, and their strategy is averaged, weighted by the iteration
+            self.strategy[offset : offset + n] = array("d", map(add, self.strategy[offset : offset + n], map(mul, repeat(self.iterations), strategy)))
+            return Child(self.rng.choices(actions, strategy)[0])
+        utilities = [Child(action) for action in actions]
+        value = sum(p * u for p, u in zip(strategy, utilities))
+        regrets = map(sub, map(add, self.regrets[offset : offset + n], utilities), repeat(value))
+        self.regrets[offset : offset + n] = array("d", map(max, regrets, repeat(0.0)))
+        return value
+
+    def Save(self, path : str = CHECKPOINT):
+        """Writes the regrets and strategy sums to a checkpoint."""
+        columns = [self.regrets, self.strategy]
+        if sys.byteorder == "big":
+            columns = [array("d", column) for column in columns]
+            for column in columns:
+                column.byteswap()
+        with open(path + ".tmp", "wb") as file:
+            file.write(CHECKPOINT_MAGIC + HEADER.pack(self.buckets, self.iterations))
+            for column in columns:
+                column.tofile(file)
+        os.replace(path + ".tmp", path)
+
+    def Load(self, path : str = CHECKPOINT):
+        """Reads the regrets and strategy sums from a checkpoint."""
+        with open(path, "rb") as file:
+            if file.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC:
+                raise ValueError(f"{path} isn't a solver checkpoint.")
+            buckets, self.iterations = HEADER.unpack(file.read(HEADER.size))
+            if buckets != self.buckets:
+                raise ValueError(f"{path} has {buckets} buckets, not {self.buckets}.")
+            for column in [self.regrets, self.strategy]:
+                data = array("d")
+                data.fromfile(file, len(column))
+                if sys.byteorder == "big":
+                    data.byteswap()
+                column[:] = data
+
+    def Export(self, path : str = STRATEGY):
+        """Writes the average strategy of every information set as a lookup table."""
+        strategy = array("f", [p for key in self.sets for p in self.Average(key)])
+        if sys.byteorder == "big":
+            strategy.byteswap()
+        with open(path + ".tmp", "wb") as file:
+            file.write(STRATEGY_MAGIC + HEADER.pack(self.buckets, self.iterations))
+            strategy.tofile(file)
+        os.replace(path + ".tmp", path)
+
+
+def TrainBatch(task : tuple) -> tuple[bytes, bytes]:
+    """Trains a copy of the solver on a batch of iterations, providing how much it changed its tables."""
+    buckets, regrets, iterations, start, seed = task
+    solver = Solver(buckets, seed)
+    solver.regrets = array("d", regrets)
+    solver.iterations = start
+    before = solver.regrets[:]
+    solver.Train(iterations)
+    changes = array("d", map(sub, solver.regrets, before))
+    return changes.tobytes(), solver.strategy.tobytes()
+
+
+def Train(path : str = CHECKPOINT, iterations : int = 100000, processes : int = None, epoch : int = 1000,
+          buckets : int = BUCKETS, seed : int = 0) -> Solver:
+    """
+    Trains the solver across processes, resuming from the checkpoint at path and writing it after every epoch.
+
+    Each process trains a copy of the solver on its own deals for an epoch, then the changes of every copy are summed
+    into the solver, so an interruption loses at most the epoch being trained.
+
+    Parameters
+    ----------
+        path : path of the checkpoint
+        iterations : amount of iterations to have trained in total
+        processes : amount of processes to train in, defaulting to one per core
+        epoch : amount of iterations each process trains between checkpoints
+        buckets : amount of hand strength buckets
+        seed : seed of the deals, combined with the iterations trained so resumed runs sample new deals
+
+    """
+    solver = Solver(buckets, seed)
+    if os.path.exists(path):
+        solver.Load(path)
+    processes = processes or os.cpu_count()
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    try:
+        while solver.iterations < iterations:
+            batch = min(epoch, -(-(iterations - solver.iterations) // processes))
+            tasks = [(buckets, solver.regrets.tobytes(), batch, solver.iterations, seed * 1000003 + solver.iterations * processes + i)
+                     for i in range(processes)]
+            results = pool.map(TrainBatch, tasks) if pool else map(TrainBatch, tasks)
+            for changes, strategy in results:
+                solver.regrets[:] = array("d", map(add, solver.regrets, array("d", changes)))
+                solver.strategy[:] = array("d", map(add, solver.strategy, array("d", strategy)))
+            # regrets are floored again, since the copies' changes were made against the same regrets
+            solver.regrets[:] = array("d", map(max, solver.regrets, repeat(0.0)))
+            solver.iterations += batch * processes
+            solver.Save(path)
+    finally:
+        if pool:
+            pool.close()
+    return solver
+
+
+class CFRPolicy(Policy):
+    """
+    A class to play an exported strategy, by looking up the information set each decision maps to.
+
+    Bets are mapped to the abstract game by how many bets and raises have been made in the round, and whether the
+    player is first to act, with pot sized bets and raises, and several opponents treated as one with the fewest
+    cards drawn. Hands are bucketed by the percentiles of standard five card draw, so tables of other variants are
+    refused.
+
+    Attributes
+    ----------
+        dealer : Dealer
+            the dealer of the table being played
+        buckets : int
+            amount of hand strength buckets
+        sets : dict
+            the offset into the strategy and the amount of actions of each information set, by key
+        strategy : array
+            the probability of each action of each information set
+        tracker : HandTracker
+            the handtracker of the table, rating hands
+        percentiles : array
+            the percentile of each numerical rating
+        rng : Random
+            random number generator of the actions
+
+    """
+
+    def __init__(self, dealer : Dealer, path : str = STRATEGY, seed : int = None):
+        """
+        Constructs all the necessary attributes for the CFR policy object.
+
+        Parameters
+        ----------
+            dealer : the dealer of the table being played
+            path : path of the exported strategy
+            seed : seed of the actions
+
+        """
+        if type(dealer.cards) is not HandTracker:
+            raise ValueError(f"The strategy is solved for standard five card draw, not for {type(dealer.cards).__name__}.")
+        self.dealer = dealer
+        with open(path, "rb") as file:
+            if file.read(len(STRATEGY_MAGIC)) != STRATEGY_MAGIC:
+                raise ValueError(f"{path} isn't an exported strategy.")
+            self.buckets, _ = HEADER.unpack(file.read(HEADER.size))
+            self.sets, size = {}, 0
+            for key, n in InformationSets(self.buckets):
+                self.sets[key] = (size, n)
+                size += n
+            self.strategy = array("f")
+            self.strategy.fromfile(file, size)
+        if sys.byteorder == "big":
+            self.strategy.byteswap()
+        self.tracker = dealer.cards
+        self.percentiles = Percentiles()
+        self.rng = random.Random(seed)
+
+    def Bucket(self, hand : list[Card]) -> int:
+        """Provides the bucket of a hand, by the percentile of its rating."""
+        rank_n = self.tracker.EvaluateHand(hand)
+        percentile = self.percentiles[rank_n] if rank_n > 0 else 100.0
+        return min(int(percentile * self.buckets / 100), self.buckets - 1)
+
+    def Choose(self, key : tuple):
+        """Samples an action of an information set by the strategy."""
+        offset, n = self.sets[key]
+        return self.rng.choices(range(n), self.strategy[offset : offset + n])[0]
+
+    def Opponents(self, name : str) -> list[str]:
+        """Provides the opponents of a player still in the hand."""
+        action = self.dealer.action
+        return [other for other in action.players if other != name and not action.players[other]["has_folded"]]
+
+    def SelectAmount(self, name : str, info) -> int:
+        """Decides how many chips a player puts in the pot, by the strategy of the betting round."""
+        dealer = self.dealer
+        stage = 1 if dealer.drawn else 0
+        order = dealer.action.ActingPlayers(dealer.DealingOrder() if stage else dealer.PreflopOrder())
+        first = not order or order[0] == name
+        history = {0 : "" if first else "k", 1 : "kb" if first else "b"}.get(dealer.bets, "br" if first else "kbr")
+        if not info['game']['call'] and history[-1:] in ("b", "r"):
+            history = "" if first else "k"
+        drawn = min([dealer.drawn.get(other, 0) for other in self.Opponents(name)] or [0]) if stage else -1
+        key = (stage, self.Bucket(info['self']['hand']['cards']), min(drawn, DRAWS[-1]), history)
+        action = Actions(history)[self.Choose(key)]
+        stack, call, pot = info['self']['chips']['stack'], info['game']['call'], info['game']['pot']
+        return min({"k" : 0, "f" : 0, "c" : call, "b" : pot, "r" : 2 * call + pot}[action], stack)
+
+    def SelectDiscards(self, name : str, info) -> list[Card]:
+        """Decides which cards a player swaps, drawing as many cards as the strategy of the draw chooses."""
+        drawn = [self.dealer.drawn[other] for other in self.Opponents(name) if other in self.dealer.drawn]
+        hand = info['self']['hand']['cards']
+        key = ("draw", self.Bucket(hand), min(min(drawn), DRAWS[-1]) if drawn else -1, "")
+        return Discards(hand, DRAWS[self.Choose(key)])
+
+
+def Main(argv : list[str] = None) -> int:
+    """Trains the solver from the command line, resuming from its checkpoint, and exports its strategy."""
+    parser = argparse.ArgumentParser(description="Solve an abstraction of heads up five card draw by counterfactual regret minimisation.")
+    parser.add_argument("--path", default=CHECKPOINT, help="path of the checkpoint")
+    parser.add_argument("--strategy", default=STRATEGY, help="path to export the strategy to")
+    parser.add_argument("--iterations", type=int, default=100000, help="iterations to have trained in total")
+    parser.add_argument("--processes", type=int, default=None, help="processes to train in, defaulting to one per core")
+    parser.add_argument("--epoch", type=int, default=1000, help="iterations each process trains between checkpoints")
+    parser.add_argument("--buckets", type=int, default=BUCKETS, help="hand strength buckets")
+    args = parser.parse_args(argv)
+
+    try:
+        solver = Train(args.path, args.iterations, args.processes, args.epoch, args.buckets)
+    except KeyboardInterrupt:
+        print(f"[CFR] Interrupted, run again to resume from {args.path}.")
+        return 1
+    solver.Export(args.strategy)
+    print(f"[CFR] Trained {solver.iterations} iterations, checkpointed to {args.path}.")
+    print(f"[CFR] Exported the strategy to {args.strategy}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
@@ -0,0 +1,449 @@
+import argparse
+import mmap
+import multiprocessing
+import os
+import random
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import combinations, combinations_with_replacement
+from struct import Struct
+
+from fivecarddraw import CATEGORIES, Card, HandTracker, Policy, RandomPolicy
+from ranktables import DATA
+
+
+# path of the draw table, built by running this module
+DRAWS = os.path.join(DATA, "draws.bin")
+
+# file layout: magic and header, then a byte per chunk marking it solved, the key of each canonical hand, the best
+# option of each hand and the expected rating and win rate of every option of each hand, each section 8 byte aligned
+MAGIC = b"FCDD\x01"
+# amount of hands, opponents, samples per hand, seed and hands per chunk
+HEADER = Struct("<IIIII")
+# discard options of a hand, as masks of the positions of its cards in canonical order
+OPTIONS = 32
+# expected rating and win rate of each option, where win rates are scaled to WIN and illegal options are marked
+RECORD = Struct(f"<{2 * OPTIONS}H")
+WIN = 65535
+ILLEGAL = 65535
+# best option of a hand that hasn't been solved yet
+UNSOLVED = 255
+
+# canonical hands solved in each unit of work, which is also how much work is lost to an interruption
+CHUNK = 256
+# opponents are dealt and draw from a single deck, so at most five fit alongside the hand being solved
+MAX_OPPONENTS = 5
+SAMPLES = 100
+
+# amounts of cards of each suit a five card hand can have, from most to fewest
+SHAPES = [(5,), (4, 1), (3, 2), (3, 1, 1), (2, 2, 1), (2, 1, 1, 1)]
+# hands that opponents stand pat with
+STRAIGHT = CATEGORIES["straight"][1]
+
+
+def SuitOrder(mask : int) -> tuple:
+    """Orders suits of a hand by how many cards they hold, then by their card values."""
+    return (bin(mask).count("1"), mask)
+
+
+def Key(masks : list[int]) -> int:
+    """Encodes a hand by the card values of each suit, ordered so hands differing only by suit share a key."""
+    masks = sorted(masks, key = SuitOrder, reverse = True) + [0] * (4 - len(masks))
+    return masks[0] << 39 | masks[1] << 26 | masks[2] << 13 | masks[3]
+
+
+def CanonicalHands() -> list[int]:
+    """
+    Enumerates the key of every five card hand up to the relabelling of suits.
+
+    Returns
+    -------
+        The 134,459 keys of canonical hands in ascending order.
+
+    """
+    masks = {size : [sum(1 << value for value in values) for values in combinations(range(13), size)] for size in range(1, 6)}
+    keys = set()
+    for shape in SHAPES:
+        # suits with the same amount of cards are interchangeable, so are chosen without regard to order
+        groups = [[*combinations_with_replacement(masks[size], shape.count(size))] for size in sorted(set(shape), reverse = True)]
+        choices = [[]]
+        for group in groups:
+            choices = [chosen + [*suits] for chosen in choices for suits in group]
+        keys.update(Key(chosen) for chosen in choices)
+    return sorted(keys)
+
+
+def Hand(key : int) -> list[Card]:
+    """Provides the cards of a canonical hand in canonical order, by suit then by card value."""
+    masks = [key >> 13 * (3 - suit) & 0x1FFF for suit in range(4)]
+    return [Card(value, suit) for suit, mask in enumerate(masks) for value in range(13) if mask >> value & 1]
+
+
+def Canonical(hand : list[Card]) -> tuple[int, list[Card]]:
+    """
+    Finds the canonical hand a hand is a relabelling of.
+
+    Parameters
+    ----------
+        hand : hand of five cards
+
+    Returns
+    -------
+        The key of the canonical hand, and the cards of the hand in canonical order, so option masks can be
+        read off as positions in the hand.
+
+    """
+    masks = [0] * 4
+    for card in hand:
+        # only cards of the standard deck have keys, since the value of a joker would spill into the next suit
+        if not 0 <= card.value_i < 13:
+            raise ValueError(f"{card} isn't a card of the standard deck.")
+        masks[card.suit_i] |= 1 << card.value_i
+    suits = sorted(range(4), key = lambda suit : SuitOrder(masks[suit]), reverse = True)
+    order = sorted(hand, key = lambda card : (suits.index(card.suit_i), card.value_i))
+    return Key(masks), order
+
+
+def TypicalDiscards(tracker : HandTracker, hand : list[Card]) -> list[Card]:
+    """
+    Decides which cards a typical opponent swaps, which the expected outcome of each option is measured against.
+
+    Opponents stand pat with a straight or better, keep any cards of the same value, draw to four cards of a suit,
+    and otherwise keep their two highest cards.
+
+    """
+    if tracker.EvaluateHand(hand) <= STRAIGHT:
+        return []
+    values = [card.value_i for card in hand]
+    singles = [card for card in hand if values.count(card.value_i) == 1]
+    if len(singles) < 5:
+        return singles
+    for suit in range(4):
+        odd = [card for card in hand if card.suit_i != suit]
+        if len(odd) == 1:
+            return odd
+    return sorted(hand, key = lambda card : card.value_i)[:3]
+
+
+def Solve(tracker : HandTracker, key : int, opponents : int, samples : int, rng : random.Random) -> tuple[int, list[int]]:
+    """
+    Estimates the outcome of each discard option of a canonical hand by sampling the draws of it and its opponents.
+
+    Every option is measured on the same samples, so their differences aren't swamped by sampling noise.
+
+    Parameters
+    ----------
+        tracker : handtracker rating hands and deciding legal discards
+        key : the key of the canonical hand
+        opponents : amount of opponents drawing typically
+        samples : amount of deals to sample
+        rng : random number generator to sample deals with
+
+    Returns
+    -------
+        The best option, then the expected rating and win rate of each option, as stored in the table.
+
+    """
+    hand = Hand(key)
+    kept = {option : [hand[i] for i in range(5) if not option >> i & 1] for option in range(OPTIONS)}
+    legal = [option for option in range(OPTIONS) if tracker.AllowDiscards(hand, [card for card in hand if card not in kept[option]])]
+    deck = [Card(value, suit) for value in range(13) for suit in range(4)]
+    deck = [card for card in deck if card not in hand]
+    ratings = dict.fromkeys(legal, 0)
+    wins = dict.fromkeys(legal, 0.0)
+    for _ in range(samples):
+        rng.shuffle(deck)
+        # deal the opponents, then let them draw from the top of the deck
+        t = 5 * opponents
+        theirs = []
+        for j in range(opponents):
+            cards = deck[5 * j : 5 * j + 5]
+            discards = TypicalDiscards(tracker, cards)
+            drawn, t = deck[t : t + len(discards)], t + len(discards)
+            theirs.append(tracker.EvaluateHand([card for card in cards if card not in discards] + drawn))
+        best = min(theirs)
+        share = 1 / (theirs.count(best) + 1)
+        # draw for each option from the same cards
+        drawn = deck[t : t + 5]
+        for option in legal:
+            rank_n = tracker.EvaluateHand(kept[option] + drawn[: 5 - len(kept[option])])
+            ratings[option] += rank_n
+            wins[option] += 1 if rank_n < best else share if rank_n == best else 0
+    record = [ILLEGAL, 0] * OPTIONS
+    for option in legal:
+        record[2 * option : 2 * option + 2] = [round(ratings[option] / samples), round(WIN * wins[option] / samples)]
+    # prefer the option winning most, then the one with the better expected rating
+    best = max(legal, key = lambda option : (record[2 * option + 1], -record[2 * option]))
+    return best, record
+
+
+def SolveChunk(task : tuple) -> tuple[int, bytes, bytes]:
+    """Solves a chunk of canonical hands, seeded by the chunk so results don't depend on which process solves it."""
+    chunk, keys, opponents, samples, seed = task
+    tracker = HandTracker()
+    rng = random.Random(seed * 1000003 + chunk)
+    best, records = array("B"), array("H")
+    for key in keys:
+        option, record = Solve(tracker, key, opponents, samples, rng)
+        best.append(option)
+        records.extend(record)
+    if sys.byteorder == "big":
+        records.byteswap()
+    return chunk, best.tobytes(), records.tobytes()
+
+
+def Align(n : int) -> int:
+    """Rounds an offset up to a multiple of 8 bytes."""
+    return -(-n // 8) * 8
+
+
+def Layout(hands : int, chunk : int) -> dict:
+    """Provides the offset of each section of a draw table, and its total size."""
+    offsets = {"done" : len(MAGIC) + HEADER.size}
+    offsets["keys"] = Align(offsets["done"] + -(-hands // chunk))
+    offsets["best"] = offsets["keys"] + 8 * hands
+    offsets["records"] = Align(offsets["best"] + hands)
+    offsets["size"] = offsets["records"] + RECORD.size * hands
+    return offsets
+
+
+def Create(path : str, keys : list[int], opponents : int, samples : int, seed : int, chunk : int):
+    """Writes an empty draw table, with every chunk unsolved."""
+    layout = Layout(len(keys), chunk)
+    keys = array("Q", keys)
+    if sys.byteorder == "big":
+        keys.byteswap()
+    with open(path + ".tmp", "wb") as file:
+        file.write(MAGIC + HEADER.pack(len(keys), opponents, samples, seed, chunk))
+        file.seek(layout["keys"])
+        keys.tofile(file)
+        file.write(bytes([UNSOLVED]) * len(keys))
+        file.truncate(layout["size"])
+    os.replace(path + ".tmp", path)
+
+
+def Build(path : str = DRAWS, opponents : int = 1, samples : int = SAMPLES, seed : int = 0, processes : int = None,
+          chunks : int = None, chunk : int = CHUNK) -> int:
+    """
+    Solves the draw table chunk by chunk across processes, resuming the table at path if it was interrupted.
+
+    Chunks are written to the table as they are solved and only then marked solved, so an interruption loses at
+    most the chunks being solved, and running the build again solves only what is left.
+
+    Parameters
+    ----------
+        path : path of the draw table
+        opponents : amount of opponents each hand is measured against
+        samples : amount of deals sampled for each hand
+        seed : seed of the sampled deals
+        processes : amount of processes to solve chunks in, defaulting to one per core
+        chunks : most chunks to solve before stopping, defaulting to all of them
+        chunk : amount of hands in each chunk
+
+    Returns
+    -------
+        The amount of chunks left to solve.
+
+    """
+    if not 1 <= opponents <= MAX_OPPONENTS:
+        raise ValueError(f"Draws are measured against 1 to {MAX_OPPONENTS} opponents, not {opponents}.")
+    keys = CanonicalHands()
+    settings = HEADER.pack(len(keys), opponents, samples, seed, chunk)
+    # start again if the table was built with other settings
+    if not os.path.exists(path):
+        Create(path, keys, opponents, samples, seed, chunk)
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC) + HEADER.size) != MAGIC + settings:
+            Create(path, keys, opponents, samples, seed, chunk)
+
+    layout = Layout(len(keys), chunk)
+    with open(path, "r+b") as file, mmap.mmap(file.fileno(), 0) as table:
+        done = table[layout["done"] : layout["keys"]]
+        tasks = [(i, keys[i * chunk : (i + 1) * chunk], opponents, samples, seed) for i in range(-(-len(keys) // chunk)) if not done[i]]
+        left = len(tasks)
+        if chunks is not None:
+            tasks = tasks[:chunks]
+
+        def Save(i, best, records):
+            # write the results before marking the chunk solved, so a chunk is never marked with missing results
+            start = i * chunk
+            table[layout["best"] + start : layout["best"] + start + len(best)] = best
+            table[layout["records"] + RECORD.size * start : layout["records"] + RECORD.size * start + len(records)] = records
+            table.flush()
+            table[layout["done"] + i] = 1
+            table.flush()
+
+        if processes == 1:
+            for task in tasks:
+                Save(*SolveChunk(task))
+                left -= 1
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                for result in pool.imap_unordered(SolveChunk, tasks):
+                    Save(*result)
+                    left -= 1
+    return left
+
+
+class DrawTable(object):
+    """
+    A class to look up the best discards of a hand in a memory-mapped draw table.
+
+    Attributes
+    ----------
+        table : mmap
+            the memory-mapped draw table
+        keys : array
+            the key of each canonical hand, in ascending order
+        opponents : int
+            amount of opponents the table was built against
+        samples : int
+            amount of deals sampled for each hand
+        layout : dict
+            the offset of each section of the table
+
+    Methods
+    -------
+        Index :
+            Get the position of a hand in the table.
+        Options :
+            Get the expected outcome of each legal option of a hand.
+        BestDiscards :
+            Get the best cards of a hand to swap.
+        Close :
+            Unmap the table.
+
+    """
+
+    def __init__(self, path : str = DRAWS):
+        """
+        Maps a draw table built by Build.
+
+        Parameters
+        ----------
+            path : path of the draw table
+
+        """
+        with open(path, "rb") as file:
+            self.table = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+        if self.table[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} isn't a draw table file.")
+        hands, self.opponents, self.samples, _, chunk = HEADER.unpack_from(self.table, len(MAGIC))
+        self.layout = Layout(hands, chunk)
+        self.keys = array("Q", self.table[self.layout["keys"] : self.layout["best"]])
+        if sys.byteorder == "big":
+            self.keys.byteswap()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.Close()
+
+    def Index(self, hand : list[Card]) -> tuple[int, list[Card]]:
+        """Finds the position of a hand in the table, and its cards in canonical order."""
+        key, order = Canonical(hand)
+        return bisect_left(self.keys, key), order
+
+    def Options(self, hand : list[Card]) -> list[tuple]:
+        """
+        Provides the expected outcome of each legal option of a hand, or nothing if its chunk hasn't been solved.
+
+        Returns
+        -------
+            The cards to swap, expected rating and win rate of each legal option.
+
+        """
+        i, order = self.Index(hand)
+        if self.table[self.layout["best"] + i] == UNSOLVED:
+            return []
+        record = RECORD.unpack_from(self.table, self.layout["records"] + RECORD.size * i)
+        return [([order[j] for j in range(5) if option >> j & 1], record[2 * option], record[2 * option + 1] / WIN)
+                for option in range(OPTIONS) if record[2 * option] != ILLEGAL]
+
+    def BestDiscards(self, hand : list[Card]) -> list[Card]:
+        """Provides the cards of a hand whose swap wins most, or None if its chunk hasn't been solved."""
+        i, order = self.Index(hand)
+        option = self.table[self.layout["best"] + i]
+        if option == UNSOLVED:
+            return None
+        return [order[j] for j in range(5) if option >> j & 1]
+
+    def Close(self):
+        self.table.close()
+
+
+class DrawTablePolicy(Policy):
+    """
+    A class to swap the cards a draw table finds best, deciding bets and any unsolved hands by another policy.
+
+    The draw table is solved for standard five card draw, so hands holding cards outside the standard deck are also
+    decided by the other policy, and tables of other variants are refused.
+
+    Attributes
+    ----------
+        table : DrawTable
+            the draw table looked up
+        fallback : Policy
+            the policy deciding bets, and discards of hands the table hasn't solved or can't look up
+
+    """
+
+    def __init__(self, table : DrawTable = None, fallback : Policy = None, tracker : HandTracker = None):
+        """
+        Constructs all the necessary attributes for the draw table policy object.
+
+        Parameters
+        ----------
+            table : the draw table to look up, defaulting to the one built at DRAWS
+            fallback : the policy deciding otherwise, defaulting to deciding at random
+            tracker : the hand tracker of the table played at, which must rate hands as standard five card draw does
+
+        """
+        if tracker is not None and type(tracker) is not HandTracker:
+            raise ValueError(f"The draw table is solved for standard five card draw, not for {type(tracker).__name__}.")
+        self.table = table or DrawTable()
+        self.fallback = fallback or RandomPolicy()
+
+    def SelectAmount(self, name : str, info) -> int:
+        """Decides how many chips a player puts in the pot, by the fallback policy."""
+        return self.fallback.SelectAmount(name, info)
+
+    def SelectDiscards(self, name : str, info) -> list[Card]:
+        """Decides which cards a player swaps, by a single lookup of their hand."""
+        try:
+            discards = self.table.BestDiscards(info['self']['hand']['cards'])
+        except ValueError:
+            # hands holding a joker aren't in the table
+            discards = None
+        if discards is None:
+            return self.fallback.SelectDiscards(name, info)
+        return discards
+
+
+def Main(argv : list[str] = None) -> int:
+    """Builds or resumes the draw table from the command line."""
+    parser = argparse.ArgumentParser(description="Solve the best discards of every five card hand into a draw table.")
+    parser.add_argument("--path", default=DRAWS, help="path of the draw table")
+    parser.add_argument("--opponents", type=int, default=1, help="opponents each hand is measured against")
+    parser.add_argument("--samples", type=int, default=SAMPLES, help="deals sampled for each hand")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the sampled deals")
+    parser.add_argument("--processes", type=int, default=None, help="processes to solve in, defaulting to one per core")
+    parser.add_argument("--chunks", type=int, default=None, help="most chunks to solve before stopping")
+    args = parser.parse_args(argv)
+
+    try:
+        left = Build(args.path, args.opponents, args.samples, args.seed, args.processes, args.chunks)
+    except KeyboardInterrupt:
+        print(f"[DRAWS] Interrupted, run again to resume {args.path}.")
+        return 1
+    if left:
+        print(f"[DRAWS] {left} chunks of {args.path} are left to solve, run again to resume.")
+    else:
+        print(f"[DRAWS] Wrote draw table to {args.path}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
@@ -1,7 +1,108 @@
+import logging
+import sys
+from array import array
 from functools import reduce
+from operator import and_, itemgetter, mul, or_
 from itertools import groupby
+from logging.handlers import QueueHandler, QueueListener
 from math import inf
+from queue import SimpleQueue
 from random import choice, shuffle
+from types import MappingProxyType
+
+from ranktables import GenerateLowballRanks, GenerateWildRanks, LoadRanks
+
+
+# table logs are grouped into categories named after their tags, which can be gated individually
+LOG = logging.getLogger("fivecarddraw")
+LOG.addHandler(logging.NullHandler())
+TAGS = ("NEW ROUND", "SETUP", "BUTTON", "CARDS", "ANTE", "ACTION", "SHOWDOWN", "REWARDS", "STANDINGS", "PLAYER", "END", "WARNING")
+LOGS = {tag : LOG.getChild(tag) for tag in TAGS}
+# logs of simulated tables, such as clones searched by bots, which are disabled so they cost next to nothing
+QUIET = {tag : logging.getLogger(f"{LOG.name}.quiet.{tag}") for tag in TAGS}
+for log in QUIET.values():
+    log.disabled = True
+
+
+class TableFormatter(logging.Formatter):
+    """A class to format table logs with their category as a tag."""
+
+    def format(self, record):
+        """Formats a log as its tag followed by its message."""
+        message = record.getMessage()
+        tag = record.name[len(LOG.name)+1:]
+        return f"[{tag}] {message}" if message else f"[{tag}]"
+
+
+def ConfigureLogging(level : int = logging.INFO, levels : dict = None, stream = None, asynchronous : bool = False):
+    """
+    Routes table logs to a stream, formatted with their tags.
+
+    Parameters
+    ----------
+        level : minimum level logged for each category
+        levels : minimum level logged for some categories by tag, overriding level
+        stream : stream to write logs to, defaults to standard output
+        asynchronous : whether logs are written by a background thread, returning the listener to stop
+
+    Side effects
+    ------------
+        The handlers of the table logger are replaced. \n
+        The level of each category is set.
+
+    """
+    # gate each category
+    for tag, log in LOGS.items():
+        log.setLevel((levels or {}).get(tag, level))
+    # replace any previous handlers
+    for handler in list(LOG.handlers):
+        LOG.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(TableFormatter())
+    LOG.propagate = False
+    # write logs from a queue when asynchronous so tables only pay to enqueue them
+    if asynchronous:
+        queue = SimpleQueue()
+        listener = QueueListener(queue, handler)
+        LOG.addHandler(QueueHandler(queue))
+        listener.start()
+        return listener
+    LOG.addHandler(handler)
+
+
+# the best and worst numerical rating of each categorical rating, since each covers a contiguous range
+CATEGORIES = {
+    "five of a kind" : (-12, 0),
+    "royal flush" : (1, 1),
+    "straight flush" : (2, 10),
+    "four of a kind" : (11, 166),
+    "full house" : (167, 322),
+    "flush" : (323, 1599),
+    "straight" : (1600, 1609),
+    "three of a kind" : (1610, 2467),
+    "two pair" : (2468, 3325),
+    "pair" : (3326, 6185),
+    "high card" : (6186, 7462)}
+# categorical ratings in deuce to seven lowball, where the best hands are the worst hands of five card draw
+DEUCE_TO_SEVEN_CATEGORIES = {
+    "high card" : (1, 1278),
+    "pair" : (1279, 4138),
+    "two pair" : (4139, 4996),
+    "three of a kind" : (4997, 5854),
+    "straight" : (5855, 5863),
+    "flush" : (5864, 7141),
+    "full house" : (7142, 7297),
+    "four of a kind" : (7298, 7453),
+    "straight flush" : (7454, 7461),
+    "royal flush" : (7462, 7462)}
+# categorical ratings in ace to five lowball, where straights and flushes don't count
+ACE_TO_FIVE_CATEGORIES = {
+    "high card" : (1, 1287),
+    "pair" : (1288, 4147),
+    "two pair" : (4148, 5005),
+    "three of a kind" : (5006, 5863),
+    "full house" : (5864, 6019),
+    "four of a kind" : (6020, 6175)}
 
 
 class Card(object):
@@ -32,6 +133,8 @@ class Card(object):
             a class parameter for the card value
         suit_i : int
             a class parameter for the card suit
+        h : int
+            the hash of the card
     
     """
 
@@ -72,6 +175,9 @@ class Card(object):
 
         # store input parameters
         self.value_i, self.suit_i = value, suit
+
+        # store hash since cards are compared often
+        self.h = hash((self.value_i, self.suit_i, self.b))
     
     def __repr__(self):
         """Displays the card value and card suit when the card object is printed."""
@@ -87,11 +193,27 @@ class Card(object):
 
     def __hash__(self):
         """Creates a hash that's derived from the card value and card suit."""
-        return hash((self.value_i, self.suit_i, self.b))
+        return self.h
 
     def __eq__(self, other):
         """Compares the hash of the card object with others."""
         return hash(self) == hash(other)
+
+
+class Joker(Card):
+    """
+    A class to represent a joker, which has no value or suit of its own and is only played in wild card variants.
+
+    The joker is encoded as 0, and given the value after aces so it has its own place in hand histories.
+
+    """
+
+    def __init__(self):
+        """Constructs all the necessary attributes for the joker object."""
+        self.b = 0
+        self.r = "🃏"
+        self.value_i, self.suit_i = 13, 0
+        self.h = hash((self.value_i, self.suit_i, self.b))
     
 
 class Deck(object):
@@ -104,13 +226,23 @@ class Deck(object):
             the order of the cards in the deck
         t : int
             the amount of cards no longer in the deck
+        L : int
+            the amount of cards in the deck
+        muck : list[Card]
+            the discarded cards no longer in the deck, in the order they were discarded
 
     Methods
     -------
         Shuffle : 
             Shuffles order of remaining cards in deck.
+        Muck :
+            Add discarded cards to the muck.
+        Reshuffle :
+            Shuffle the muck into the bottom of the deck.
         CollectCards : 
             Set the amount of cards no longer in the deck to 0.
+        Clone :
+            Get a copy of the deck.
         DepartedCards : 
             Get a list of the cards no longer in the deck.
         RemainingCards : 
@@ -118,12 +250,22 @@ class Deck(object):
 
     """
 
-    def __init__(self):
-        """Constructs all the necessary attributes for the deck object."""
-        # create list of 52 unique cards
-        self.state = [Card(v, s) for v in range(13) for s in range(4)]
+    def __init__(self, jokers : int = 0):
+        """
+        Constructs all the necessary attributes for the deck object.
+
+        Parameters
+        ----------
+            jokers : amount of jokers to add to the 52 unique cards
+
+        """
+        # create list of 52 unique cards, followed by any jokers
+        self.state = [Card(v, s) for v in range(13) for s in range(4)] + [Joker() for _ in range(jokers)]
+        self.L = len(self.state)
         # initialise tracking attribute for tracking remaining cards in deck
         self.t = 0
+        # initialise discard pile
+        self.muck = []
 
     def __repr__(self):
         """Displays the remaining cards in the deck when the deck object is printed."""
@@ -141,7 +283,7 @@ class Deck(object):
         """Provides the top card of the deck."""
         # assert there is a remaining card in deck
         try:
-            top_card = self.RemainingCards()[0]
+            top_card = self.state[self.t]
         except IndexError:
             raise StopIteration("No more cards in the deck")
 
@@ -151,7 +293,7 @@ class Deck(object):
 
     def __len__(self):
         """Provides the amount of cards remaining in deck."""
-        return 52 - self.t
+        return self.L - self.t
 
     def Shuffle(self):
         """
@@ -167,16 +309,69 @@ class Deck(object):
         shuffle(remaining_cards)
         self.state = departed_cards + remaining_cards
 
+    def Muck(self, cards : list[Card]):
+        """
+        Adds discarded cards to the muck.
+
+        Parameters
+        ----------
+            cards : discarded cards
+
+        Side effects
+        ------------
+            The muck attribute is extended.
+
+        """
+        self.muck.extend(cards)
+
+    def Reshuffle(self):
+        """
+        Shuffles the muck into a fresh stub beneath the remaining cards in the deck, as when a deck runs dry during the draw.
+
+        Side effects
+        ------------
+            The state attribute is permutated. \n
+            The t attribute is decreased by the amount of cards in the muck. \n
+            The muck attribute is emptied.
+
+        """
+        # the muck is departed, so swap mucked cards among the first held positions with held cards after them,
+        # leaving the cards in hands at the top of the departed cards without moving the rest
+        mucked = set(self.muck)
+        held = self.t - len(self.muck)
+        swaps = zip([i for i in range(held) if self.state[i] in mucked],
+                    [j for j in range(held, self.t) if self.state[j] not in mucked])
+        for i, j in swaps:
+            self.state[i], self.state[j] = self.state[j], self.state[i]
+        # return mucked cards to the bottom of the deck, beneath the remaining cards
+        shuffle(self.muck)
+        self.state[held:] = self.state[self.t:] + self.muck
+        self.t = held
+        self.muck = []
+
     def CollectCards(self):
         """
         Set the amount of cards no longer in the deck to 0.
         
         Side effects
         ------------
-            The t attribute is set to 0.
+            The t attribute is set to 0. \n
+            The muck attribute is emptied.
 
         """
         self.t = 0
+        self.muck = []
+
+    def Clone(self) -> "Deck":
+        """
+        Copies the deck, so the copy can be dealt from without changing the deck.
+
+        Cards are shared between the copies, since cards never change.
+
+        """
+        clone = Deck.__new__(Deck)
+        clone.state, clone.L, clone.t, clone.muck = self.state[:], self.L, self.t, self.muck[:]
+        return clone
 
     def DepartedCards(self) -> list[Card]:
         """
@@ -193,6 +388,27 @@ class Deck(object):
         return self.state[self.t:]
 
 
+class Ratings(object):
+    """
+    A class to represent hand ranking attributes of a handtracker class, which load the first time they're needed.
+
+    Loading replaces the attribute of the handtracker class with the ratings, so later lookups are plain attribute
+    lookups. Subclasses with their own ratings declare their own attributes, rather than inheriting loaded ones.
+
+    """
+
+    def __set_name__(self, owner : type, name : str):
+        """Stores the name of the attribute."""
+        self.name = name
+
+    def __get__(self, tracker, owner : type):
+        """Loads the ratings of the handtracker and provides them."""
+        if tracker is None:
+            return self
+        tracker.LoadData()
+        return getattr(tracker, self.name)
+
+
 class HandTracker(object):
     """
     A class to handle card dynamics during a game of five card draw poker.
@@ -201,14 +417,16 @@ class HandTracker(object):
     ----------
         DECK : Deck
             a deck of cards
-        hands : dict
+        players : dict
             player hand data
-        FLUSH_RANKS : dict
-            ratings for flush hands
-        UNIQUE_5_RANKS : dict
-            ratings for hands with 5 unique-valued cards and different suits
+        dirty : set
+            players whose hands have changed since they were last evaluated
+        FLUSH_RANKS : array
+            ratings for flush hands indexed by their encoding, loaded on first use and shared by all handtrackers
+        UNIQUE_5_RANKS : array
+            ratings for hands with 5 unique-valued cards and different suits indexed by their encoding, loaded on first use and shared by all handtrackers
         DUPE_RANKS : dict
-            ratings for hands with at least one pair of cards with the same card value.
+            ratings for hands with at least one pair of cards with the same card value, loaded on first use and shared by all handtrackers
 
     Methods
     -------
@@ -228,12 +446,18 @@ class HandTracker(object):
             Get a list of cards to replace some discarded cards.
         SwapPlayersCards :
             Replace the discarded cards of a tracked player.
+        MuckPlayersCards :
+            Add the hand of a tracked player to the muck.
         AllowDiscards :
             Decide if discarding chosen cards is allowed.
         CollectCards :
             Remove cards from tracked players and return them to the deck.
         ShuffleDeck :
             Shuffles order of remaining cards in deck.
+        ReshuffleMuck :
+            Shuffles the muck into the bottom of the deck.
+        Clone :
+            Get a copy of the handtracker.
         LoadData :
             Load the ratings for each possible hand in five card draw poker.
         HasFlush :
@@ -246,8 +470,12 @@ class HandTracker(object):
              Convert hand to a product of prime numbers.
         EvaluateHand :
             Get the rating of a hand.
+        EvaluatePlayer :
+            Store the rating of a tracked players hand.
         EvaluatePlayersIn :
-            Store the rating of each tracked players hand.
+            Store the rating of each tracked players hand that has changed.
+        Rank :
+            Get the numerical rating of a tracked players hand.
         TrackedPlayers :
             Get a list of players being tracked.
         TrackedHand :
@@ -255,14 +483,21 @@ class HandTracker(object):
 
     """
 
+    # amount of jokers in the deck
+    JOKERS = 0
+    # hand ranking attributes, loaded on first use
+    FLUSH_RANKS, UNIQUE5_RANKS, DUPE_RANKS = Ratings(), Ratings(), Ratings()
+    # the best and worst numerical rating of each categorical rating
+    CATEGORIES = CATEGORIES
+
     def __init__(self):
         """Constructs all the necessary attributes for the handtracker object."""
         # create a deck
-        self.DECK = Deck()
+        self.DECK = Deck(self.JOKERS)
         # create a state for player hand data
         self.players = {}
-        # load data containing ratings of all possible five card hands
-        self.LoadData()
+        # create a state for players needing their hands evaluated
+        self.dirty = set()
 
     def TrackPlayers(self, names : list[str]):
         """
@@ -294,7 +529,8 @@ class HandTracker(object):
         
         Side effects
         ------------
-            The players attribute loses some keys.
+            The players attribute loses some keys. \n
+            The dirty attribute loses some items.
 
         """
         for name in names:
@@ -304,6 +540,7 @@ class HandTracker(object):
                 del self.players[name]
             except KeyError:
                 raise KeyError(f"{name} is not being tracked.")
+            self.dirty.discard(name)
 
     def AssignCards(self, name : str, cards : list[Card]):
         """
@@ -316,7 +553,8 @@ class HandTracker(object):
 
         Side effects
         ------------
-            The players attribute has some values updated.
+            The players attribute has some values updated. \n
+            The dirty attribute gets an additional item.
 
         """
         # assert player is being tracked
@@ -325,6 +563,8 @@ class HandTracker(object):
             self.players[name]["cards"].extend(cards)
         except KeyError:
             raise KeyError(f"{name} is not being tracked.")
+        # flag hand for evaluation
+        self.dirty.add(name)
 
     def UnassignCards(self, name : str, cards : list[Card]):
         """
@@ -337,19 +577,23 @@ class HandTracker(object):
         
         Side effects
         ------------
-            The players attribute has some values updated.
+            The players attribute has some values updated. \n
+            The dirty attribute gets an additional item.
 
         """
         # assert player is holding all cards
-        if set(cards).intersection(self.Hand(name)) != set(cards):
+        discarded = set(cards)
+        if not discarded.issubset(self.Hand(name)):
             raise Exception(f"{name} is not holding some of {cards}.")
         
         # assert player is being tracked
         try:
             # unallocate cards from player
-            self.players[name]["cards"] = [card for card in self.Hand(name) if card not in cards]
+            self.players[name]["cards"] = [card for card in self.Hand(name) if card not in discarded]
         except KeyError:
             raise KeyError(f"{name} is not being tracked.")
+        # flag hand for evaluation
+        self.dirty.add(name)
 
     def DealHand(self) -> list[Card]:
         """
@@ -362,7 +606,7 @@ class HandTracker(object):
         """
         # assert enough cards are in the deck to deal
         if 5 > len(self.DECK):
-            Exception("There are not enough cards remaining in the deck.")
+            raise Exception("There are not enough cards remaining in the deck.")
         
         # return a five card hand
         hand = [next(self.DECK) for _ in range(5)]
@@ -379,7 +623,7 @@ class HandTracker(object):
         """
         # determine if enough cards are in the deck to deal everyone hands
         if len(self.players) * 5 > len(self.DECK):
-            Exception("There are not enough cards remaining to deal all players hands.")
+            raise Exception("There are not enough cards remaining to deal all players hands.")
 
         # deal hands to tracked players
         for player in self.players:
@@ -396,9 +640,13 @@ class HandTracker(object):
         
         Side effects
         ------------
-            The DECK attribute has the t attribute increased by the amount of cards being discarded.
+            The DECK attribute has the t attribute increased by the amount of cards being discarded. \n
+            The DECK attribute has the muck reshuffled if there aren't enough cards remaining.
 
         """
+        # reshuffle muck if deck has run dry
+        if len(self.DECK) < len(discards):
+            self.ReshuffleMuck()
         # assert enough cards in deck
         if len(self.DECK) < len(discards):
             raise Exception(f"Not enough cards in deck to swap {discards}.")
@@ -407,7 +655,7 @@ class HandTracker(object):
         new_cards = [next(self.DECK) for _ in range(len(discards))]
         return new_cards
 
-    def SwapPlayersCards(self, name : str, discards : list[Card]):
+    def SwapPlayersCards(self, name : str, discards : list[Card]) -> bool:
         """
         Provides cards to replace some cards discarded by a tracked player.
 
@@ -415,23 +663,55 @@ class HandTracker(object):
         ----------
             name : name of tracked player
             discards : cards to swap
+
+        Returns
+        -------
+            Whether the muck was reshuffled into the deck to provide the cards.
         
         Side effects
         ------------
             The DECK attribute has the t attribute increased by the amount of cards being discarded.\n
+            The DECK attribute has the discards added to the muck, after reshuffling the muck if there aren't enough cards remaining.\n
             The players attribute has some values updated.
 
         """
-        # assert enough cards in deck
-        if len(self.DECK) < len(discards):
-            raise Exception(f"Not enough cards in deck to swap {discards}.")
-
         # remove discards from hand
         self.UnassignCards(name, discards)
 
+        # reshuffle muck if deck has run dry, without the players own discards unless the muck is still too small
+        reshuffled = len(self.DECK) < len(discards)
+        if reshuffled and len(self.DECK) + len(self.DECK.muck) >= len(discards):
+            self.ReshuffleMuck()
+            self.DECK.Muck(discards)
+        else:
+            self.DECK.Muck(discards)
+            if reshuffled:
+                self.ReshuffleMuck()
+
         # get new cards and assign to player
         new_cards = [next(self.DECK) for _ in range(len(discards))]
         self.AssignCards(name, new_cards)
+        return reshuffled
+
+    def MuckPlayersCards(self, name : str):
+        """
+        Adds the hand of a tracked player to the muck, as when they fold.
+
+        Parameters
+        ----------
+            name : name of tracked player
+
+        Side effects
+        ------------
+            The DECK attribute has the hand added to the muck. \n
+            The players attribute has some values updated. \n
+            The dirty attribute loses an item.
+
+        """
+        self.DECK.Muck(self.Hand(name))
+        # the player holds no cards, so there is no rating left to evaluate
+        self.players[name] = {"cards" : []}
+        self.dirty.discard(name)
 
     def AllowDiscards(self, hand : list[Card], discards : list[Card]) -> bool:
         """
@@ -450,7 +730,8 @@ class HandTracker(object):
         if len(discards) == 5:
             return False
         # if four cards are discarded the last card must be an ace
-        remaining = [card for card in hand if card not in discards]
+        discarded = set(discards)
+        remaining = [card for card in hand if card not in discarded]
         # hand will be multiple of 41 if it has an ace, otherwise it will have a remainder 
         if len(discards) == 4 and self.PrimesEncoding(remaining) % 41: 
             return False
@@ -482,74 +763,47 @@ class HandTracker(object):
         """
         self.DECK.Shuffle()
 
+    def ReshuffleMuck(self):
+        """
+        Shuffles the muck into the bottom of the deck.
+
+        Side effects
+        ------------
+            The deck attribute has the state attribute permutated and the muck attribute emptied.
+
+        """
+        self.DECK.Reshuffle()
+
+    def Clone(self) -> "HandTracker":
+        """
+        Copies the deck and the hands of players, so the copy can be played on without changing the handtracker.
+
+        The copy is of the same variant, and shares its ratings.
+
+        """
+        clone = type(self).__new__(type(self))
+        clone.DECK = self.DECK.Clone()
+        clone.players = {name : {**player, "cards" : player["cards"][:]} for name, player in self.players.items()}
+        clone.dirty = set(self.dirty)
+        return clone
+
     def LoadData(self):
         """
-        Constructs all the hand ranking attributes for the handtracker object.
+        Constructs all the hand ranking attributes for the handtracker class.
         
         Side effects
         ------------
-            The FLUSH_RANKS attribute is created. \n
-            The UNIQUE5_RANKS attribute is created. \n
-            The DUPES_RANKS attribute is created.
-
-        """
-        # create ciphers for reading and encoding hands for fast hand ranking
-        PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
-        DV = {char : 2 ** i for i, char in enumerate("23456789TJQKA")}
-        DP = {char : PRIMES[i] for i, char in enumerate("23456789TJQKA")}
-        CLASSES = {
-            "HC" : "high card", 
-            "1P" : "pair", 
-            "2P" : "two pair", 
-            "3K" : "three of a kind", 
-            "SS" : "straight", 
-            "FF" : "flush", 
-            "FH" : "full house", 
-            "4K" : "four of a kind", 
-            "SF" : "straight flush",
-            "RF" : "royal flush"}
-
-        # store ratings of all hands with flushes
-        self.FLUSH_RANKS = {}
-        # read data
-        with open("data/flushes.txt", "r") as file:
-            for line in file:
-                # locate and encode hand as sum of powers of two
-                hand = reduce(lambda x, y : x+y, map(lambda x : DV[line[int(x)]], "45678"))
-                # store hand ratings by integer key 
-                self.FLUSH_RANKS[hand] = []
-                # store numerical rating
-                self.FLUSH_RANKS[hand].append(int(str(line)[11:]))
-                # store categorical rating
-                self.FLUSH_RANKS[hand].append(CLASSES[str(line[:2])])
-
-        # store ratings of all non-flush hands with 5 unique card values
-        self.UNIQUE5_RANKS = {}
-        # read data
-        with open("data/uniquefive.txt", "r") as file:
-            for line in file:
-                # locate and encode hand as sum of powers of two
-                hand = reduce(lambda x, y : x+y, map(lambda x : DV[line[int(x)]], "45678"))
-                # store hand ratings by integer key 
-                self.UNIQUE5_RANKS[hand] = []
-                # store numerical rating
-                self.UNIQUE5_RANKS[hand].append(int(str(line)[11:]))
-                # store categorical rating
-                self.UNIQUE5_RANKS[hand].append(CLASSES[str(line[:2])])
-
-        # store ratings of all hands with duplicate card values
-        self.DUPE_RANKS = {}
-        # read data
-        with open("data/dupes.txt", "r") as file:
-            for line in file:
-                # locate and encode hand as product of primes
-                hand = reduce(lambda x, y : x*y, map(lambda x : DP[line[int(x)]], "45678"))
-                # store hand ratings by integer key 
-                self.DUPE_RANKS[hand] = []
-                # store numerical rating
-                self.DUPE_RANKS[hand].append(int(str(line)[11:]))
-                # store categorical rating
-                self.DUPE_RANKS[hand].append(CLASSES[str(line[:2])])
+            The FLUSH_RANKS class attribute is created. \n
+            The UNIQUE5_RANKS class attribute is created. \n
+            The DUPES_RANKS class attribute is created.
+
+        """
+        # read the binary rank tables, or generate them if they haven't been built
+        FLUSH_RANKS, UNIQUE5_RANKS, DUPE_RANKS = LoadRanks()
+
+        # share ratings between handtrackers, so they are only loaded once per process
+        cls = type(self)
+        cls.FLUSH_RANKS, cls.UNIQUE5_RANKS, cls.DUPE_RANKS = FLUSH_RANKS, UNIQUE5_RANKS, DUPE_RANKS
 
     def HasFlush(self, cards : list[Card]) -> bool:
         """
@@ -601,9 +855,9 @@ class HandTracker(object):
         """
         return reduce(lambda x, y : x*y, map(lambda x : int(x) & 255, cards))
 
-    def EvaluateHand(self, hand : list[Card]) -> tuple[int, str]:
+    def EvaluateHand(self, hand : list[Card]) -> int:
         """
-        Evaluates a hand both numerically and categorically.
+        Evaluates a hand numerically, where the categorical rating is given by Category.
 
         Parameters
         ----------
@@ -614,32 +868,76 @@ class HandTracker(object):
         if len(hand) != 5 :
             raise Exception("Unknown variant of poker.")
 
-        # encode hand as int and use as key to get rank
-        if self.HasFlush(hand):
-            key = self.TwosEncoding(hand)
+        # encode hand as int and use as key to get rank, combining the card encodings inline since hands are
+        # evaluated for every player of every hand
+        a, b, c, d, e = [card.b for card in hand]
+        key = (a | b | c | d | e) >> 16
+        if a & b & c & d & e & 0xF000:
             return self.FLUSH_RANKS[key]
-        elif self.HasUnique5(hand):
-            key = self.TwosEncoding(hand)
+        elif bin(key).count("1") == 5:
             return self.UNIQUE5_RANKS[key]
         else:
-            key = self.PrimesEncoding(hand)
+            key = (a & 255) * (b & 255) * (c & 255) * (d & 255) * (e & 255)
             return self.DUPE_RANKS[key]
 
+    def Category(self, rank_n : int) -> str:
+        """
+        Provides the categorical rating of a numerical rating, by the rules of the handtracker.
+
+        Parameters
+        ----------
+            rank_n : numerical rating
+
+        """
+        for category, (_, worst) in self.CATEGORIES.items():
+            if rank_n <= worst:
+                return category
+        raise ValueError(f"{rank_n} isn't a numerical rating.")
+
+    def EvaluatePlayer(self, name : str):
+        """
+        Evaluates the hand of a tracked player.
+
+        Parameters
+        ----------
+            name : name of tracked player
+
+        Side effects
+        ------------
+            The players attribute has some values updated. \n
+            The dirty attribute loses an item.
+
+        """
+        hand = self.Hand(name)
+        self.players[name]["rank_n"] = self.EvaluateHand(hand)
+        self.dirty.discard(name)
+
     def EvaluatePlayersIn(self):
         """
-        Evaluates the hands of tracked players.
+        Evaluates the hands of tracked players that have changed since they were last evaluated.
         
         Side effects
         ------------
-            hands : The players attribute has some values updated.
+            The players attribute has some values updated. \n
+            The dirty attribute is cleared.
 
         """
-        # evaluate hands of players being tracked and store the info
-        for player in self.players:
-            hand = self.Hand(player)
-            rank_n, rank_c = self.EvaluateHand(hand)
-            self.players[player]["rank_n"] = rank_n
-            self.players[player]["rank_c"] = rank_c
+        # evaluate changed hands of players being tracked and store the info
+        for player in list(self.dirty):
+            self.EvaluatePlayer(player)
+
+    def Rank(self, name : str) -> int:
+        """
+        Provides the numerical rating of a tracked players hand, evaluating it first if it has changed.
+
+        Parameters
+        ----------
+            name : name of tracked player
+
+        """
+        if name in self.dirty:
+            self.EvaluatePlayer(name)
+        return self.players[name]["rank_n"]
 
     def TrackedPlayers(self) -> list:
         """
@@ -660,6 +958,157 @@ class HandTracker(object):
             raise KeyError(f"{name} is not being tracked.")
 
 
+class WildHandTracker(HandTracker):
+    """
+    A class to handle card dynamics during a game of five card draw poker with wild cards.
+
+    Wild cards are left out when encoding a hand, and the encoding of the natural cards is used as a key for tables
+    of the best rating over all substitutions for the wild cards, so wild hands are still rated by a single lookup.
+    Hands with five of a kind are rated 0 and below, better than a royal flush.
+
+    Attributes
+    ----------
+        WILD : set
+            card values that are wild
+        WILD_FLUSH_RANKS : array
+            ratings for natural cards with unique values and one suit, loaded on first use and shared by all wildhandtrackers
+        WILD_UNIQUE5_RANKS : array
+            ratings for natural cards with unique values and different suits, loaded on first use and shared by all wildhandtrackers
+        WILD_DUPE_RANKS : dict
+            ratings for natural cards with at least one pair of cards with the same card value, loaded on first use and shared by all wildhandtrackers
+
+    Methods
+    -------
+        IsWild :
+            Determines if a card is wild.
+
+    """
+
+    WILD = set()
+    WILD_FLUSH_RANKS, WILD_UNIQUE5_RANKS, WILD_DUPE_RANKS = Ratings(), Ratings(), Ratings()
+
+    def LoadData(self):
+        """
+        Constructs all the hand ranking attributes for the wildhandtracker class.
+
+        Side effects
+        ------------
+            The hand ranking class attributes of the handtracker are created. \n
+            The WILD_FLUSH_RANKS, WILD_UNIQUE5_RANKS and WILD_DUPE_RANKS class attributes are created.
+
+        """
+        super().LoadData()
+        # wild cards are wild whichever cards they are, so variants share the substitution tables
+        tables = GenerateWildRanks((self.FLUSH_RANKS, self.UNIQUE5_RANKS, self.DUPE_RANKS))
+        WildHandTracker.WILD_FLUSH_RANKS, WildHandTracker.WILD_UNIQUE5_RANKS, WildHandTracker.WILD_DUPE_RANKS = tables
+
+    def IsWild(self, card : Card) -> bool:
+        """
+        Check if a card is wild.
+
+        Parameters
+        ----------
+            card : card to check
+
+        """
+        return card.value_i in self.WILD
+
+    def EvaluateHand(self, hand : list[Card]) -> int:
+        """
+        Evaluates a hand numerically, where the categorical rating is given by Category.
+
+        Parameters
+        ----------
+            hand : hand to evaluate
+
+        """
+        # assert 5 card hands
+        if len(hand) != 5 :
+            raise Exception("Unknown variant of poker.")
+
+        # evaluate natural hands as usual
+        naturals = [int(card) for card in hand if not self.IsWild(card)]
+        if len(naturals) == 5:
+            return super().EvaluateHand(hand)
+
+        # encode natural cards as int and use as key to get the best rank with substitutions
+        key = reduce(or_, naturals, 0) >> 16
+        if bin(key).count("1") == len(naturals):
+            if reduce(and_, naturals, 15 << 12) & (15 << 12):
+                return self.WILD_FLUSH_RANKS[key]
+            return self.WILD_UNIQUE5_RANKS[key]
+        key = reduce(mul, (card & 255 for card in naturals), 1)
+        return self.WILD_DUPE_RANKS[key]
+
+
+class JokerHandTracker(WildHandTracker):
+    """A class to handle card dynamics during a game of five card draw poker played with a wild joker."""
+
+    JOKERS = 1
+    WILD = {13}
+
+
+class DeucesHandTracker(WildHandTracker):
+    """A class to handle card dynamics during a game of five card draw poker where deuces are wild."""
+
+    WILD = {0}
+
+
+class LowballHandTracker(HandTracker):
+    """
+    A class to handle card dynamics during a game of lowball five card draw poker, where the lowest hand wins.
+
+    Hands are keyed as in HandTracker, with tables that rate the lowest hand 1, so rewards are calculated as usual.
+
+    Attributes
+    ----------
+        ACES_LOW : bool
+            whether aces are low and straights and flushes don't count, rather than aces being high
+
+    """
+
+    ACES_LOW = False
+    # lowball rates hands by its own tables, rather than those of five card draw
+    FLUSH_RANKS, UNIQUE5_RANKS, DUPE_RANKS = Ratings(), Ratings(), Ratings()
+
+    def LoadData(self):
+        """
+        Constructs all the hand ranking attributes for the lowballhandtracker class.
+
+        Side effects
+        ------------
+            The FLUSH_RANKS class attribute is created. \n
+            The UNIQUE5_RANKS class attribute is created. \n
+            The DUPES_RANKS class attribute is created.
+
+        """
+        # share ratings between lowballhandtrackers of the same rules, so they are only generated once per process
+        cls = type(self)
+        cls.FLUSH_RANKS, cls.UNIQUE5_RANKS, cls.DUPE_RANKS = GenerateLowballRanks(self.ACES_LOW)
+
+
+class DeuceToSevenHandTracker(LowballHandTracker):
+    """A class to handle card dynamics during a game of deuce to seven lowball, where aces are high and the wheel isn't a straight."""
+
+    CATEGORIES = DEUCE_TO_SEVEN_CATEGORIES
+
+
+class AceToFiveHandTracker(LowballHandTracker):
+    """A class to handle card dynamics during a game of ace to five lowball, where aces are low and straights and flushes don't count."""
+
+    ACES_LOW = True
+    CATEGORIES = ACE_TO_FIVE_CATEGORIES
+
+
+# handtrackers for each variant of five card draw
+VARIANTS = {
+    "standard" : HandTracker,
+    "joker" : JokerHandTracker,
+    "deuces" : DeucesHandTracker,
+    "deuce to seven" : DeuceToSevenHandTracker,
+    "ace to five" : AceToFiveHandTracker}
+
+
 class SeatTracker(object):
     """
     A class to handle seating dynamics during a game of five card draw poker.
@@ -697,6 +1146,8 @@ class SeatTracker(object):
             Get list of tracked players
         AvailableSeats :
             Get list of available seats
+        Clone :
+            Get a copy of the seattracker
         
 
     """
@@ -921,6 +1372,15 @@ class SeatTracker(object):
         """
         return [i for i, occupant in enumerate(self.seats) if occupant]
 
+    def Clone(self) -> "SeatTracker":
+        """
+        Copies the seating, so the copy can be changed without changing the seattracker.
+
+        """
+        clone = SeatTracker.__new__(SeatTracker)
+        clone.seats, clone.players, clone.button, clone.L = self.seats[:], self.players.copy(), self.button.copy(), self.L
+        return clone
+
 
 class ChipTracker(object):
     def __init__(self):
@@ -963,10 +1423,13 @@ class ChipTracker(object):
         return True if amount <= self.players[name]["stack"] else False
 
     def Bet(self, name, amount):
-        # remove chips from player
-        self.Spend(name, amount)
+        # remove chips from player, as Spend does, inline since every ante and bet is one
+        player = self.players[name]
+        if amount > player["stack"]:
+            raise ValueError(f"{name} doesn't have enough chips to pay {amount} chips.")
+        player["stack"] -= amount
         # add chips to pot
-        self.players[name]["contribution"] += amount
+        player["contribution"] += amount
 
     def CallAmount(self, name):
         # calculate how many chips a player needs to contribute, to minimum call
@@ -974,9 +1437,10 @@ class ChipTracker(object):
 
     def BetDetails(self, name, amount):
         # check if bet is players full stack
-        has_allin = True if amount == self.Stack(name) else False
+        player = self.players[name]
+        has_allin = True if amount == player["stack"] else False
         # check if bet is atleast the min call amount
-        min_to_call = self.CallAmount(name)
+        min_to_call = self.MaxContribution() - player["contribution"]
         has_mincalled = True if amount >= min_to_call else False
         if has_mincalled:
             # check if bet is more than the min call amount
@@ -1059,7 +1523,7 @@ class ChipTracker(object):
         return self.players[name]["contribution"]
 
     def MaxContribution(self):
-        return max([self.players[name]["contribution"] for name in self.players])
+        return max(map(itemgetter("contribution"), self.players.values()))
 
     def Ante(self):
         # return ante amount 
@@ -1069,13 +1533,106 @@ class ChipTracker(object):
         # determine and return total amount of chips in pot
         return sum([self.Contribution(name) for name in self.players])
 
+    def Clone(self):
+        # copy stacks and contributions, so the copy can bet without changing the tracker
+        clone = ChipTracker.__new__(ChipTracker)
+        clone.gameinfo = self.gameinfo.copy()
+        clone.players = {name : player.copy() for name, player in self.players.items()}
+        return clone
+
             
 
+class Policy(object):
+    """
+    A class to decide the actions of players, which the dealer asks for each decision a player makes.
+
+    Subclasses decide one player at a time with SelectAmount and SelectDiscards. Policies with overhead
+    per call, such as models evaluated on many views at once, can also override the batch methods, which
+    are given every decision pending across players or tables.
+
+    Methods
+    -------
+        SelectAmount :
+            Decide how many chips a player puts in the pot.
+        SelectDiscards :
+            Decide which cards a player swaps.
+        SelectAmountBatch :
+            Decide how many chips each of many players puts in the pot.
+        SelectDiscardsBatch :
+            Decide which cards each of many players swaps.
+
+    """
+
+    def SelectAmount(self, name : str, info) -> int:
+        """
+        Decides how many chips a player puts in the pot, where 0 checks or folds.
+
+        Parameters
+        ----------
+            name : name of player, or None when deciding out of process
+            info : the players view of the table, as from Dealer.TableView
+
+        """
+        raise NotImplementedError
+
+    def SelectDiscards(self, name : str, info) -> list[Card]:
+        """
+        Decides which cards a player swaps.
+
+        Parameters
+        ----------
+            name : name of player, or None when deciding out of process
+            info : the players view of the table, as from Dealer.TableView
+
+        """
+        raise NotImplementedError
+
+    def SelectAmountBatch(self, requests : list[tuple]) -> list[int]:
+        """Decides how many chips each player puts in the pot, given the name and view of each player."""
+        return [self.SelectAmount(name, info) for name, info in requests]
+
+    def SelectDiscardsBatch(self, requests : list[tuple]) -> list[list[Card]]:
+        """Decides which cards each player swaps, given the name and view of each player."""
+        return [self.SelectDiscards(name, info) for name, info in requests]
+
+
+class RandomPolicy(Policy):
+    """A class to decide at random, betting one of six sizes and keeping each card on a coin flip."""
+
+    def SelectAmount(self, name : str, info) -> int:
+        """Decides how many chips a player puts in the pot, from nothing up to twice the pot."""
+        return choice([0, info['self']['chips']['stack'], info['game']['call'], info['game']['pot'], 2*info['game']['pot'], 2*info['game']['call']])
+
+    def SelectDiscards(self, name : str, info) -> list[Card]:
+        """Decides which cards a player swaps, swapping each card on a coin flip."""
+        return [info['self']['hand']['cards'][i] for i in range(5) if choice([True,False])]
+
+
+class HumanPolicy(Policy):
+    """A class to ask a human at the terminal for their decisions."""
+
+    def SelectAmount(self, name : str, info) -> int:
+        """Asks how many chips the human puts in the pot."""
+        print(f"[INFO] Your cards are {info['self']['hand']['cards']}")
+        print(f"[INFO] There are {info['game']['pot']} chips in the pot.")
+        print(f"[INFO] You have {info['self']['chips']['stack']} chips remaining.")
+        print(f"[INFO] The amount to call is {info['game']['call']} chips.")
+        return int(input("How much would you like to put in the pot?"))
+
+    def SelectDiscards(self, name : str, info) -> list[Card]:
+        """Asks which cards the human swaps."""
+        print(f"[INFO] Your cards are {info['self']['hand']['cards']}")
+        mask = input("Which cards would you like to swap? (00000 for none, 11111 for all)")
+        return [info['self']['hand']['cards'][i] for i, v in enumerate(mask) if int(v)]
+
+
 class ActionTracker(object):
     def __init__(self):
         # initialise players and species tracker
         self.players = {}
         self.beings = {"humans" : [], "bots" : []}
+        # initialise the policy deciding for each player
+        self.policies = {}
 
     def UntrackPlayers(self, names):
         for name in names:
@@ -1096,19 +1653,35 @@ class ActionTracker(object):
         for name in self.players.keys():
             self.players[name]["has_mincalled"] = False
 
-    def AddHumans(self, names):
-        # start tracking humans
+    def AddHumans(self, names, policy=None):
+        # start tracking humans, asking at the terminal unless given another policy
+        policy = policy or HumanPolicy()
         for name in names:
             self.beings["humans"].append(name)
+            self.policies[name] = policy
     
-    def AddBots(self, names):
-        # start tracking bots
+    def AddBots(self, names, policy=None):
+        # start tracking bots, deciding at random unless given another policy
+        policy = policy or RandomPolicy()
         for name in names:
             self.beings["bots"].append(name)
+            self.policies[name] = policy
+
+    def SetPolicy(self, name, policy):
+        # change how a player decides
+        self.policies[name] = policy
 
     def KickBot(self, name):
         # stop tracking bot
         self.beings["bots"].remove(name)
+        self.policies.pop(name, None)
+        if name in self.players:
+            del self.players[name]
+
+    def KickHuman(self, name):
+        # stop tracking human
+        self.beings["humans"].remove(name)
+        self.policies.pop(name, None)
         if name in self.players:
             del self.players[name]
 
@@ -1117,32 +1690,39 @@ class ActionTracker(object):
             # assert player is seated
             if name not in self.players:
                 raise KeyError(f"{name} wasn't being tracked.")
-            # kick bot
-            self.KickBot(name)
+            # kick human or bot
+            if name in self.beings["humans"]:
+                self.KickHuman(name)
+            else:
+                self.KickBot(name)
 
     def SelectAmount(self, name, info):
-        # determine species and get a bet amount request
-        if name in self.beings["humans"]:
-            print(f"[INFO] Your cards are {info['self']['hand']['cards']}")
-            print(f"[INFO] There are {info['game']['pot']} chips in the pot.")
-            print(f"[INFO] You have {info['self']['chips']['stack']} chips remaining.")
-            print(f"[INFO] The amount to call is {info['game']['call']} chips.")
-            amount = int(input("How much would you like to put in the pot?"))
-        else:
-            amount = choice([0, info['self']['chips']['stack'], info['game']['call'], info['game']['pot'], 2*info['game']['pot'], 2*info['game']['call']])
-        return amount
+        # get a bet amount request from the players policy
+        return self.policies[name].SelectAmount(name, info)
 
     def SelectDiscards(self, name, info):
-        # determine species to ask for discards from
-        if name in self.beings["humans"]:
-            # give info and get user input from human
-            print(f"[INFO] Your cards are {info['self']['hand']['cards']}")
-            mask = input("Which cards would you like to swap? (00000 for none, 11111 for all)")
-            discards =  [info['self']['hand']['cards'][i] for i, v in enumerate(mask) if int(v)]
-        else:
-            # get random input from bots
-            discards = [info['self']['hand']['cards'][i] for i in range(5) if choice([True,False])]
-        return discards
+        # get discards from the players policy
+        return self.policies[name].SelectDiscards(name, info)
+
+    def SelectBatch(self, method, requests):
+        # ask each policy once for all of its players, keeping the order of requests
+        groups = {}
+        for i, (name, info) in enumerate(requests):
+            policy = self.policies[name]
+            groups.setdefault(id(policy), (policy, []))[1].append(i)
+        decisions = [None] * len(requests)
+        for policy, indices in groups.values():
+            for i, decision in zip(indices, getattr(policy, method)([requests[i] for i in indices])):
+                decisions[i] = decision
+        return decisions
+
+    def SelectAmountBatch(self, requests):
+        # get bet amount requests for many players, given their names and views
+        return self.SelectBatch("SelectAmountBatch", requests)
+
+    def SelectDiscardsBatch(self, requests):
+        # get discards for many players, given their names and views
+        return self.SelectBatch("SelectDiscardsBatch", requests)
 
     def SetAllIn(self, name):
         # record player has gone all in
@@ -1171,66 +1751,163 @@ class ActionTracker(object):
     def TrackedPlayers(self):
         return [*self.players]
 
+    def Clone(self):
+        # copy statuses, so the copy can act without changing the tracker, sharing policies between copies
+        clone = ActionTracker.__new__(ActionTracker)
+        clone.players = {name : status.copy() for name, status in self.players.items()}
+        clone.beings = {species : names[:] for species, names in self.beings.items()}
+        clone.policies = self.policies.copy()
+        return clone
+
 
 class Dealer(object):
-    def __init__(self, num_seats=6):
-        # initialise trackers
-        self.cards = HandTracker()
+    def __init__(self, num_seats=6, variant="standard"):
+        # assert variant is known
+        if variant not in VARIANTS:
+            raise KeyError(f"{variant} is not a variant of five card draw, choose from {[*VARIANTS]}.")
+        # initialise trackers, ranking hands by the rules of the variant
+        self.cards = VARIANTS[variant]()
         self.seats = SeatTracker(num_seats)
         self.chips = ChipTracker()
         self.action = ActionTracker()
+        # initialise table view cache, invalidated whenever the table state changes
+        self.version = 0
+        self.views = {}
+        # initialise hand history recording, disabled until a writer is given
+        self.history = None
+        # initialise tracking of the range of hands each player could hold, disabled until a tracker is given
+        self.ranges = None
+        # initialise logging, tracking of how many cards each player has drawn this hand, and of how many
+        # bets and raises have been made in the betting round
+        self.logs = LOGS
+        self.drawn = {}
+        self.bets = 0
+
+    def Clone(self):
+        # copy the table, so futures can be played out on the copy without logging or recording them
+        clone = type(self).__new__(type(self))
+        clone.cards, clone.seats = self.cards.Clone(), self.seats.Clone()
+        clone.chips, clone.action = self.chips.Clone(), self.action.Clone()
+        clone.version, clone.views, clone.history, clone.ranges = 0, {}, None, None
+        clone.logs, clone.drawn, clone.bets = QUIET, self.drawn.copy(), self.bets
+        return clone
+
+    def RecordHistory(self, writer):
+        # record hands with a handhistory.HistoryWriter, or stop recording with None, where writers must record the
+        # variant dealt, so replays rank hands by the same rules
+        variant = getattr(writer, "variant", None)
+        if variant is not None and type(self.cards) is not VARIANTS[variant]:
+            raise ValueError(f"The writer records {variant}, not {type(self.cards).__name__}.")
+        self.history = writer
+
+    def TrackRanges(self, tracker):
+        # track the ranges of players with a ranges.RangeTracker, or stop tracking with None
+        self.ranges = tracker
+
+    def StateChanged(self):
+        # invalidate cached table views
+        self.version += 1
         
     def MoveButton(self):
         # move button to next player and log
         self.seats.MoveButton()
         player = self.seats.button["player"]
-        print(f"[BUTTON] The button was given to {player}.")
+        self.logs["BUTTON"].info("The button was given to %s.", player)
 
     def ShuffleDeck(self):
         self.cards.ShuffleDeck()
-        print(f"[CARDS] The deck has been shuffled.")
+        self.logs["CARDS"].info("The deck has been shuffled.")
         
     def DealHands(self):
         # determine players in the round and begin tracking
         names = self.seats.players
         self.cards.TrackPlayers(names)
-        # deal and evaluate hands and log
+        # record deck order
+        if self.history:
+            self.history.Deal(self.cards.DECK.state, self.cards.DECK.t)
+        # deal hands and log, evaluation is deferred until ranks are needed
         self.cards.DealPlayersIn()
-        self.cards.EvaluatePlayersIn()
-        print(f"[CARDS] Hands have been dealt.")
+        self.drawn, self.bets = {}, 0
+        if self.ranges:
+            self.ranges.NewHand(names)
+        self.logs["CARDS"].info("Hands have been dealt.")
         # initialise player statuses
         self.action.NewRound(names)
+        self.StateChanged()
     
+    def MuckReshuffled(self, drawn):
+        # record the order of the deck from before the cards were drawn, so replays draw the same cards
+        if self.history:
+            self.history.Deal(self.cards.DECK.state, self.cards.DECK.t - drawn)
+        self.logs["CARDS"].info("The muck has been reshuffled into the deck.")
+
+    def SelectAmount(self, name):
+        # ask the players policy for a bet from their view of the table
+        return self.action.SelectAmount(name, self.TableView(name))
+
+    def SelectDiscards(self, name):
+        # ask the players policy for discards from their view of the table
+        return self.action.SelectDiscards(name, self.TableView(name))
+
+    def SelectAmountBatch(self, names):
+        # ask for bets from many players at once, so policies can decide for them together
+        return self.action.SelectAmountBatch([(name, self.TableView(name)) for name in names])
+
+    def SelectDiscardsBatch(self, names):
+        # ask for discards from many players at once, so policies can decide for them together
+        return self.action.SelectDiscardsBatch([(name, self.TableView(name)) for name in names])
+
+    def SetPolicy(self, name, policy):
+        self.action.SetPolicy(name, policy)
+
     def EditHand(self, name, discards):
         hand = self.cards.Hand(name)
         # act on discard request and return success or not
         if self.cards.AllowDiscards(hand, discards):
-            self.cards.SwapPlayersCards(name, discards)
-            self.cards.EvaluatePlayersIn()
+            if self.cards.SwapPlayersCards(name, discards):
+                self.MuckReshuffled(len(discards))
+            # the draw ends the first betting round
+            self.drawn[name], self.bets = len(discards), 0
+            self.StateChanged()
+            if self.history:
+                self.history.Discard(name, discards)
+            if self.ranges:
+                self.ranges.Discard(name, len(discards))
             # log approved request
             if discards:
-                print(f"[CARDS] {name} swapped {len(discards)} cards.")
+                self.logs["CARDS"].info("%s swapped %s cards.", name, len(discards))
             else:
-                print(f"[CARDS] {name} didn't swap any cards.")
+                self.logs["CARDS"].info("%s didn't swap any cards.", name)
             return True
         return False
         
     def CollectCards(self):
+        # finish recording hand
+        if self.history and self.history.hand is not None:
+            self.history.EndHand({name : self.chips.Stack(name) for name in self.chips.players})
         # collect all cards and log
         self.cards.CollectCards()
-        print(f"[CARDS] Cards have been collected.")
+        self.StateChanged()
+        self.logs["CARDS"].info("Cards have been collected.")
         
     def TakeAnte(self):
+        # begin recording hand, with players in the order hands are dealt to them
+        if self.history:
+            players = [(name, seat, self.chips.Stack(name)) for name, seat in self.seats.players.items()]
+            self.history.NewHand(players, self.seats.button["seat"])
         # take ante from players
         for name in list(self.seats):
             status = self.chips.PayAnte(name)
             amount = self.chips.Contribution(name)
+            if self.history:
+                self.history.Ante(name, amount)
             # log all-in or not
             if status["bet_all"]:
-                print(f"[ANTE] The ante forced {name} to go all-in with {amount} chips!")
+                self.logs["ANTE"].info("The ante forced %s to go all-in with %s chips!", name, amount)
                 self.action.SetAllIn(name)
             elif status["bet_something"]:
-                print(f"[ANTE] {name} paid {amount} chips for the ante.")
+                self.logs["ANTE"].info("%s paid %s chips for the ante.", name, amount)
+        self.StateChanged()
     
     def TakeBet(self, name, amount):
         # act on bet request and return success or not
@@ -1241,33 +1918,42 @@ class Dealer(object):
             # assert action is legal
             if not any([status["has_mincalled"], status["has_allin"], status["has_folded"]]):
                 return False
+            if self.history:
+                self.history.Bet(name, amount, status)
+            if self.ranges:
+                self.ranges.Bet(name, amount, status)
+            if status["has_raised"]:
+                self.bets += 1
             # log action
             if status["has_raised"] and status["has_allin"]:
                 self.action.ExtendRound()
                 self.action.SetAllIn(name)
                 surplass = amount - self.chips.CallAmount(name) 
-                print(f"[ACTION] {name} has raised by {surplass} and gone all-in!")
+                self.logs["ACTION"].info("%s has raised by %s and gone all-in!", name, surplass)
             elif status["has_raised"] and status["has_mincalled"]:
                 self.action.ExtendRound()
                 self.action.SetMinCalled(name)
                 surplass = amount - self.chips.CallAmount(name) 
-                print(f"[ACTION] {name} has raised by {surplass}.")
+                self.logs["ACTION"].info("%s has raised by %s.", name, surplass)
             elif status["has_allin"] and status["has_mincalled"]:
                 self.action.SetAllIn(name)
-                print(f"[ACTION] {name} has gone all-in to call!")
+                self.logs["ACTION"].info("%s has gone all-in to call!", name)
             elif status["has_mincalled"] and amount == 0:
                 self.action.SetMinCalled(name)
-                print(f"[ACTION] {name} has checked.")
+                self.logs["ACTION"].info("%s has checked.", name)
             elif status["has_mincalled"]:
                 self.action.SetMinCalled(name)
-                print(f"[ACTION] {name} has called.")
+                self.logs["ACTION"].info("%s has called.", name)
             elif status["has_folded"]:
                 self.action.SetFolded(name)
-                print(f"[ACTION] {name} has folded.")
+                # folded hands go to the muck, so they can be reshuffled into the deck during the draw
+                self.cards.MuckPlayersCards(name)
+                self.logs["ACTION"].info("%s has folded.", name)
             elif status["has_allin"]:
                 self.action.SetAllIn(name)
-                print(f"[ACTION] {name} couldn't call but has gone all-in.")
+                self.logs["ACTION"].info("%s couldn't call but has gone all-in.", name)
             self.chips.Bet(name, amount)
+            self.StateChanged()
             return True
         else:
             return False
@@ -1286,39 +1972,52 @@ class Dealer(object):
                 info[name]["status"] = self.action.players[name]
         # log missing info
         if not self.action.players:
-            print(f"[WARNING] Nobody has a status.")
+            self.logs["WARNING"].warning("Nobody has a status.")
         if not self.cards.players:
-            print(f"[WARNING] Nobody has a hand.")
+            self.logs["WARNING"].warning("Nobody has a hand.")
         return info
 
     def TableView(self, viewer):
-        # initialise info tracker and return it
+        # reuse the viewers last view if the table hasn't changed since it was built
+        version, info = self.views.get(viewer, (None, None))
+        if version == self.version:
+            return info
+        # initialise read-only views that reference live tracker state, except the viewers hand, which is copied
+        # with its cards in a tuple so policies can't edit the hand they are shown
         info = {"self" : {}, "others" : {}, "game" : {}}
         for name in self.seats.players:
             # add info about viewer
             if viewer == name:
                 info["self"]["seat"] = self.seats.players[name]
-                info["self"]["chips"] = self.chips.players[name]
-                info["self"]["status"] = self.action.players[name]
-                info["self"]["hand"] = self.cards.players[name]
+                info["self"]["chips"] = MappingProxyType(self.chips.players[name])
+                info["self"]["status"] = MappingProxyType(self.action.players[name])
+                hand = self.cards.players[name]
+                # rate the viewers hand if it changed since it was last rated, so the copy holds its current rank_n
+                if hand["cards"]:
+                    self.cards.Rank(name)
+                info["self"]["hand"] = MappingProxyType(dict(hand, cards=tuple(hand["cards"])))
             else:
-                # add info about other players
-                info["others"][name] = {}
-                info["others"][name]["seat"] = self.seats.players[name]
-                info["others"][name]["chips"] = self.chips.players[name]
-                info["others"][name]["status"] = self.action.players[name]
-                info["others"][name]["hand"] = []
+                # add info about other players, with hands hidden
+                info["others"][name] = MappingProxyType({
+                    "seat" : self.seats.players[name],
+                    "chips" : MappingProxyType(self.chips.players[name]),
+                    "status" : MappingProxyType(self.action.players[name]),
+                    "hand" : ()})
         # add info game circumstances
         info["game"]["call"] = self.chips.CallAmount(viewer)
         info["game"]["pot"] = self.chips.PotAmount()
+        info = MappingProxyType({section : MappingProxyType(info[section]) for section in info})
+        # cache view until the table state changes
+        self.views[viewer] = (self.version, info)
         return info
 
     def KickPlayers(self, names):
         self.seats.KickPlayers(names)
         self.action.KickPlayers(names)
         self.chips.UntrackPlayers(names)
+        self.StateChanged()
         for name in names:
-            print(f"[PLAYER] {name} is leaving the table.")
+            self.logs["PLAYER"].info("%s is leaving the table.", name)
          
 
     def CalculateRewards(self, player_info):
@@ -1340,16 +2039,22 @@ class Dealer(object):
         return rewards
 
     def Payout(self):
+        # evaluate hands that changed since they were last evaluated
+        self.cards.EvaluatePlayersIn()
         # get data to determine size of rewards
         info = self.PlayerInfo()
         rewards = self.CalculateRewards(info)
+        self.StateChanged()
+        if self.history:
+            for name, reward in rewards.items():
+                self.history.Payout(name, reward)
         # get info to determine order to pay rewards
         showdown = self.action.ShowdownPlayers(self.seats)
         # check if hand reveal step can be skipped
         if len(showdown) < 2:
             winner = showdown[0]
-            print(f"[SHOWDOWN] {winner} won {rewards[winner]} chips.")
-            return True
+            self.logs["SHOWDOWN"].info("%s won %s chips.", winner, rewards[winner])
+            return rewards
         
         # determine which players should reveal hands
         mucks = set([])
@@ -1357,20 +2062,24 @@ class Dealer(object):
         for name in showdown:
             if self.cards.players[name]["rank_n"] <= rank_n:
                 hand = self.cards.Hand(name)
-                print(f"[SHOWDOWN] {name} is holding {hand}")
+                self.logs["SHOWDOWN"].info("%s is holding %s", name, hand)
                 rank_n = self.cards.players[name]["rank_n"]
             else:
-                print(f"[SHOWDOWN] {name} mucked.")
+                self.logs["SHOWDOWN"].info("%s mucked.", name)
                 mucks.add(name)
+            if self.history:
+                self.history.Showdown(name, self.cards.players[name]["rank_n"], name not in mucks)
         # reward players
         for name in showdown:
             if name in rewards:
                 reward = rewards[name]
                 if name not in mucks:
-                    hand = self.cards.players[name]["rank_c"]
-                    print(f"[REWARDS] {name} won {reward} with a {hand}")
+                    hand = self.cards.Category(self.cards.players[name]["rank_n"])
+                    self.logs["REWARDS"].info("%s won %s with a %s", name, reward, hand)
                 else:
-                    print(f"[REWARDS] {name} got {reward} chips back.")
+                    self.logs["REWARDS"].info("%s got %s chips back.", name, reward)
+        # return rewards tracker
+        return rewards
 
     def StartingChips(self, amount):
         # give chips to all players
@@ -1378,12 +2087,13 @@ class Dealer(object):
         self.chips.TrackPlayers(names)
         for name in names:
             self.chips.Reward(name, amount)
-        print(f"[SETUP] All players have been given {amount} chips.")
+        self.StateChanged()
+        self.logs["SETUP"].info("All players have been given %s chips.", amount)
 
     def UpdateAnte(self, amount):
         # set ante amount
         self.chips.UpdateAnte(amount)
-        print(f"[SETUP] The ante has been set to {amount} chips.")
+        self.logs["SETUP"].info("The ante has been set to %s chips.", amount)
 
     def TrackedPlayers(self):
         # return all tracked players
@@ -1407,26 +2117,27 @@ class Dealer(object):
     def Summary(self):
         # log summary of player chips
         for name in self.TrackedPlayers():
-            print(f"[STANDINGS] {name} has got {self.chips.players[name]['stack']} chips remaining.")
+            self.logs["STANDINGS"].info("%s has got %s chips remaining.", name, self.chips.players[name]['stack'])
     
     def SeatPlayers(self, players):
         self.seats.TrackPlayers(players)
         self.seats.SeatPlayers()
+        self.StateChanged()
 
-    def InitializeTable(self, humans, bots, starting_chips):
+    def InitializeTable(self, humans, bots, starting_chips, policy=None):
         # seat players
         players = humans + bots
         shuffle(players)
         self.SeatPlayers(players)
-        # track species
+        # track species, with bots deciding by a given policy or at random
         self.action.AddHumans(humans)
-        self.action.AddBots(bots)
+        self.action.AddBots(bots, policy)
         # give chips to players
         self.StartingChips(starting_chips)
 
 
 class PlayGame(object):
-    def __init__(self, chips=500, ante=5, opponents=["Phil Ivey", "Gus Hanson", "Dan Negreanu", "Phil Hellmuth"]):
+    def __init__(self, chips=500, ante=5, opponents=["Phil Ivey", "Gus Hanson", "Dan Negreanu", "Phil Hellmuth"], profiler=None):
         # store input parameters
         self.OPPONENTS = opponents
         self.CHIPS = chips
@@ -1435,6 +2146,10 @@ class PlayGame(object):
         # initialise game 
         self.Configuration()
 
+        # time phases, dealer calls and decisions with an instrumentation.TableProfiler
+        if profiler:
+            profiler.Attach(self)
+
         # gameloop
         while self.NewHand():
             self.BettingPhase("preflop")
@@ -1457,7 +2172,7 @@ class PlayGame(object):
     def NewHand(self):
         # check human has chips
         if not self.dealer.chips.players[self.HUMAN]["stack"]:
-            print(f"[END] Game over {self.HUMAN}, better luck next time.")
+            LOGS["END"].info("Game over %s, better luck next time.", self.HUMAN)
             return False
 
         # kick bots with few chips
@@ -1465,11 +2180,11 @@ class PlayGame(object):
 
         # check amount of players remaining
         if len(self.dealer.TrackedPlayers()) < 2:
-            print(f"[END] {self.HUMAN} has won!")
+            LOGS["END"].info("%s has won!", self.HUMAN)
             return False
 
         # begin new round
-        print(f"\n[NEW ROUND]")
+        LOGS["NEW ROUND"].info("")
         self.dealer.ShuffleDeck()
         self.dealer.MoveButton()
         self.dealer.TakeAnte()
@@ -1496,9 +2211,8 @@ class PlayGame(object):
                 if self.dealer.action.PlayerHasActed(name):
                     continue
                 # get action from player
-                info = self.dealer.TableView(name)
                 while True:
-                    amount = self.dealer.action.SelectAmount(name, info)
+                    amount = self.dealer.SelectAmount(name)
                     if self.dealer.TakeBet(name, amount):
                         break
             # track if more actions are needed
@@ -1521,12 +2235,11 @@ class PlayGame(object):
             if self.dealer.action.players[name]["has_folded"]:
                 continue
             # get action from player
-            info = self.dealer.TableView(name)
             while True:
-                discards = self.dealer.action.SelectDiscards(name, info)
+                discards = self.dealer.SelectDiscards(name)
                 if self.dealer.EditHand(name, discards):
                     if name == self.HUMAN and discards:
-                        print(f"[CARDS] Your new hand is {self.dealer.cards.players[name]['cards']}")
+                        LOGS["CARDS"].info("Your new hand is %s", self.dealer.cards.players[name]['cards'])
                     break
         return True
 
@@ -1537,13 +2250,13 @@ class PlayGame(object):
         self.dealer.Summary()
     
     def EndGame(self):
-        print("[END] Thanks for playing!")
+        LOGS["END"].info("Thanks for playing!")
 
 
 class SpectateGame(PlayGame):
-    def __init__(self):
+    def __init__(self, profiler=None):
         # initialise humanless game
-        super().__init__()
+        super().__init__(profiler=profiler)
     
     def Configuration(self):
         # configure game
@@ -1559,18 +2272,49 @@ class SpectateGame(PlayGame):
 
         # check amount of players remaining
         if len(self.dealer.TrackedPlayers()) < 2:
-            print(f"[END] {self.dealer.TrackedPlayers()[0]} has won!")
+            LOGS["END"].info("%s has won!", self.dealer.TrackedPlayers()[0])
             return False
         
 
         # begin new round
-        print(f"\n[NEW ROUND]")
+        LOGS["NEW ROUND"].info("")
         self.dealer.MoveButton()
         self.dealer.TakeAnte()
         self.dealer.DealHands()
         return True
 
+
+class HeadlessTable(SpectateGame):
+    """
+    A class to play hands of five card draw between bots, one at a time, at a fixed amount of seats.
+
+    Unlike SpectateGame, the game loop isn't started on construction, and stacks are topped up before
+    each hand so no player is ever kicked and every hand is played at the full table.
+
+    """
+
+    def __init__(self, seats : int, chips : int = 500, ante : int = 5):
+        """Constructs all the necessary attributes for the headlesstable object."""
+        self.OPPONENTS = [f"Bot {i}" for i in range(seats)]
+        self.CHIPS = chips
+        self.ANTE = ante
+        self.Configuration()
+
+    def PlayHand(self):
+        """Plays a complete hand, from shuffling the deck to paying out the pot."""
+        self.dealer.StartingChips(self.CHIPS)
+        self.dealer.ShuffleDeck()
+        self.dealer.MoveButton()
+        self.dealer.TakeAnte()
+        self.dealer.DealHands()
+        self.BettingPhase("preflop")
+        self.SwitchingPhase()
+        self.BettingPhase("postflop")
+        self.EvaluationPhase()
+
+
 if __name__ == "__main__":
+    ConfigureLogging()
     prompt = "Press 1 to play, or 0 to spectate."
     answer = input(prompt)
     if int(answer):
@@ -0,0 +1,1091 @@
+import mmap
+import os
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from struct import Struct
+
+from fivecarddraw import VARIANTS
+
+
+# file and block layout, where the magic is followed by the variant played, so blocks start after both
+MAGIC = b"FCDH\x02"
+VARIANT = Struct("<16s")
+START = len(MAGIC) + VARIANT.size
+BLOCK = Struct("<BII")
+RECORD = Struct("<I")
+COMPRESSED = 1
+
+# hand layout
+HEADER = Struct("<QBB")
+PLAYER = Struct("<BIB")
+STACK = Struct("<I")
+
+# event codes
+DEAL, ANTE, BET, DISCARD, SHOWDOWN, PAYOUT = range(1, 7)
+
+# event layouts
+DEAL_EVENT = Struct("<BBB")
+ANTE_EVENT = Struct("<BBI")
+BET_EVENT = Struct("<BBIB")
+DISCARD_EVENT = Struct("<BBB")
+SHOWDOWN_EVENT = Struct("<BBhB")
+PAYOUT_EVENT = Struct("<BBI")
+
+# index layout
+INDEX_MAGIC = b"FCDI\x01\x00\x00\x00"
+INDEX_HEADER = Struct("<8sQQQ")
+NO_SHOWDOWN = 32767
+# tail layout, of rows appended as blocks are written: hand id, block offset, position, pot, rank and the length of
+# the names of the players dealt in, which follow each row
+TAIL_ROW = Struct("<QQIIhH")
+# blocks appended to the tail of an index before it's rewritten sorted
+TAIL_BLOCKS = 64
+
+# bet flags, matching the keys of ChipTracker.BetDetails
+RAISED, ALLIN, MINCALLED, FOLDED = 1, 2, 4, 8
+FLAGS = (("has_raised", RAISED), ("has_allin", ALLIN), ("has_mincalled", MINCALLED), ("has_folded", FOLDED))
+
+
+def ReadVariant(path : str) -> str:
+    """Reads the variant a hand history was played in from its file header."""
+    with open(path, "rb") as file:
+        # assert file is a hand history
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a hand history.")
+        variant, = VARIANT.unpack(file.read(VARIANT.size))
+    return variant.rstrip(b"\0").decode()
+
+
+def CardCode(card) -> int:
+    """Encodes a card as a single byte."""
+    return card.value_i * 4 + card.suit_i
+
+
+def BetFlags(status : dict) -> int:
+    """Encodes a bet status from ChipTracker.BetDetails as bit flags."""
+    return ((status["has_raised"] and RAISED) | (status["has_allin"] and ALLIN) | (status["has_mincalled"] and MINCALLED)
+            | (status["has_folded"] and FOLDED))
+
+
+class HandRecord(object):
+    """
+    A class to represent a recorded hand.
+
+    Attributes
+    ----------
+        hand_id : int
+            the sequential id of the hand
+        button : int
+            the seat of the button
+        players : list[tuple]
+            the name, seat and stack of each player before the ante
+        events : list[tuple]
+            the recorded events in order, each led by its event code
+        stacks : dict
+            the stack of each player after the hand
+
+    """
+
+    __slots__ = ("hand_id", "button", "players", "events", "stacks")
+
+    def __init__(self, hand_id : int, button : int, players : list, events : list, stacks : dict):
+        """Constructs all the necessary attributes for the handrecord object."""
+        self.hand_id = hand_id
+        self.button = button
+        self.players = players
+        self.events = events
+        self.stacks = stacks
+
+    def __repr__(self):
+        """Displays the hand id and players when the record is printed."""
+        return f"HandRecord({self.hand_id}, {[name for name, _, _ in self.players]})"
+
+
+@lru_cache(maxsize=None)
+def Stacks(n : int) -> Struct:
+    """Provides the struct of the final stacks of a hand of n players."""
+    return Struct(f"<{n}I")
+
+
+def DecodeHand(payload) -> HandRecord:
+    """
+    Decodes the payload of a hand record.
+
+    Parameters
+    ----------
+        payload : bytes of one hand record, without its length prefix
+
+    """
+    # fields are sliced from bytes rather than copied from views
+    payload = bytes(payload)
+    # read header
+    hand_id, button, n = HEADER.unpack_from(payload, 0)
+    i = HEADER.size
+    players, names = [], []
+    for _ in range(n):
+        seat, stack, length = PLAYER.unpack_from(payload, i)
+        i += PLAYER.size
+        name = payload[i:i+length].decode()
+        i += length
+        players.append((name, seat, stack))
+        names.append(name)
+
+    # read events until the final stacks, checking the most common events first, since most of a record is bets
+    events = []
+    append = events.append
+    bet, ante, discard, showdown, payout = (BET_EVENT.unpack_from, ANTE_EVENT.unpack_from, DISCARD_EVENT.unpack_from,
+                                            SHOWDOWN_EVENT.unpack_from, PAYOUT_EVENT.unpack_from)
+    end = len(payload) - n * STACK.size
+    while i < end:
+        code = payload[i]
+        if code == BET:
+            _, p, amount, flags = bet(payload, i)
+            i += BET_EVENT.size
+            append((BET, names[p], amount, flags))
+        elif code == ANTE:
+            _, p, amount = ante(payload, i)
+            i += ANTE_EVENT.size
+            append((ANTE, names[p], amount))
+        elif code == DISCARD:
+            _, p, size = discard(payload, i)
+            i += DISCARD_EVENT.size
+            append((DISCARD, names[p], payload[i:i+size]))
+            i += size
+        elif code == SHOWDOWN:
+            _, p, rank_n, shown = showdown(payload, i)
+            i += SHOWDOWN_EVENT.size
+            append((SHOWDOWN, names[p], rank_n, bool(shown)))
+        elif code == PAYOUT:
+            _, p, amount = payout(payload, i)
+            i += PAYOUT_EVENT.size
+            append((PAYOUT, names[p], amount))
+        elif code == DEAL:
+            _, t, size = DEAL_EVENT.unpack_from(payload, i)
+            i += DEAL_EVENT.size
+            append((DEAL, t, payload[i:i+size]))
+            i += size
+        else:
+            raise ValueError(f"Unknown event code {code} in hand {hand_id}.")
+
+    # read final stacks
+    stacks = dict(zip(names, Stacks(n).unpack_from(payload, end)))
+    return HandRecord(hand_id, button, players, events, stacks)
+
+
+class HistoryWriter(object):
+    """
+    A class to record hands to an append-only, length-prefixed binary log.
+
+    Hands are encoded with precompiled structs into a buffer, and written out in blocks which are optionally
+    compressed. Files are rotated by size at block boundaries, so a hand never spans two files.
+
+    Attributes
+    ----------
+        path : str
+            the path of the first file
+        paths : list[str]
+            the paths of every file written to
+        compress : bool
+            whether blocks are compressed
+        block_size : int
+            the amount of uncompressed bytes buffered before a block is written
+        max_bytes : int
+            the size a file may reach before rotating, or 0 to never rotate
+        hand_id : int
+            the id of the next hand
+        file : BufferedWriter
+            the file being written to
+        block : bytearray
+            the hand records waiting to be written
+        hand : bytearray
+            the record of the hand in progress
+        positions : dict
+            the position of each player of the hand in progress
+        pot : int
+            the amount of chips put in the pot during the hand in progress
+        best : int
+            the best numerical rating shown down during the hand in progress
+        index : bool
+            whether a sidecar index is built for each file
+        variant : str
+            the variant played, recorded in the header of each file
+        indexer : IndexBuilder
+            the sidecar index of the file being written to
+
+    Methods
+    -------
+        NewHand :
+            Begin recording a hand.
+        Deal :
+            Record the order of the deck.
+        Ante :
+            Record an ante payment.
+        Bet :
+            Record a bet.
+        Discard :
+            Record discarded cards.
+        Showdown :
+            Record a hand reaching showdown.
+        Payout :
+            Record a reward.
+        EndHand :
+            Finish recording a hand.
+        Flush :
+            Write the buffered hands to file.
+        Rotate :
+            Continue writing to a new file.
+        Close :
+            Write the buffered hands and close the file.
+
+    """
+
+    def __init__(self, path : str, compress : bool = False, block_size : int = 1 << 16, max_bytes : int = 0, hand_id : int = 0,
+                 index : bool = False, variant : str = "standard"):
+        """
+        Constructs all the necessary attributes for the historywriter object.
+
+        Parameters
+        ----------
+            path : path of the first file
+            compress : whether blocks are compressed
+            block_size : amount of uncompressed bytes buffered before a block is written
+            max_bytes : size a file may reach before rotating, or 0 to never rotate
+            hand_id : id of the first hand, which continues from the last hand indexed when appending with an index
+            index : whether a sidecar index is built for each file
+            variant : the variant played, one of VARIANTS, which must match the variant of an existing file
+
+        """
+        # assert variant is known, since replays rank hands by its rules
+        if variant not in VARIANTS:
+            raise KeyError(f"{variant} is not a variant of five card draw, choose from {[*VARIANTS]}.")
+        # store input parameters
+        self.path = path
+        self.compress = compress
+        self.block_size = block_size
+        self.max_bytes = max_bytes
+        self.hand_id = hand_id
+        self.index = index
+        self.variant = variant
+        # initialise buffers
+        self.block = bytearray()
+        self.hand = None
+        self.positions = {}
+        self.pot, self.best = 0, NO_SHOWDOWN
+        # open first file
+        self.paths = []
+        self.file = None
+        self.indexer = None
+        self.Open(path)
+
+    def __enter__(self):
+        """Allows the writer to be used as a context manager."""
+        return self
+
+    def __exit__(self, *args):
+        """Closes the writer when leaving a context."""
+        self.Close()
+
+    def Open(self, path : str):
+        """
+        Opens a file for appending, writing a file header with the variant played if it's new.
+
+        Parameters
+        ----------
+            path : path of the file
+
+        Side effects
+        ------------
+            The file attribute is replaced. \n
+            The paths attribute gets an additional item. \n
+            The indexer attribute is replaced if indexing. \n
+            The hand_id attribute continues from the last hand of an existing file if indexing.
+
+        """
+        self.file = open(path, "ab")
+        # assert existing files are hand histories of the same variant
+        if self.file.tell():
+            variant = ReadVariant(path)
+            if variant != self.variant:
+                self.file.close()
+                raise ValueError(f"{path} records {variant}, not {self.variant}.")
+        else:
+            self.file.write(MAGIC + VARIANT.pack(self.variant.encode()))
+        self.paths.append(path)
+        # continue any existing index of the file, indexing hands written since it was saved, or every hand if it's missing
+        if self.index:
+            self.indexer = IndexBuilder(path)
+            if self.file.tell() > START:
+                if os.path.exists(IndexPath(path)):
+                    self.indexer.Load()
+                self.indexer.Scan()
+            # continue ids from the last hand, so appended hands don't repeat them
+            if len(self.indexer):
+                self.hand_id = max(self.hand_id, self.indexer.hand_ids[-1] + 1)
+
+    def NewHand(self, players : list, button : int):
+        """
+        Begins recording a hand.
+
+        Parameters
+        ----------
+            players : name, seat and stack of each player before the ante
+            button : seat of the button
+
+        Side effects
+        ------------
+            The hand and positions attributes are replaced. \n
+            The pot and best attributes are reset.
+
+        """
+        # assert previous hand was finished
+        if self.hand is not None:
+            raise Exception(f"Hand {self.hand_id} is still being recorded.")
+        hand = bytearray(HEADER.pack(self.hand_id, button, len(players)))
+        for name, seat, stack in players:
+            encoded = name.encode()
+            hand += PLAYER.pack(seat, stack, len(encoded))
+            hand += encoded
+        self.hand = hand
+        self.positions = {name : i for i, (name, _, _) in enumerate(players)}
+        self.pot, self.best = 0, NO_SHOWDOWN
+
+    def Deal(self, cards : list, t : int):
+        """
+        Records the order of the deck before dealing, or after the muck is reshuffled into it during the draw.
+
+        Parameters
+        ----------
+            cards : every card in the deck, in order
+            t : amount of cards no longer in the deck
+
+        """
+        self.hand += DEAL_EVENT.pack(DEAL, t, len(cards))
+        self.hand += bytes(CardCode(card) for card in cards)
+
+    def Ante(self, name : str, amount : int):
+        """Records an ante payment."""
+        self.hand += ANTE_EVENT.pack(ANTE, self.positions[name], amount)
+        self.pot += amount
+
+    def Bet(self, name : str, amount : int, status : dict):
+        """Records a bet, classified as in ChipTracker.BetDetails."""
+        self.hand += BET_EVENT.pack(BET, self.positions[name], amount, BetFlags(status))
+        self.pot += amount
+
+    def Discard(self, name : str, discards : list):
+        """Records the cards a player discarded."""
+        self.hand += DISCARD_EVENT.pack(DISCARD, self.positions[name], len(discards))
+        self.hand += bytes(CardCode(card) for card in discards)
+
+    def Showdown(self, name : str, rank_n : int, shown : bool):
+        """Records a hand reaching showdown, and whether it was shown or mucked."""
+        self.hand += SHOWDOWN_EVENT.pack(SHOWDOWN, self.positions[name], rank_n, shown)
+        self.best = min(self.best, rank_n)
+
+    def Payout(self, name : str, amount : int):
+        """Records a reward."""
+        self.hand += PAYOUT_EVENT.pack(PAYOUT, self.positions[name], amount)
+
+    def EndHand(self, stacks : dict) -> int:
+        """
+        Finishes recording a hand and returns its id.
+
+        Parameters
+        ----------
+            stacks : stack of each player after the hand
+
+        Side effects
+        ------------
+            The block attribute gets the hand record. \n
+            The hand_id attribute is increased by one. \n
+            The indexer attribute gets the hand if indexing.
+
+        """
+        hand = self.hand
+        for name in self.positions:
+            hand += STACK.pack(stacks.get(name, 0))
+        if self.indexer is not None:
+            self.indexer.Add(self.hand_id, len(self.block), self.pot, self.best, self.positions)
+        self.block += RECORD.pack(len(hand))
+        self.block += hand
+        self.hand = None
+        # write full blocks
+        if len(self.block) >= self.block_size:
+            self.Flush()
+        self.hand_id += 1
+        return self.hand_id - 1
+
+    def Flush(self):
+        """
+        Writes the buffered hands to file as a block.
+
+        Side effects
+        ------------
+            The block attribute is cleared. \n
+            The indexer attribute has the block offset of its hands updated, and appended to its tail, if indexing.
+
+        """
+        if not self.block:
+            return
+        if self.indexer is not None:
+            self.indexer.Locate(self.file.tell())
+        raw = bytes(self.block)
+        self.block.clear()
+        # store compressed only if it saves space
+        flags, stored = 0, raw
+        if self.compress:
+            compressed = zlib.compress(raw, 1)
+            if len(compressed) < len(raw):
+                flags, stored = COMPRESSED, compressed
+        self.file.write(BLOCK.pack(flags, len(stored), len(raw)))
+        self.file.write(stored)
+        # append to the index once its hands are in the file, so it's never lost with the writer and never ahead of the file
+        if self.indexer is not None:
+            self.file.flush()
+            self.indexer.Append()
+        # rotate files that are too big
+        if self.max_bytes and self.file.tell() >= self.max_bytes:
+            self.Rotate()
+
+    def Rotate(self):
+        """
+        Continues writing to a new file named after the first file.
+
+        Side effects
+        ------------
+            The file attribute is replaced. \n
+            The paths attribute gets an additional item. \n
+            The indexer attribute is written sorted and replaced, if indexing.
+
+        """
+        self.file.close()
+        if self.indexer is not None:
+            self.indexer.Write()
+        self.Open(f"{self.path}.{len(self.paths)}")
+
+    def Close(self):
+        """Writes the buffered hands and closes the file."""
+        if self.file.closed:
+            return
+        self.Flush()
+        self.file.close()
+        if self.indexer is not None:
+            self.indexer.Write()
+
+
+class HistoryReader(object):
+    """
+    A class to lazily stream hands from a binary hand history.
+
+    Attributes
+    ----------
+        path : str
+            the path of the file being read
+        variant : str
+            the variant played
+
+    Methods
+    -------
+        Blocks :
+            Iterate the decompressed blocks of the file.
+        Records :
+            Iterate the undecoded hand records of the file.
+        HandAt :
+            Get the hand at a known position.
+
+    """
+
+    def __init__(self, path : str):
+        """Constructs all the necessary attributes for the historyreader object."""
+        self.path = path
+        self.variant = ReadVariant(path)
+
+    def __iter__(self):
+        """Converts the reader to an iterator decoding one hand at a time."""
+        return (DecodeHand(payload) for _, _, payload in self.Records())
+
+    def Blocks(self, start : int = START):
+        """
+        Iterates the offset and decompressed contents of each block, reading one block at a time.
+
+        Parameters
+        ----------
+            start : offset of the first block to read
+
+        """
+        with open(self.path, "rb") as file:
+            file.seek(start)
+            while True:
+                offset = file.tell()
+                header = file.read(BLOCK.size)
+                if len(header) < BLOCK.size:
+                    return
+                flags, stored, raw = BLOCK.unpack(header)
+                data = file.read(stored)
+                if flags & COMPRESSED:
+                    data = zlib.decompress(data, bufsize=raw)
+                yield offset, data
+
+    def Records(self, start : int = START):
+        """
+        Iterates the block offset, position within the block and payload of each hand, without decoding them.
+
+        Parameters
+        ----------
+            start : offset of the first block to read
+
+        """
+        for offset, data in self.Blocks(start):
+            i = 0
+            while i < len(data):
+                length, = RECORD.unpack_from(data, i)
+                yield offset, i, data[i+RECORD.size:i+RECORD.size+length]
+                i += RECORD.size + length
+
+    def HandAt(self, offset : int, position : int) -> HandRecord:
+        """
+        Reads a single hand from its block offset and its position within the block.
+
+        Parameters
+        ----------
+            offset : offset of the block in the file
+            position : position of the hand record within the decompressed block
+
+        """
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            flags, stored, raw = BLOCK.unpack(file.read(BLOCK.size))
+            data = file.read(stored)
+        if flags & COMPRESSED:
+            data = zlib.decompress(data, bufsize=raw)
+        length, = RECORD.unpack_from(data, position)
+        return DecodeHand(memoryview(data)[position+RECORD.size:position+RECORD.size+length])
+
+
+def HistoryFiles(path : str) -> list[str]:
+    """
+    Provides the paths of a hand history and the files it was rotated into, in order.
+
+    Parameters
+    ----------
+        path : path of the first file
+
+    """
+    paths, i = [], 1
+    if os.path.exists(path):
+        paths.append(path)
+    while os.path.exists(f"{path}.{i}"):
+        paths.append(f"{path}.{i}")
+        i += 1
+    return paths
+
+
+def IndexPath(path : str) -> str:
+    """Provides the path of the sidecar index of a hand history."""
+    return f"{path}.idx"
+
+
+def TailPath(path : str) -> str:
+    """Provides the path of the rows appended to the sidecar index of a hand history since it was last sorted."""
+    return f"{path}.idx.tail"
+
+
+def ReadTail(path : str, after : int = -1) -> list[tuple]:
+    """
+    Reads the rows appended to the sidecar index of a hand history, stopping at a row cut short by a crash.
+
+    Parameters
+    ----------
+        path : path of the hand history, not of its tail
+        after : id of the last hand in the sorted index, so rows it already holds are skipped
+
+    Returns
+    -------
+        The hand id, block offset, position, pot, rank and names of the players dealt in of each row.
+
+    """
+    if not os.path.exists(TailPath(path)):
+        return []
+    with open(TailPath(path), "rb") as file:
+        data = file.read()
+    rows, i = [], 0
+    while i + TAIL_ROW.size <= len(data):
+        hand_id, offset, position, pot, rank_n, length = TAIL_ROW.unpack_from(data, i)
+        i += TAIL_ROW.size
+        if i + length > len(data):
+            break
+        names = data[i:i+length].decode().split("\0") if length else []
+        i += length
+        if hand_id > after:
+            rows.append((hand_id, offset, position, pot, rank_n, names))
+    return rows
+
+
+class IndexBuilder(object):
+    """
+    A class to build the sidecar index of a hand history while it's written.
+
+    The index is stored as fixed-width columns, so it can be memory-mapped by HistoryIndex. Alongside the
+    columns are the rows sorted by pot and by showdown rank, and the rows of each player, so that filtered
+    subsets are found by binary search. Rows of blocks written since the columns were last sorted are appended
+    to a tail, which is merged when the index is read, so writing a block doesn't rewrite the whole index.
+
+    Attributes
+    ----------
+        path : str
+            the path of the hand history
+        hand_ids : array
+            the id of each hand
+        offsets : array
+            the offset of the block holding each hand
+        positions : array
+            the position of each hand within its block
+        pots : array
+            the amount of chips put in the pot during each hand
+        ranks : array
+            the best numerical rating shown down during each hand
+        players : dict
+            the rows of hands each player was dealt into
+        written : int
+            the amount of rows in the sorted columns of the sidecar file
+        appended : int
+            the amount of rows in the sidecar file and its tail
+        blocks : int
+            the amount of blocks appended to the tail
+
+    Methods
+    -------
+        Add :
+            Index a hand.
+        Locate :
+            Set the block offset of hands waiting to be written.
+        Load :
+            Continue an existing index.
+        Scan :
+            Index the hands of the hand history missing from the index.
+        Append :
+            Append the rows of written blocks to the tail of the sidecar file.
+        Write :
+            Write the index to its sidecar file.
+
+    """
+
+    def __init__(self, path : str):
+        """Constructs all the necessary attributes for the indexbuilder object."""
+        self.path = path
+        self.hand_ids = array("Q")
+        self.offsets = array("Q")
+        self.positions = array("I")
+        self.pots = array("I")
+        self.ranks = array("h")
+        self.players = {}
+        self.written, self.appended, self.blocks = 0, 0, 0
+
+    def __len__(self):
+        """Provides the amount of hands indexed."""
+        return len(self.hand_ids)
+
+    def Add(self, hand_id : int, position : int, pot : int, rank_n : int, names):
+        """
+        Indexes a hand whose block is yet to be written.
+
+        Parameters
+        ----------
+            hand_id : id of the hand
+            position : position of the hand within its block
+            pot : amount of chips put in the pot during the hand
+            rank_n : best numerical rating shown down during the hand
+            names : players dealt into the hand
+
+        """
+        # assert ids increase, since hands are found by binary search over them
+        if self.hand_ids and hand_id <= self.hand_ids[-1]:
+            raise ValueError(f"Hand {hand_id} doesn't follow hand {self.hand_ids[-1]} in the index of {self.path}.")
+        row = len(self.hand_ids)
+        self.hand_ids.append(hand_id)
+        self.positions.append(position)
+        self.pots.append(pot)
+        self.ranks.append(rank_n)
+        for name in names:
+            if name not in self.players:
+                self.players[name] = array("I")
+            self.players[name].append(row)
+
+    def Locate(self, offset : int):
+        """Sets the block offset of every hand waiting for its block to be written."""
+        self.offsets.extend([offset] * (len(self.positions) - len(self.offsets)))
+
+    def Load(self):
+        """Continues the existing index of the hand history."""
+        with HistoryIndex(self.path) as index:
+            self.hand_ids.extend(index.hand_ids)
+            self.offsets.extend(index.offsets)
+            self.positions.extend(index.positions)
+            self.pots.extend(index.pots)
+            self.ranks.extend(index.ranks)
+            for name, j in index.names.items():
+                self.players[name] = array("I", index.postings[index.starts[j]:index.starts[j+1]])
+            self.written = len(self.hand_ids)
+        # continue with the rows of the tail
+        for hand_id, offset, position, pot, rank_n, names in ReadTail(self.path, self.hand_ids[-1] if self.hand_ids else -1):
+            self.Add(hand_id, position, pot, rank_n, names)
+            self.Locate(offset)
+        self.appended = len(self.hand_ids)
+
+    def Scan(self):
+        """Indexes the hands of the hand history in blocks after the last block indexed, or every hand if none are."""
+        indexed = bool(self.offsets)
+        start = self.offsets[-1] if indexed else START
+        for offset, position, payload in HistoryReader(self.path).Records(start):
+            # skip the hands of the last block indexed
+            if indexed and offset == start:
+                continue
+            hand = DecodeHand(payload)
+            pot = sum(event[2] for event in hand.events if event[0] == ANTE or event[0] == BET)
+            best = min((event[2] for event in hand.events if event[0] == SHOWDOWN), default=NO_SHOWDOWN)
+            self.Add(hand.hand_id, position, pot, best, [name for name, _, _ in hand.players])
+            self.Locate(offset)
+
+    def Append(self):
+        """
+        Appends the rows of hands whose blocks have been written to the tail of the sidecar file.
+
+        The whole index is written instead if the sidecar file has no rows yet, or every TAIL_BLOCKS blocks, so
+        the tail stays short to merge.
+
+        Side effects
+        ------------
+            The appended and blocks attributes are updated.
+
+        """
+        if not self.written or self.blocks >= TAIL_BLOCKS:
+            self.Write()
+            return
+        # invert the rows of each player for the rows being appended
+        n = len(self.offsets)
+        names = [[] for _ in range(n - self.appended)]
+        for name, rows in self.players.items():
+            for row in reversed(rows):
+                if row < self.appended:
+                    break
+                names[row - self.appended].append(name)
+        tail = bytearray()
+        for row in range(self.appended, n):
+            blob = "\0".join(names[row - self.appended]).encode()
+            tail += TAIL_ROW.pack(self.hand_ids[row], self.offsets[row], self.positions[row], self.pots[row], self.ranks[row], len(blob))
+            tail += blob
+        with open(TailPath(self.path), "ab") as file:
+            file.write(tail)
+        self.appended, self.blocks = n, self.blocks + 1
+
+    def Write(self):
+        """
+        Writes the index to its sidecar file, replacing any previous version and its tail.
+
+        Side effects
+        ------------
+            The written and appended attributes are updated, and the blocks attribute is reset.
+
+        """
+        n = len(self.offsets)
+        # sort rows for range filters
+        pot_order = array("I", sorted(range(n), key=self.pots.__getitem__))
+        rank_order = array("I", sorted(range(n), key=self.ranks.__getitem__))
+        # concatenate the rows of each player
+        names = [*self.players]
+        starts, postings = array("I", [0]), array("I")
+        for name in names:
+            postings.extend(self.players[name])
+            starts.append(len(postings))
+        blob = "\0".join(names).encode()
+        # write columns, widest first so each stays aligned
+        path = IndexPath(self.path)
+        with open(path + ".tmp", "wb") as file:
+            file.write(INDEX_HEADER.pack(INDEX_MAGIC, n, len(names), len(blob)))
+            for column in (self.hand_ids, self.offsets, self.positions, self.pots, pot_order, rank_order, starts, postings, self.ranks):
+                column.tofile(file)
+            file.write(blob)
+        os.replace(path + ".tmp", path)
+        # the tail's rows are now sorted into the index, and any left by a crash are skipped by their ids
+        if os.path.exists(TailPath(self.path)):
+            os.remove(TailPath(self.path))
+        self.written = self.appended = n
+        self.blocks = 0
+
+
+class HistoryIndex(object):
+    """
+    A class to memory-map the sidecar index of a hand history for random access.
+
+    Rows appended to the tail of the index since it was last sorted are read into memory, and numbered after the
+    rows of the sorted columns, so lookups and filters search both.
+
+    Attributes
+    ----------
+        path : str
+            the path of the hand history
+        variant : str
+            the variant played, whose categorical ratings hands are filtered by
+        hand_ids, offsets, positions, pots, pot_order, rank_order, starts, postings, ranks : memoryview
+            the columns of the index
+        names : dict
+            the position of each player in the player columns
+        tail_ids, tail_offsets, tail_positions, tail_pots, tail_ranks : array
+            the columns of the rows of the tail
+        tail_players : dict
+            the rows of the tail each player was dealt into
+
+    Methods
+    -------
+        Id :
+            Get the id of the hand of a row.
+        Locate :
+            Get the position of a hand.
+        TailRows :
+            Get rows of the tail within a range of a column.
+        Hand :
+            Get a hand by its id.
+        Hands :
+            Get many hands by their ids.
+        PotRows :
+            Get rows of hands within a range of pot sizes.
+        RankRows :
+            Get rows of hands shown down within a range of numerical ratings.
+        PlayerRows :
+            Get rows of hands a player was dealt into.
+        Filter :
+            Get ids of hands matching every given filter.
+        Close :
+            Unmap the index.
+
+    """
+
+    def __init__(self, path : str, variant : str = None):
+        """
+        Constructs all the necessary attributes for the historyindex object.
+
+        Parameters
+        ----------
+            path : path of the hand history, not of its index
+            variant : the variant played, one of VARIANTS, defaulting to the variant recorded in the hand history
+
+        """
+        self.path = path
+        self.reader = HistoryReader(path)
+        self.variant = variant or self.reader.variant
+        with open(IndexPath(path), "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, m, length = INDEX_HEADER.unpack_from(self.map, 0)
+        # assert file is an index
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{IndexPath(path)} is not a hand history index.")
+        # map columns without copying them
+        view, i = memoryview(self.map), INDEX_HEADER.size
+        columns = {}
+        for column, code, size in (("hand_ids", "Q", n), ("offsets", "Q", n), ("positions", "I", n), ("pots", "I", n),
+                                   ("pot_order", "I", n), ("rank_order", "I", n), ("starts", "I", m + 1),
+                                   ("postings", "I", None), ("ranks", "h", n)):
+            # the amount of postings is the last start
+            if size is None:
+                size = columns["starts"][m]
+            width = array(code).itemsize
+            columns[column] = view[i:i+size*width].cast(code)
+            i += size * width
+        self.__dict__.update(columns)
+        self.names = {name : j for j, name in enumerate(bytes(view[i:i+length]).decode().split("\0"))} if m else {}
+        self.view = view
+        # read the rows appended since the columns were sorted
+        self.tail_ids, self.tail_offsets, self.tail_positions = array("Q"), array("Q"), array("I")
+        self.tail_pots, self.tail_ranks, self.tail_players = array("I"), array("h"), {}
+        for row, (hand_id, offset, position, pot, rank_n, names) in enumerate(ReadTail(path, self.hand_ids[n-1] if n else -1), n):
+            self.tail_ids.append(hand_id)
+            self.tail_offsets.append(offset)
+            self.tail_positions.append(position)
+            self.tail_pots.append(pot)
+            self.tail_ranks.append(rank_n)
+            for name in names:
+                self.tail_players.setdefault(name, array("I")).append(row)
+
+    def __len__(self):
+        """Provides the amount of hands indexed."""
+        return len(self.hand_ids) + len(self.tail_ids)
+
+    def __enter__(self):
+        """Allows the index to be used as a context manager."""
+        return self
+
+    def __exit__(self, *args):
+        """Unmaps the index when leaving a context."""
+        self.Close()
+
+    def Locate(self, hand_id : int) -> tuple[int, int]:
+        """
+        Provides the block offset and position of a hand by binary search.
+
+        Parameters
+        ----------
+            hand_id : id of the hand
+
+        """
+        row = bisect_left(self.hand_ids, hand_id)
+        if row < len(self.hand_ids) and self.hand_ids[row] == hand_id:
+            return self.offsets[row], self.positions[row]
+        # search the tail, whose ids follow the sorted columns
+        row = bisect_left(self.tail_ids, hand_id)
+        # assert hand is indexed
+        if row == len(self.tail_ids) or self.tail_ids[row] != hand_id:
+            raise KeyError(f"Hand {hand_id} is not in {self.path}.")
+        return self.tail_offsets[row], self.tail_positions[row]
+
+    def Id(self, row : int) -> int:
+        """Provides the id of the hand of a row, counting rows of the tail after the sorted columns."""
+        n = len(self.hand_ids)
+        return self.hand_ids[row] if row < n else self.tail_ids[row - n]
+
+    def TailRows(self, column : array, low : int, high : int = None) -> list[int]:
+        """Provides the rows of the tail whose value in a column of the tail is between low and high inclusive."""
+        n = len(self.hand_ids)
+        return [n + i for i, value in enumerate(column) if low <= value and (high is None or value <= high)]
+
+    def Hand(self, hand_id : int) -> HandRecord:
+        """Reads a hand by its id."""
+        return self.reader.HandAt(*self.Locate(hand_id))
+
+    def Hands(self, hand_ids : list[int]):
+        """Reads hands by their ids, decompressing each block once for consecutive hands sharing it."""
+        with open(self.path, "rb") as file:
+            offset, data = None, None
+            for hand_id in hand_ids:
+                block, position = self.Locate(hand_id)
+                if block != offset:
+                    file.seek(block)
+                    flags, stored, raw = BLOCK.unpack(file.read(BLOCK.size))
+                    offset, data = block, file.read(stored)
+                    if flags & COMPRESSED:
+                        data = zlib.decompress(data, bufsize=raw)
+                length, = RECORD.unpack_from(data, position)
+                yield DecodeHand(memoryview(data)[position+RECORD.size:position+RECORD.size+length])
+
+    def PotRows(self, low : int = 0, high : int = None) -> memoryview | array:
+        """Provides the rows of hands whose pot is between low and high inclusive, copied only to add rows of the tail."""
+        pots = self.pots.__getitem__
+        i = bisect_left(self.pot_order, low, key=pots)
+        j = len(self.hand_ids) if high is None else bisect_right(self.pot_order, high, key=pots)
+        tail = self.TailRows(self.tail_pots, low, high)
+        return array("I", self.pot_order[i:j]) + array("I", tail) if tail else self.pot_order[i:j]
+
+    def RankRows(self, low : int, high : int) -> memoryview | array:
+        """Provides the rows of hands whose best shown down numerical rating is between low and high inclusive."""
+        ranks = self.ranks.__getitem__
+        i = bisect_left(self.rank_order, low, key=ranks)
+        j = bisect_right(self.rank_order, high, key=ranks)
+        tail = self.TailRows(self.tail_ranks, low, high)
+        return array("I", self.rank_order[i:j]) + array("I", tail) if tail else self.rank_order[i:j]
+
+    def PlayerRows(self, name : str) -> memoryview | array:
+        """Provides the rows of hands a player was dealt into."""
+        rows = self.postings[0:0]
+        if name in self.names:
+            j = self.names[name]
+            rows = self.postings[self.starts[j]:self.starts[j+1]]
+        if name in self.tail_players:
+            return array("I", rows) + self.tail_players[name]
+        return rows
+
+    def Filter(self, rank_c : str = None, pot : tuple = None, players : list[str] = None) -> list[int]:
+        """
+        Provides the ids of hands matching every given filter, in order.
+
+        Parameters
+        ----------
+            rank_c : categorical rating of the best hand shown down, by the rules of the variant
+            pot : lowest and highest pot size, inclusive
+            players : players who were all dealt into the hand
+
+        """
+        # find rows matching each filter
+        matches = []
+        if rank_c is not None:
+            matches.append(self.RankRows(*VARIANTS[self.variant].CATEGORIES[rank_c]))
+        if pot is not None:
+            matches.append(self.PotRows(*pot))
+        for name in players or []:
+            matches.append(self.PlayerRows(name))
+        if not matches:
+            return list(self.hand_ids) + list(self.tail_ids)
+        # intersect from the smallest match
+        matches.sort(key=len)
+        rows = set(matches[0])
+        for match in matches[1:]:
+            rows.intersection_update(match)
+        return [self.Id(row) for row in sorted(rows)]
+
+    def Close(self):
+        """Releases the columns and unmaps the index."""
+        for column in ("hand_ids", "offsets", "positions", "pots", "pot_order", "rank_order", "starts", "postings", "ranks"):
+            getattr(self, column).release()
+        self.view.release()
+        self.map.close()
+
+
+class HistoryTee(object):
+    """
+    A class to forward the events of a dealer to several recorders, such as a writer and live statistics.
+
+    Attributes
+    ----------
+        recorders : tuple
+            the recorders receiving each event
+
+    """
+
+    def __init__(self, *recorders):
+        """Constructs all the necessary attributes for the historytee object."""
+        self.recorders = recorders
+
+    @property
+    def hand(self):
+        """Provides the hand in progress of the first recorder."""
+        return self.recorders[0].hand
+
+    def NewHand(self, players : list, button : int):
+        """Forwards the start of a hand."""
+        for recorder in self.recorders:
+            recorder.NewHand(players, button)
+
+    def Deal(self, cards : list, t : int):
+        """Forwards the order of the deck."""
+        for recorder in self.recorders:
+            recorder.Deal(cards, t)
+
+    def Ante(self, name : str, amount : int):
+        """Forwards an ante payment."""
+        for recorder in self.recorders:
+            recorder.Ante(name, amount)
+
+    def Bet(self, name : str, amount : int, status : dict):
+        """Forwards a bet."""
+        for recorder in self.recorders:
+            recorder.Bet(name, amount, status)
+
+    def Discard(self, name : str, discards : list):
+        """Forwards discarded cards."""
+        for recorder in self.recorders:
+            recorder.Discard(name, discards)
+
+    def Showdown(self, name : str, rank_n : int, shown : bool):
+        """Forwards a hand reaching showdown."""
+        for recorder in self.recorders:
+            recorder.Showdown(name, rank_n, shown)
+
+    def Payout(self, name : str, amount : int):
+        """Forwards a reward."""
+        for recorder in self.recorders:
+            recorder.Payout(name, amount)
+
+    def EndHand(self, stacks : dict):
+        """Forwards the end of a hand."""
+        for recorder in self.recorders:
+            recorder.EndHand(stacks)
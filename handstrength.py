@@ -0,0 +1,319 @@
+import argparse
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+
+from drawtable import Canonical, CanonicalHands, Hand
+from fivecarddraw import Card, HandTracker, Policy, RandomPolicy
+from ranktables import DATA, PRIMES, Classes, Straights
+
+
+# path of the equity table, built by running this module
+EQUITY = os.path.join(DATA, "equity.bin")
+
+# file layout: magic, then the amount of canonical hands and the equity of each in the order of CanonicalHands,
+# scaled to SCALE
+MAGIC = b"FCDQ\x01"
+SCALE = 65535
+
+# amount of numerical ratings and of five card hands
+RATINGS = 7462
+HANDS = comb(52, 5)
+
+
+@lru_cache(maxsize = None)
+def ClassCards() -> tuple:
+    """
+    Provides how each numerical rating is made, from 1 for the best hand.
+
+    Returns
+    -------
+        The table of each rating, as in ranktables.Classes, and the amount of cards of each value it takes.
+
+    """
+    cards = []
+    for table, key in Classes(Straights()):
+        if table == "dupe":
+            counts = {value : 0 for value in range(13)}
+            for value, prime in enumerate(PRIMES):
+                while key % prime == 0:
+                    counts[value] += 1
+                    key //= prime
+            counts = {value : n for value, n in counts.items() if n}
+        else:
+            counts = {value : 1 for value in range(13) if key >> value & 1}
+        cards.append((table, counts))
+    return tuple(cards)
+
+
+def Completions(table : str, counts : dict, cards : list[Card]) -> int:
+    """
+    Counts the hands of a rating that contain some cards.
+
+    Parameters
+    ----------
+        table : the table of the rating, as in ranktables.Classes
+        counts : amount of cards of each value the rating takes
+        cards : cards the hands must contain, with unique values unless the rating is in the dupe table
+
+    """
+    held = {}
+    for card in cards:
+        held[card.value_i] = held.get(card.value_i, 0) + 1
+    if any(n > counts.get(value, 0) for value, n in held.items()):
+        return 0
+    if table == "dupe":
+        # the rest of each value can be any of the suits left, and hands with duplicate values can't be flushes
+        n = 1
+        for value, amount in counts.items():
+            n *= comb(4 - held.get(value, 0), amount - held.get(value, 0))
+        return n
+    # hands of five unique values are flushes when every card shares a suit
+    flushes = 4 if not cards else int(len({card.suit_i for card in cards}) == 1)
+    return flushes if table == "flush" else 4 ** (5 - len(cards)) - flushes
+
+
+@lru_cache(maxsize = None)
+def Distribution(key : int) -> tuple[array, array]:
+    """
+    Finds the ratings of every hand containing the cards of a canonical hand of up to five cards.
+
+    Hands containing up to two cards are counted from the ratings, and hands containing more are enumerated.
+
+    Parameters
+    ----------
+        key : key of the cards, as from drawtable.Canonical
+
+    Returns
+    -------
+        The distinct ratings in ascending order, and how many hands rate better than each, followed by the amount
+        of hands.
+
+    """
+    cards = Hand(key)
+    counted = {}
+    if len(cards) <= 2:
+        for rank_n, (table, counts) in enumerate(ClassCards(), 1):
+            n = Completions(table, counts, cards)
+            if n:
+                counted[rank_n] = n
+    else:
+        tracker = HandTracker()
+        deck = [card for card in (Card(value, suit) for value in range(13) for suit in range(4)) if card not in cards]
+        for others in combinations(deck, 5 - len(cards)):
+            rank_n = tracker.EvaluateHand(cards + [*others])
+            counted[rank_n] = counted.get(rank_n, 0) + 1
+    ranks = array("H", sorted(counted))
+    better = array("Q", [0])
+    for rank_n in ranks:
+        better.append(better[-1] + counted[rank_n])
+    return ranks, better
+
+
+def RankCounts() -> array:
+    """Counts the hands of each numerical rating, indexed by rating."""
+    ranks, better = Distribution(0)
+    counts = array("I", [0]) * (RATINGS + 1)
+    for i, rank_n in enumerate(ranks):
+        counts[rank_n] = better[i + 1] - better[i]
+    return counts
+
+
+@lru_cache(maxsize = None)
+def Percentiles() -> array:
+    """
+    Finds the percentile of each numerical rating across every five card hand.
+
+    The percentile of a rating is the share of hands rating worse, plus half the share rating the same, so the
+    best hand is near 100 and the worst near 0.
+
+    Returns
+    -------
+        The percentiles indexed by rating.
+
+    """
+    counts = RankCounts()
+    percentiles = array("d", [0.0]) * (RATINGS + 1)
+    worse = 0
+    for rank_n in range(RATINGS, 0, -1):
+        percentiles[rank_n] = 100 * (worse + counts[rank_n] / 2) / HANDS
+        worse += counts[rank_n]
+    return percentiles
+
+
+def SolveEquity(tracker : HandTracker, hand : list[Card]) -> float:
+    """
+    Finds the exact equity of a hand at showdown against a random hand from the rest of the deck.
+
+    Hands of the rest of the deck are counted by inclusion and exclusion, over the hands containing each subset
+    of the cards of the hand, so no pair of hands is enumerated.
+
+    Parameters
+    ----------
+        tracker : handtracker rating the hand
+        hand : hand of five cards
+
+    Returns
+    -------
+        The share of hands the hand beats, plus half the share it ties with.
+
+    """
+    rank_n = tracker.EvaluateHand(hand)
+    total = 0.0
+    for k in range(6):
+        for cards in combinations(hand, k):
+            ranks, better = Distribution(Canonical(cards)[0])
+            worse = better[-1] - better[bisect_right(ranks, rank_n)]
+            ties = better[bisect_right(ranks, rank_n)] - better[bisect_left(ranks, rank_n)]
+            total += (-1) ** k * (worse + ties / 2)
+    return total / comb(47, 5)
+
+
+def Build(path : str = EQUITY, hands : int = None):
+    """
+    Writes the equity of every canonical hand against a random hand.
+
+    Parameters
+    ----------
+        path : path of the equity table
+        hands : amount of canonical hands to solve from the first, defaulting to all of them
+
+    """
+    keys = CanonicalHands()[:hands]
+    tracker = HandTracker()
+    equities = array("H", [round(SCALE * SolveEquity(tracker, Hand(key))) for key in keys])
+    if sys.byteorder == "big":
+        equities.byteswap()
+    with open(path + ".tmp", "wb") as file:
+        file.write(MAGIC + len(keys).to_bytes(4, "little"))
+        equities.tofile(file)
+    os.replace(path + ".tmp", path)
+
+
+class HandStrength(object):
+    """
+    A class to look up how strong a hand is before the draw.
+
+    Attributes
+    ----------
+        percentiles : array
+            the percentile of each numerical rating, indexed by rating
+        equities : array
+            the equity of each canonical hand against a random hand, or None if the table hasn't been built
+        index : dict
+            the position of each canonical hand in the equity table, by key
+
+    Methods
+    -------
+        Percentile :
+            Get the percentile of a numerical rating.
+        Equity :
+            Get the equity of a hand against a random hand.
+
+    """
+
+    def __init__(self, path : str = EQUITY):
+        """
+        Loads the percentiles, and the equity table if it has been built.
+
+        Parameters
+        ----------
+            path : path of the equity table
+
+        """
+        self.percentiles = Percentiles()
+        self.equities, self.index = None, {}
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                if file.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f"{path} isn't an equity table file.")
+                n = int.from_bytes(file.read(4), "little")
+                self.equities = array("H")
+                self.equities.fromfile(file, n)
+            if sys.byteorder == "big":
+                self.equities.byteswap()
+            self.index = {key : i for i, key in enumerate(CanonicalHands()[:n])}
+
+    def Percentile(self, rank_n : int) -> float:
+        """Provides the percentile of a numerical rating across every five card hand, where five of a kind is 100."""
+        return self.percentiles[rank_n] if rank_n > 0 else 100.0
+
+    def Equity(self, hand : list[Card]) -> float:
+        """Provides the equity of a hand against a random hand, or None if the table hasn't solved it."""
+        i = self.index.get(Canonical(hand)[0])
+        if i is None:
+            return None
+        return self.equities[i] / SCALE
+
+
+class StrengthPolicy(Policy):
+    """
+    A class to bet by the percentile of a hand, deciding discards by another policy.
+
+    Hands above the raising percentile bet the pot, hands above the calling percentile call, and the rest check
+    or fold.
+
+    Attributes
+    ----------
+        tracker : HandTracker
+            the handtracker rating hands
+        strength : HandStrength
+            the percentiles looked up
+        calling : float
+            the least percentile a hand calls with
+        raising : float
+            the least percentile a hand bets the pot with
+        fallback : Policy
+            the policy deciding discards
+
+    """
+
+    def __init__(self, calling : float = 50.0, raising : float = 90.0, fallback : Policy = None, tracker : HandTracker = None):
+        """
+        Constructs all the necessary attributes for the strength policy object.
+
+        Parameters
+        ----------
+            calling : the least percentile a hand calls with
+            raising : the least percentile a hand bets the pot with
+            fallback : the policy deciding discards, defaulting to deciding at random
+            tracker : the handtracker rating hands, such as of another variant, defaulting to a standard one
+
+        """
+        self.tracker = tracker or HandTracker()
+        self.strength = HandStrength()
+        self.calling, self.raising = calling, raising
+        self.fallback = fallback or RandomPolicy()
+
+    def SelectAmount(self, name : str, info) -> int:
+        """Decides how many chips a player puts in the pot, by a lookup of the percentile of their hand."""
+        percentile = self.strength.Percentile(self.tracker.EvaluateHand(info['self']['hand']['cards']))
+        # bets beyond the stack go all-in, so the bet is always taken
+        stack = info['self']['chips']['stack']
+        if percentile >= self.raising:
+            return min(max(info['game']['pot'], info['game']['call']), stack)
+        if percentile >= self.calling:
+            return min(info['game']['call'], stack)
+        return 0
+
+    def SelectDiscards(self, name : str, info) -> list[Card]:
+        """Decides which cards a player swaps, by the fallback policy."""
+        return self.fallback.SelectDiscards(name, info)
+
+
+def Main(argv : list[str] = None) -> int:
+    """Builds the equity table from the command line."""
+    parser = argparse.ArgumentParser(description="Solve the equity of every five card hand against a random hand.")
+    parser.add_argument("--path", default=EQUITY, help="path of the equity table")
+    args = parser.parse_args(argv)
+    Build(args.path)
+    print(f"[EQUITY] Wrote equity table to {args.path}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
@@ -0,0 +1,274 @@
+import os
+from bisect import bisect_left
+from time import perf_counter
+
+
+# upper bounds of histogram buckets in seconds, doubling from a microsecond to about a second
+BOUNDS = tuple(1e-6 * 2 ** i for i in range(21))
+
+# methods timed by a profiler
+PHASES = ("NewHand", "BettingPhase", "SwitchingPhase", "EvaluationPhase")
+DEALER_METHODS = ("MoveButton", "ShuffleDeck", "TakeAnte", "DealHands", "TableView", "TakeBet", "EditHand",
+                  "Payout", "CollectCards", "Summary", "KickPlayers", "SkintPlayers", "PreflopOrder", "DealingOrder")
+DECISIONS = ("SelectAmount", "SelectDiscards")
+BATCH_DECISIONS = ("SelectAmountBatch", "SelectDiscardsBatch")
+
+
+def Label(value) -> str:
+    """Escapes a Prometheus label value, since player names can hold any characters."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram(object):
+    """
+    A class to count timings in exponentially sized buckets.
+
+    Attributes
+    ----------
+        counts : list[int]
+            the amount of timings in each bucket, with the last bucket for timings beyond every bound
+        total : float
+            the sum of every timing
+        count : int
+            the amount of timings
+
+    Methods
+    -------
+        Observe :
+            Count a timing.
+        Snapshot :
+            Get the counts as a dict.
+
+    """
+
+    def __init__(self):
+        """Constructs all the necessary attributes for the histogram object."""
+        self.counts = [0] * (len(BOUNDS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def Observe(self, seconds : float):
+        """
+        Counts a timing.
+
+        Side effects
+        ------------
+            The counts, total and count attributes are updated.
+
+        """
+        self.counts[bisect_left(BOUNDS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def Snapshot(self) -> dict:
+        """Provides the counts, with the bounds of non-empty buckets as keys."""
+        buckets = {bound : count for bound, count in zip(BOUNDS + (float("inf"),), self.counts) if count}
+        return {"count" : self.count, "total" : self.total, "buckets" : buckets}
+
+
+class TableProfiler(object):
+    """
+    A class to time the phases of a game, the dealer calls they make and each decision of the bots.
+
+    Attaching the profiler replaces the timed methods of a game, its dealer and its action tracker with timed
+    wrappers, so a game without a profiler pays nothing, and a game with one pays a clock read per call.
+
+    Attributes
+    ----------
+        table : str
+            the label of the table being profiled
+        histograms : dict
+            the histogram of each timed method, keyed by group, method and player
+        attached : list[tuple]
+            the objects and methods that have been wrapped
+
+    Methods
+    -------
+        Attach :
+            Start timing a game.
+        Detach :
+            Stop timing a game.
+        Snapshot :
+            Get every histogram as a dict.
+        Prometheus :
+            Get every histogram in the Prometheus text format.
+        WritePrometheus :
+            Write every histogram to a Prometheus text file.
+
+    """
+
+    def __init__(self, table : str = "0"):
+        """
+        Constructs all the necessary attributes for the tableprofiler object.
+
+        Parameters
+        ----------
+            table : label of the table being profiled
+
+        """
+        self.table = table
+        self.histograms = {}
+        self.attached = []
+
+    def Histogram(self, group : str, method : str, player : str = "") -> Histogram:
+        """Provides the histogram of a timed method, creating it if needed."""
+        key = (group, method, player)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        return self.histograms[key]
+
+    def Wrap(self, obj, method : str, group : str):
+        """
+        Replaces a method of an object with a wrapper timing each call.
+
+        Side effects
+        ------------
+            The object gets an attribute shadowing the method. \\n
+            The attached attribute gets an additional item.
+
+        """
+        call = getattr(obj, method)
+        observe = self.Histogram(group, method).Observe
+
+        def Timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                observe(perf_counter() - start)
+
+        setattr(obj, method, Timed)
+        self.attached.append((obj, method))
+
+    def WrapDecision(self, action, method : str):
+        """
+        Replaces a decision method of an action tracker with a wrapper timing each bot decision per player.
+
+        Side effects
+        ------------
+            The action tracker gets an attribute shadowing the method. \\n
+            The attached attribute gets an additional item.
+
+        """
+        call = getattr(action, method)
+        histograms = {}
+
+        def Timed(name, info):
+            # humans are not timed, since their latency is thinking time
+            if name not in action.beings["bots"]:
+                return call(name, info)
+            start = perf_counter()
+            try:
+                return call(name, info)
+            finally:
+                if name not in histograms:
+                    histograms[name] = self.Histogram("decision", method, name)
+                histograms[name].Observe(perf_counter() - start)
+
+        setattr(action, method, Timed)
+        self.attached.append((action, method))
+
+    def WrapBatch(self, action, method : str):
+        """
+        Replaces a batch decision method of an action tracker with a wrapper timing each batch, per player in it.
+
+        Side effects
+        ------------
+            The action tracker gets an attribute shadowing the method. \\n
+            The attached attribute gets an additional item.
+
+        """
+        call = getattr(action, method)
+        histograms = {}
+
+        def Timed(requests):
+            start = perf_counter()
+            try:
+                return call(requests)
+            finally:
+                # every bot in a batch waits for the whole batch, while humans are not timed
+                seconds = perf_counter() - start
+                for name, _ in requests:
+                    if name in action.beings["bots"]:
+                        if name not in histograms:
+                            histograms[name] = self.Histogram("decision", method, name)
+                        histograms[name].Observe(seconds)
+
+        setattr(action, method, Timed)
+        self.attached.append((action, method))
+
+    def Attach(self, game):
+        """
+        Starts timing the phases of a game, the dealer calls they make and the decisions of its bots.
+
+        Parameters
+        ----------
+            game : a PlayGame whose dealer has been configured
+
+        """
+        for method in PHASES:
+            self.Wrap(game, method, "phase")
+        for method in DEALER_METHODS:
+            self.Wrap(game.dealer, method, "dealer")
+        for method in DECISIONS:
+            self.WrapDecision(game.dealer.action, method)
+        for method in BATCH_DECISIONS:
+            self.WrapBatch(game.dealer.action, method)
+
+    def Detach(self):
+        """
+        Stops timing, restoring every wrapped method.
+
+        Side effects
+        ------------
+            The attached attribute is cleared.
+
+        """
+        for obj, method in self.attached:
+            delattr(obj, method)
+        self.attached.clear()
+
+    def Snapshot(self) -> dict:
+        """
+        Provides every histogram as a dict, keyed by group then method, and by player for decisions.
+
+        """
+        snapshot = {"table" : self.table}
+        for (group, method, player), histogram in self.histograms.items():
+            if player:
+                snapshot.setdefault(group, {}).setdefault(method, {})[player] = histogram.Snapshot()
+            else:
+                snapshot.setdefault(group, {})[method] = histogram.Snapshot()
+        return snapshot
+
+    def Prometheus(self) -> str:
+        """
+        Provides every histogram in the Prometheus text exposition format, with label values escaped.
+
+        """
+        lines = []
+        groups = sorted({group for group, _, _ in self.histograms})
+        for group in groups:
+            metric = f"fivecarddraw_{group}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for (g, method, player), histogram in sorted(self.histograms.items()):
+                if g != group:
+                    continue
+                labels = f'table="{Label(self.table)}",method="{Label(method)}"'
+                if player:
+                    labels += f',player="{Label(player)}"'
+                # buckets are cumulative
+                cumulative = 0
+                for bound, count in zip(BOUNDS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum{{{labels}}} {histogram.total:.9f}")
+                lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def WritePrometheus(self, path : str):
+        """Writes every histogram to a Prometheus text file, replacing it atomically for collectors."""
+        with open(path + ".tmp", "w") as file:
+            file.write(self.Prometheus())
+        os.replace(path + ".tmp", path)
@@ -0,0 +1,385 @@
+import argparse
+import random
+import sys
+from math import log, sqrt
+from time import perf_counter
+
+from drawtable import TypicalDiscards
+from fivecarddraw import Card, Dealer, HandTracker, HeadlessTable, Policy
+from handstrength import StrengthPolicy
+
+
+# iterations searched for each decision when no budget is given
+ITERATIONS = 200
+# exploration constant of the upper confidence bound, for rewards scaled to the chips of the richest player
+EXPLORATION = 1.4
+# most nodes kept between decisions before the tree is cleared
+MAX_NODES = 200000
+
+
+class TypicalPolicy(Policy):
+    """A class to swap cards as typical opponents do in drawtable, checking or folding every bet."""
+
+    def __init__(self, tracker : HandTracker = None):
+        """Constructs the handtracker rating hands, defaulting to a standard one."""
+        self.tracker = tracker or HandTracker()
+
+    def SelectAmount(self, name : str, info) -> int:
+        """Checks, or folds to a bet."""
+        return 0
+
+    def SelectDiscards(self, name : str, info) -> list[Card]:
+        """Decides which cards a player swaps, keeping made hands, pairs and draws to a flush."""
+        return TypicalDiscards(self.tracker, info['self']['hand']['cards'])
+
+
+class Simulation(object):
+    """
+    A class to play out the rest of a hand on a clone of a dealer, one decision at a time, as PlayGame does.
+
+    Attributes
+    ----------
+        dealer : Dealer
+            the clone being played on
+        phase : str
+            the phase being played, one of "preflop", "draw", "postflop" or "payout"
+        order : list[str]
+            the order players act in during the phase
+        index : int
+            the position in the order of the last player to act, or None at the start of the phase
+
+    Methods
+    -------
+        Next :
+            Get the next player to decide and the kind of decision.
+        Actions :
+            Get the choices of the player deciding.
+        Apply :
+            Act on a decision.
+        Rewards :
+            Pay out the hand and get the chips won by each player.
+
+    """
+
+    def __init__(self, dealer : Dealer, phase : str, name : str = None):
+        """
+        Constructs all the necessary attributes for the simulation object.
+
+        Parameters
+        ----------
+            dealer : the clone to play on
+            phase : the phase being played
+            name : the player deciding now, defaulting to the start of the phase
+
+        """
+        self.dealer = dealer
+        self.Enter(phase)
+        if name is not None and phase != "draw":
+            self.index = self.order.index(name) - 1
+
+    def Enter(self, phase : str):
+        """Starts a phase, in the order its players act."""
+        self.phase, self.index = phase, None
+        self.order = {"preflop" : self.dealer.PreflopOrder, "draw" : self.dealer.DealingOrder,
+                      "postflop" : self.dealer.DealingOrder, "payout" : list}[phase]()
+
+    def Next(self) -> tuple[str, str]:
+        """
+        Finds the next player to decide, moving through the phases of PlayGame.
+
+        Returns
+        -------
+            The name of the player and the kind of decision, "amount" or "discards", or None when the hand is over.
+
+        """
+        action = self.dealer.action
+        while self.phase != "payout":
+            if self.phase == "draw":
+                # players draw once each in dealing order, unless at most one player is left in the hand
+                if len(action.ShowdownPlayers(self.order)) >= 2:
+                    for name in self.order:
+                        if not action.players[name]["has_folded"] and name not in self.dealer.drawn:
+                            return name, "discards"
+                self.Enter("postflop")
+                continue
+            # betting goes around the order until every player has acted, unless fewer than two can act
+            if self.index is None:
+                if len(action.ActingPlayers(self.order)) < 2:
+                    self.Enter("draw" if self.phase == "preflop" else "payout")
+                    continue
+                self.index = -1
+            for step in range(1, len(self.order) + 1):
+                i = (self.index + step) % len(self.order)
+                if not action.PlayerHasActed(self.order[i]):
+                    self.index = i
+                    return self.order[i], "amount"
+            action.ExtendRound()
+            self.Enter("draw" if self.phase == "preflop" else "payout")
+        return None
+
+    def Actions(self, name : str, kind : str) -> list:
+        """
+        Provides the choices of a player, abstracting bets to checking or folding, calling, betting the pot and
+        going all-in, and discards to the legal masks of positions in their hand.
+
+        """
+        if kind == "discards":
+            hand = self.dealer.cards.Hand(name)
+            return [mask for mask in range(32) if self.dealer.cards.AllowDiscards(hand, [hand[i] for i in range(5) if mask >> i & 1])]
+        chips = self.dealer.chips
+        stack, call = chips.Stack(name), chips.CallAmount(name)
+        amounts = {0, min(call, stack), min(call + chips.PotAmount(), stack), stack}
+        return sorted(amounts)
+
+    def Apply(self, name : str, kind : str, action):
+        """Acts on a decision, given as an amount or a mask of positions in the hand of the player."""
+        if kind == "discards":
+            hand = self.dealer.cards.Hand(name)
+            self.dealer.EditHand(name, [hand[i] for i in range(5) if action >> i & 1])
+        elif not self.dealer.TakeBet(name, action):
+            # bets that can't be taken check or fold, as a policy would be asked again until it found one
+            self.dealer.TakeBet(name, 0)
+
+    def Rewards(self) -> dict:
+        """Pays out the hand and provides the chips each player has after it."""
+        self.dealer.Payout()
+        chips = self.dealer.chips
+        return {name : chips.Stack(name) + chips.Contribution(name) for name in chips.players}
+
+
+class MCTSPolicy(Policy):
+    """
+    A class to decide by Monte Carlo tree search over futures of the table, played out on clones of the dealer.
+
+    Each iteration clones the dealer, deals the cards the player can't see at random from the cards they haven't
+    seen, then plays the hand out, choosing by the upper confidence bound at nodes of the tree and by a cheap
+    policy beyond it. Nodes are keyed by what the searching player can see, so the tree of one decision is reused
+    by the next decision of the hand it reaches.
+
+    Attributes
+    ----------
+        dealer : Dealer
+            the dealer of the table being played
+        iterations : int
+            iterations searched for each decision, or None to search until the time budget runs out
+        seconds : float
+            seconds searched for each decision, or None to search for the iteration budget
+        exploration : float
+            exploration constant of the upper confidence bound
+        rollout : Policy
+            the policy playing out the hand beyond the tree, and deciding the draws of other players
+        rng : Random
+            random number generator of the deals and exploration
+        nodes : dict
+            visits and rewards of each action of each node, keyed by what the searching player sees
+        discarded : dict
+            the cards each searching player discarded this hand, which they know are in the muck
+        searched : int
+            the amount of iterations searched
+        seconds_searched : float
+            seconds spent searching
+
+    Methods
+    -------
+        Search :
+            Search a decision and get the most visited choice.
+        Rate :
+            Get the iterations searched per second.
+
+    """
+
+    def __init__(self, dealer : Dealer, iterations : int = None, seconds : float = None, exploration : float = EXPLORATION,
+                 rollout : Policy = None, seed : int = None, max_nodes : int = MAX_NODES):
+        """
+        Constructs all the necessary attributes for the MCTS policy object.
+
+        Parameters
+        ----------
+            dealer : the dealer of the table being played
+            iterations : iterations searched for each decision, defaulting to ITERATIONS without a time budget
+            seconds : seconds searched for each decision
+            exploration : exploration constant of the upper confidence bound
+            rollout : the policy playing out hands beyond the tree, defaulting to betting by hand strength and drawing
+                typically, rating hands by the variant of the dealer
+            seed : seed of the deals and exploration
+            max_nodes : most nodes kept between decisions before the tree is cleared
+
+        """
+        self.dealer = dealer
+        self.iterations = ITERATIONS if iterations is None and seconds is None else iterations
+        self.seconds = seconds
+        self.exploration = exploration
+        self.rollout = rollout or StrengthPolicy(fallback = TypicalPolicy(dealer.cards), tracker = dealer.cards)
+        self.rng = random.Random(seed)
+        self.max_nodes = max_nodes
+        self.nodes = {}
+        self.discarded = {}
+        self.searched, self.seconds_searched = 0, 0.0
+
+    def SelectAmount(self, name : str, info) -> int:
+        """Decides how many chips a player puts in the pot, by searching the betting round and what follows."""
+        if not self.dealer.drawn:
+            self.discarded.pop(name, None)
+        return self.Search(name, "postflop" if self.dealer.drawn else "preflop")
+
+    def SelectDiscards(self, name : str, info) -> list[Card]:
+        """Decides which cards a player swaps, by searching the draw and what follows."""
+        hand = self.dealer.cards.Hand(name)
+        mask = self.Search(name, "draw")
+        self.discarded[name] = {hand[i] for i in range(5) if mask >> i & 1}
+        return [hand[i] for i in range(5) if mask >> i & 1]
+
+    def Search(self, name : str, phase : str):
+        """
+        Searches a decision of a player within the budget.
+
+        Parameters
+        ----------
+            name : the player deciding
+            phase : the phase being played
+
+        Returns
+        -------
+            The most visited choice, as an amount or a mask of positions in the hand of the player.
+
+        """
+        if len(self.nodes) > self.max_nodes:
+            self.nodes.clear()
+        start = perf_counter()
+        root = Simulation(self.dealer, phase, name)
+        root.Next()
+        key = self.Key(root, name, name)
+        iterations = 0
+        while True:
+            self.Iterate(name, phase)
+            iterations += 1
+            if self.iterations is not None and iterations >= self.iterations:
+                break
+            if self.seconds is not None and perf_counter() - start >= self.seconds:
+                break
+        self.searched += iterations
+        self.seconds_searched += perf_counter() - start
+        node = self.nodes[key]
+        return max(node["actions"], key = lambda action : node["actions"][action][0])
+
+    def Determinise(self, dealer : Dealer, name : str):
+        """
+        Deals the cards a player can't see at random, from the cards they haven't seen.
+
+        The hands of other players, the cards left in the deck and the cards others have mucked are dealt again,
+        keeping how many cards each holds.
+
+        """
+        cards = dealer.cards
+        deck = cards.DECK
+        known = self.discarded.get(name, set())
+        # folded hands are already in the muck
+        hands = [other for other in cards.players if other != name and cards.Hand(other)]
+        unseen = [card for other in hands for card in cards.Hand(other)] + deck.RemainingCards()
+        mucked = [card for card in deck.muck if card not in known]
+        unseen += mucked
+        self.rng.shuffle(unseen)
+        t = 0
+        for other in hands:
+            n = len(cards.Hand(other))
+            cards.players[other]["cards"] = unseen[t : t + n]
+            cards.dirty.add(other)
+            t += n
+        deck.muck = unseen[t : t + len(mucked)] + [card for card in deck.muck if card in known]
+        t += len(mucked)
+        # keep the deck a permutation, with cards in hands and the muck departed
+        departed = [card for player in cards.players.values() for card in player["cards"]] + deck.muck
+        deck.state, deck.t = departed + unseen[t:], len(departed)
+
+    def Key(self, simulation : Simulation, name : str, searcher : str) -> tuple:
+        """Keys a node by what the searching player sees when a player is deciding."""
+        dealer = simulation.dealer
+        public = tuple((dealer.chips.players[other]["stack"], dealer.chips.players[other]["contribution"],
+                        tuple(dealer.action.players[other].values()), other in dealer.drawn) for other in dealer.seats.players)
+        return (searcher, name, simulation.phase, simulation.index, public, tuple(map(int, dealer.cards.Hand(searcher))))
+
+    def Iterate(self, searcher : str, phase : str):
+        """Searches one future of the table, from the decision of the searching player."""
+        dealer = self.dealer.Clone()
+        self.Determinise(dealer, searcher)
+        simulation = Simulation(dealer, phase, searcher)
+        scale = max(chips["stack"] + chips["contribution"] for chips in dealer.chips.players.values())
+        before = {name : chips["stack"] + chips["contribution"] for name, chips in dealer.chips.players.items()}
+        path, expanded = [], False
+        while (decision := simulation.Next()):
+            name, kind = decision
+            # other players draw by the rollout policy, since their choices depend on cards the searcher can't see
+            if expanded or (kind == "discards" and name != searcher):
+                self.Rollout(simulation, name, kind)
+                continue
+            key = self.Key(simulation, name, searcher)
+            node = self.nodes.get(key)
+            if node is None:
+                node = self.nodes[key] = {"visits" : 0, "actions" : {action : [0, 0.0] for action in simulation.Actions(name, kind)}}
+                expanded = True
+            action = self.Select(node)
+            path.append((node, action, name))
+            simulation.Apply(name, kind, action)
+        after = simulation.Rewards()
+        # each player is credited with what they won, so opponents choose in their own interest
+        for node, action, name in path:
+            node["visits"] += 1
+            stats = node["actions"][action]
+            stats[0] += 1
+            stats[1] += (after[name] - before[name]) / scale
+
+    def Select(self, node : dict):
+        """Chooses an untried action at random, otherwise the action with the best upper confidence bound."""
+        actions = node["actions"]
+        untried = [action for action, (visits, _) in actions.items() if not visits]
+        if untried:
+            return self.rng.choice(untried)
+        bound = self.exploration * sqrt(log(node["visits"]))
+        return max(actions, key = lambda action : actions[action][1] / actions[action][0] + bound / sqrt(actions[action][0]))
+
+    def Rollout(self, simulation : Simulation, name : str, kind : str):
+        """Acts for a player by the rollout policy."""
+        info = simulation.dealer.TableView(name)
+        if kind == "discards":
+            hand = simulation.dealer.cards.Hand(name)
+            discards = self.rollout.SelectDiscards(name, info)
+            simulation.Apply(name, kind, sum(1 << i for i, card in enumerate(hand) if card in discards))
+        else:
+            simulation.Apply(name, kind, self.rollout.SelectAmount(name, info))
+
+    def Rate(self) -> float:
+        """Provides the iterations searched per second."""
+        return self.searched / self.seconds_searched if self.seconds_searched else 0.0
+
+
+def Main(argv : list[str] = None) -> int:
+    """Plays hands with a searching bot from the command line and reports how fast it searches."""
+    parser = argparse.ArgumentParser(description="Play hands of fivecarddraw with a Monte Carlo tree search bot.")
+    parser.add_argument("--seats", type=int, default=6, help="bots at the table, one of which searches")
+    parser.add_argument("--hands", type=int, default=5, help="hands to play")
+    parser.add_argument("--iterations", type=int, default=None, help="iterations searched for each decision")
+    parser.add_argument("--seconds", type=float, default=None, help="seconds searched for each decision")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the search")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    table = HeadlessTable(args.seats)
+    policy = MCTSPolicy(table.dealer, args.iterations, args.seconds, seed = args.seed)
+    table.dealer.SetPolicy("Bot 0", policy)
+    for _ in range(args.hands):
+        table.PlayHand()
+    # time cloning at the start of a hand, as the search clones once per iteration
+    table.dealer.StartingChips(table.CHIPS)
+    table.dealer.TakeAnte()
+    table.dealer.DealHands()
+    start = perf_counter()
+    for _ in range(1000):
+        table.dealer.Clone()
+    clone = (perf_counter() - start) / 1000
+    print(f"[MCTS] Searched {policy.searched} iterations in {policy.seconds_searched:.2f} s, {policy.Rate():.0f} iterations per second.")
+    print(f"[MCTS] Cloning a dealer of {args.seats} seats takes {clone * 1e6:.0f} us, and {len(policy.nodes)} nodes are kept.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
@@ -0,0 +1,239 @@
+import json
+import os
+import sys
+from array import array
+from multiprocessing import Pool
+
+from handhistory import ANTE, BET, DISCARD, FOLDED, PAYOUT, RAISED, SHOWDOWN
+from handhistory import BetFlags, HandRecord, HistoryFiles, HistoryReader
+
+
+# counter positions
+HANDS, VPIP, RAISES, CALLS, CHECKS, FOLDS, SHOWDOWNS, WINS, DRAWS, DRAWN, NET = range(11)
+COUNTERS = ("hands", "vpip", "raises", "calls", "checks", "folds", "showdowns", "wins", "draws", "drawn", "net")
+
+
+class PlayerStats(object):
+    """
+    A class to aggregate player statistics over hands in a single pass.
+
+    Memory is bounded by the amount of players, since each player only has a fixed set of counters. Hands
+    can be consumed from hand histories, or live by attaching the aggregator to a dealer with
+    Dealer.RecordHistory, and aggregators from different workers can be merged.
+
+    Attributes
+    ----------
+        players : dict
+            the counters of each player
+        sources : set
+            the paths of hand histories aggregated in full
+        hand : list
+            the events of the hand in progress when consuming live
+        header : tuple
+            the button and players of the hand in progress when consuming live
+
+    Methods
+    -------
+        Update :
+            Aggregate a recorded hand.
+        Merge :
+            Aggregate the counters of another aggregator.
+        Summary :
+            Get the statistics of each player.
+        Save :
+            Checkpoint the counters to file.
+        Load :
+            Restore the counters from a checkpoint.
+
+    """
+
+    def __init__(self):
+        """Constructs all the necessary attributes for the playerstats object."""
+        self.players = {}
+        self.sources = set()
+        self.hand = None
+        self.header = None
+
+    def Counters(self, name : str) -> array:
+        """Provides the counters of a player, tracking them if needed."""
+        if name not in self.players:
+            self.players[name] = array("q", bytes(8 * len(COUNTERS)))
+        return self.players[name]
+
+    def Update(self, hand : HandRecord):
+        """
+        Aggregates a recorded hand.
+
+        Parameters
+        ----------
+            hand : recorded hand
+
+        Side effects
+        ------------
+            The players attribute has some values updated.
+
+        """
+        counters = {name : self.Counters(name) for name, _, _ in hand.players}
+        drawn, voluntary, ranks = False, set(), {}
+        for event in hand.events:
+            code = event[0]
+            if code == BET:
+                _, name, amount, flags = event
+                c = counters[name]
+                # classify bets as in ChipTracker.BetDetails
+                if flags & RAISED:
+                    c[RAISES] += 1
+                elif flags & FOLDED:
+                    c[FOLDS] += 1
+                elif amount:
+                    c[CALLS] += 1
+                else:
+                    c[CHECKS] += 1
+                # chips put in before the draw are voluntary, unlike antes
+                if amount and not drawn:
+                    voluntary.add(name)
+            elif code == DISCARD:
+                drawn = True
+                c = counters[event[1]]
+                c[DRAWS] += 1
+                c[DRAWN] += len(event[2])
+            elif code == SHOWDOWN:
+                ranks[event[1]] = event[2]
+        # players with the best rank at showdown win it
+        best = min(ranks.values(), default=None)
+        for name, rank_n in ranks.items():
+            counters[name][SHOWDOWNS] += 1
+            counters[name][WINS] += rank_n == best
+        for name, _, stack in hand.players:
+            c = counters[name]
+            c[HANDS] += 1
+            c[VPIP] += name in voluntary
+            c[NET] += hand.stacks.get(name, 0) - stack
+
+    def Merge(self, other : "PlayerStats"):
+        """
+        Aggregates the counters of another aggregator, such as one from a worker process.
+
+        Side effects
+        ------------
+            The players and sources attributes have some values updated.
+
+        """
+        for name, counters in other.players.items():
+            mine = self.Counters(name)
+            for i, count in enumerate(counters):
+                mine[i] += count
+        self.sources.update(other.sources)
+
+    def Summary(self) -> dict:
+        """
+        Provides the statistics of each player.
+
+        """
+        summary = {}
+        for name, c in self.players.items():
+            actions = c[RAISES] + c[CALLS] + c[FOLDS]
+            summary[name] = {
+                "hands" : c[HANDS],
+                "vpip" : c[VPIP] / c[HANDS] if c[HANDS] else 0.0,
+                "aggression" : c[RAISES] / actions if actions else 0.0,
+                "showdown_win_rate" : c[WINS] / c[SHOWDOWNS] if c[SHOWDOWNS] else 0.0,
+                "cards_drawn" : c[DRAWN] / c[DRAWS] if c[DRAWS] else 0.0,
+                "chips_per_100" : 100 * c[NET] / c[HANDS] if c[HANDS] else 0.0}
+        return summary
+
+    def Save(self, path : str):
+        """Checkpoints the counters to file, replacing any previous checkpoint."""
+        players = {name : dict(zip(COUNTERS, counters)) for name, counters in self.players.items()}
+        with open(path + ".tmp", "w") as file:
+            json.dump({"players" : players, "sources" : sorted(self.sources)}, file)
+        os.replace(path + ".tmp", path)
+
+    def Load(self, path : str):
+        """
+        Restores the counters from a checkpoint, replacing any counters.
+
+        Side effects
+        ------------
+            The players and sources attributes are replaced.
+
+        """
+        with open(path, "r") as file:
+            checkpoint = json.load(file)
+        self.players = {name : array("q", [counters[key] for key in COUNTERS]) for name, counters in checkpoint["players"].items()}
+        self.sources = set(checkpoint["sources"])
+
+    def NewHand(self, players : list, button : int):
+        """Begins consuming a hand live."""
+        self.header, self.hand = (button, players), []
+
+    def Deal(self, cards : list, t : int):
+        """Ignores the order of the deck live, since it doesn't affect statistics."""
+
+    def Ante(self, name : str, amount : int):
+        """Consumes an ante payment live."""
+        self.hand.append((ANTE, name, amount))
+
+    def Bet(self, name : str, amount : int, status : dict):
+        """Consumes a bet live."""
+        self.hand.append((BET, name, amount, BetFlags(status)))
+
+    def Discard(self, name : str, discards : list):
+        """Consumes discarded cards live."""
+        self.hand.append((DISCARD, name, discards))
+
+    def Showdown(self, name : str, rank_n : int, shown : bool):
+        """Consumes a hand reaching showdown live."""
+        self.hand.append((SHOWDOWN, name, rank_n, shown))
+
+    def Payout(self, name : str, amount : int):
+        """Consumes a reward live."""
+        self.hand.append((PAYOUT, name, amount))
+
+    def EndHand(self, stacks : dict):
+        """Finishes consuming a hand live and aggregates it."""
+        button, players = self.header
+        self.Update(HandRecord(None, button, players, self.hand, stacks))
+        self.hand, self.header = None, None
+
+
+def AggregateFile(path : str) -> PlayerStats:
+    """Aggregates every hand in a hand history."""
+    stats = PlayerStats()
+    for hand in HistoryReader(path):
+        stats.Update(hand)
+    stats.sources.add(path)
+    return stats
+
+
+def AggregateFiles(paths : list[str], processes : int = None, checkpoint : str = None) -> PlayerStats:
+    """
+    Aggregates hand histories in parallel, one file per task, merging the results as they finish.
+
+    Parameters
+    ----------
+        paths : paths of hand histories
+        processes : amount of worker processes, defaults to the amount of cores
+        checkpoint : path to checkpoint the merged counters to after each file, and to resume from
+
+    """
+    stats = PlayerStats()
+    # resume from checkpoint, skipping files already aggregated
+    if checkpoint and os.path.exists(checkpoint):
+        stats.Load(checkpoint)
+    paths = [path for path in paths if path not in stats.sources]
+    if not paths:
+        return stats
+    with Pool(processes) as pool:
+        for partial in pool.imap_unordered(AggregateFile, paths):
+            stats.Merge(partial)
+            if checkpoint:
+                stats.Save(checkpoint)
+    return stats
+
+
+if __name__ == "__main__":
+    # aggregate hand histories and any files they were rotated into
+    paths = [path for arg in sys.argv[1:] for path in HistoryFiles(arg)]
+    for name, summary in AggregateFiles(paths).Summary().items():
+        print(f"[STATS] {name}: " + ", ".join(f"{key} {value:.3f}" if isinstance(value, float) else f"{key} {value}" for key, value in summary.items()))
@@ -0,0 +1,298 @@
+import argparse
+import mmap
+import multiprocessing
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from functools import lru_cache
+from itertools import combinations
+from math import comb, factorial
+from operator import add, mul, sub
+from struct import Struct
+
+from drawtable import Align, Canonical, CanonicalHands, Hand
+from fivecarddraw import HandTracker
+from handstrength import RATINGS, Distribution, RankCounts
+from ranges import Classes
+from ranktables import DATA
+
+
+# path of the equity matrix, built by running this module
+MATRIX = os.path.join(DATA, "rangeequity.bin")
+
+# file layout: magic and the amount of classes, then a byte per class marking its row solved, then a row per class
+# of how likely its hands are to be dealt alongside hands of each class, followed by how likely they are to be
+# dealt alongside and beat them, counting ties as half, each scaled to SCALE so the matrix takes 16 bits an entry
+MAGIC = b"FCDE\x01"
+HEADER = Struct("<I")
+SCALE = 65535
+# hands an opponent can hold alongside a hand
+OPPONENT_HANDS = comb(47, 5)
+
+
+def Multiplicity(key : int) -> int:
+    """Counts the hands a canonical hand stands for, which are its relabellings of suits."""
+    masks = Counter(key >> 13 * suit & 0x1FFF for suit in range(4))
+    relabellings = 24
+    for n in masks.values():
+        relabellings //= factorial(n)
+    return relabellings
+
+
+@lru_cache(maxsize = None)
+def Bounds() -> list[tuple[int, int]]:
+    """Provides the best and worst numerical rating of each class."""
+    classes, labels = Classes()
+    bounds = [[RATINGS, 1] for _ in labels]
+    for rank_n in range(1, RATINGS + 1):
+        low, high = bounds[classes[rank_n]]
+        bounds[classes[rank_n]] = [min(low, rank_n), max(high, rank_n)]
+    return [(low, high) for low, high in bounds]
+
+
+@lru_cache(maxsize = None)
+def Sizes() -> array:
+    """Counts the five card hands of each class."""
+    classes, labels = Classes()
+    sizes = array("Q", [0]) * len(labels)
+    for rank_n, n in enumerate(RankCounts()):
+        if rank_n:
+            sizes[classes[rank_n]] += n
+    return sizes
+
+
+@lru_cache(maxsize = None)
+def ClassCounts(key : int) -> array:
+    """Counts the hands of each class that contain the cards of a canonical hand of up to four cards."""
+    ranks, better = Distribution(key)
+    return array("q", [better[bisect_right(ranks, high)] - better[bisect_left(ranks, low)] for low, high in Bounds()])
+
+
+def ClassHands() -> list[list[int]]:
+    """Groups the keys of the canonical hands by the class of their rating."""
+    tracker, classes = HandTracker(), Classes()[0]
+    hands = [[] for _ in Bounds()]
+    for key in CanonicalHands():
+        hands[classes[tracker.EvaluateHand(Hand(key))]].append(key)
+    return hands
+
+
+def SolveRow(task : tuple) -> tuple[int, bytes]:
+    """
+    Finds how likely the hands of a class are to be dealt alongside, and to beat, the hands of each class.
+
+    The hands an opponent can hold alongside a hand are counted by inclusion and exclusion, over the hands of each
+    class containing each subset of its cards, so cards a hand blocks are never counted and no pair of hands is
+    enumerated.
+
+    Parameters
+    ----------
+        task : the class, and the keys of its canonical hands
+
+    Returns
+    -------
+        The class, and its row of the matrix.
+
+    """
+    a, keys = task
+    tracker, bounds, sizes = HandTracker(), Bounds(), Sizes()
+    n = len(bounds)
+    pairs, wins = [0] * n, [0.0] * n
+    for key in keys:
+        hand = Hand(key)
+        rank_n, weight = tracker.EvaluateHand(hand), Multiplicity(key)
+        counts, worse, ties = array("q", [0]) * n, 0, 0
+        # the hand itself is the only hand holding all its cards, so subsets of up to four cards are looked up
+        for k in range(5):
+            for cards in combinations(hand, k):
+                subset = Canonical(cards)[0]
+                counts = array("q", map(sub if k % 2 else add, counts, ClassCounts(subset)))
+                # hands of its own class are split into those the hand beats and those it ties with
+                ranks, better = Distribution(subset)
+                below = better[bisect_right(ranks, rank_n)]
+                share = (better[bisect_right(ranks, bounds[a][1])] - below, below - better[bisect_left(ranks, rank_n)])
+                worse, ties = (worse - share[0], ties - share[1]) if k % 2 else (worse + share[0], ties + share[1])
+        counts[a], ties = counts[a] - 1, ties - 1
+        for b in range(n):
+            pairs[b] += weight * counts[b]
+            wins[b] += weight * (counts[b] if b > a else worse + ties / 2 if b == a else 0)
+    row = array("H", [round(SCALE * pair / (sizes[a] * sizes[b])) for b, pair in enumerate(pairs)])
+    row += array("H", [round(SCALE * win / (sizes[a] * sizes[b])) for b, win in enumerate(wins)])
+    if sys.byteorder == "big":
+        row.byteswap()
+    return a, row.tobytes()
+
+
+def Layout(classes : int) -> dict:
+    """Provides the offset of each section of an equity matrix, and its total size."""
+    offsets = {"done" : len(MAGIC) + HEADER.size}
+    offsets["rows"] = Align(offsets["done"] + classes)
+    offsets["size"] = offsets["rows"] + 4 * classes * classes
+    return offsets
+
+
+def Build(path : str = MATRIX, classes : list[int] = None, processes : int = None) -> int:
+    """
+    Solves the equity matrix row by row across processes, resuming the matrix at path if it was interrupted.
+
+    Parameters
+    ----------
+        path : path of the equity matrix
+        classes : classes whose rows are solved, defaulting to all of them
+        processes : amount of processes to solve rows in, defaulting to one per core
+
+    Returns
+    -------
+        The amount of rows left to solve.
+
+    """
+    n = len(Bounds())
+    layout = Layout(n)
+    if not os.path.exists(path):
+        with open(path + ".tmp", "wb") as file:
+            file.write(MAGIC + HEADER.pack(n))
+            file.truncate(layout["size"])
+        os.replace(path + ".tmp", path)
+
+    with open(path, "r+b") as file, mmap.mmap(file.fileno(), 0) as matrix:
+        if matrix[: len(MAGIC)] != MAGIC or HEADER.unpack_from(matrix, len(MAGIC))[0] != n:
+            raise ValueError(f"{path} isn't an equity matrix of {n} classes.")
+        done = matrix[layout["done"] : layout["done"] + n]
+        rows = [a for a in (range(n) if classes is None else classes) if not done[a]]
+        hands = ClassHands() if rows else []
+        tasks = [(a, hands[a]) for a in rows]
+
+        def Save(a, row):
+            # write the row before marking it solved, so a row is never marked with missing results
+            matrix[layout["rows"] + len(row) * a : layout["rows"] + len(row) * (a + 1)] = row
+            matrix.flush()
+            matrix[layout["done"] + a] = 1
+            matrix.flush()
+
+        if processes == 1:
+            for task in tasks:
+                Save(*SolveRow(task))
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                for result in pool.imap_unordered(SolveRow, tasks):
+                    Save(*result)
+        return n - sum(matrix[layout["done"] : layout["done"] + n])
+
+
+class RangeEquity(object):
+    """
+    A class to find the equity of ranges against ranges after the draw, from a memory-mapped equity matrix.
+
+    Ranges are probability vectors over the classes of ranges.Classes. The equity of a range against another is
+    the share of pairs of hands the first beats, counting ties as half, among the pairs of hands that can be dealt
+    together, so it takes two matrix-vector products.
+
+    Attributes
+    ----------
+        table : mmap
+            the memory-mapped equity matrix
+        classes : int
+            amount of classes
+        done : bytes
+            whether each row has been solved
+        pairs : memoryview
+            how likely hands of each pair of classes are to be dealt together, scaled to SCALE
+        wins : memoryview
+            how likely hands of each pair of classes are to be dealt together with the first winning, scaled to SCALE
+
+    Methods
+    -------
+        Equity :
+            Get the equity of a class against a class.
+        Versus :
+            Get the equity of a range against a range.
+        Close :
+            Unmap the matrix.
+
+    """
+
+    def __init__(self, path : str = MATRIX):
+        """
+        Maps an equity matrix built by Build.
+
+        Parameters
+        ----------
+            path : path of the equity matrix
+
+        """
+        with open(path, "rb") as file:
+            self.table = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+        if self.table[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} isn't an equity matrix file.")
+        self.classes = HEADER.unpack_from(self.table, len(MAGIC))[0]
+        layout = Layout(self.classes)
+        self.done = self.table[layout["done"] : layout["done"] + self.classes]
+        if sys.byteorder == "big":
+            entries = array("H", self.table[layout["rows"] : layout["size"]])
+            entries.byteswap()
+            entries = memoryview(entries)
+        else:
+            entries = memoryview(self.table)[layout["rows"] : layout["size"]].cast("H")
+        self.rows = [entries[2 * self.classes * a : 2 * self.classes * (a + 1)] for a in range(self.classes)]
+        self.pairs = [row[: self.classes] for row in self.rows]
+        self.wins = [row[self.classes :] for row in self.rows]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.Close()
+
+    def Equity(self, a : int, b : int) -> float:
+        """Provides the equity of hands of a class against hands of a class, or None if they can't be dealt together or its row hasn't been solved."""
+        if not self.done[a] or not self.pairs[a][b]:
+            return None
+        return self.wins[a][b] / self.pairs[a][b]
+
+    def Versus(self, hero : list[float], villain : list[float]) -> float:
+        """
+        Finds the equity of a range against a range.
+
+        Parameters
+        ----------
+            hero : probability of each class of the range whose equity is found
+            villain : probability of each class of the range it is against
+
+        Returns
+        -------
+            The equity, or None if the hero's range holds a class whose row hasn't been solved, or the ranges can't
+            be dealt together.
+
+        """
+        if any(p and not self.done[a] for a, p in enumerate(hero)):
+            return None
+        pairs = wins = 0.0
+        for a, p in enumerate(hero):
+            if p:
+                pairs += p * sum(map(mul, self.pairs[a], villain))
+                wins += p * sum(map(mul, self.wins[a], villain))
+        return wins / pairs if pairs else None
+
+    def Close(self):
+        # release views of the map before unmapping it
+        for view in self.pairs + self.wins + self.rows:
+            view.release()
+        self.pairs, self.wins, self.rows = [], [], []
+        self.table.close()
+
+
+def Main(argv : list[str] = None) -> int:
+    """Builds the equity matrix from the command line, resuming it if it was interrupted."""
+    parser = argparse.ArgumentParser(description="Solve the equity of every class of hands against every other after the draw.")
+    parser.add_argument("--path", default=MATRIX, help="path of the equity matrix")
+    parser.add_argument("--processes", type=int, default=None, help="processes to solve rows in, defaulting to one per core")
+    args = parser.parse_args(argv)
+    left = Build(args.path, processes=args.processes)
+    print(f"[MATRIX] Wrote equity matrix to {args.path}, with {left} rows left to solve.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
@@ -0,0 +1,210 @@
+from array import array
+from functools import lru_cache
+from math import exp
+from operator import mul
+
+from fivecarddraw import CATEGORIES, Card
+from handstrength import HANDS, RATINGS, ClassCards, Percentiles, RankCounts
+
+
+# amounts of cards a player can draw
+DRAWS = range(6)
+# share of draws and bets made against the typical play modelled, so no observation rules a class out entirely
+EPSILON = 0.02
+# percentiles at which half of hands bet or raise and half of hands call, and how sharply play changes around them,
+# which is flatter after the draw since a hand's class before the draw only hints at how strong it ends up
+RAISING = 75.0
+CALLING = 40.0
+SLOPES = {"preflop" : 0.12, "postflop" : 0.06}
+# share of hands of five unique values and more than one suit that hold four cards of a suit
+FOUR_FLUSHES = 60 / 1020
+
+
+@lru_cache(maxsize = None)
+def Classes() -> tuple[array, list[str]]:
+    """
+    Groups the numerical ratings into classes of hands before the draw, by category and their most telling value.
+
+    Straights and straight flushes are grouped by their highest card, hands of duplicate values by the value
+    they hold most of, and flushes and high cards by their highest card, so every class is a run of ratings.
+
+    Returns
+    -------
+        The class of each rating indexed by rating, from 0 for the best class, and a label for each class.
+
+    """
+    values = Card(0, 0).VALUES
+    classes, labels, last = array("H", [0]) * (RATINGS + 1), [], None
+    for category, (low, high) in CATEGORIES.items():
+        for rank_n in range(max(low, 1), high + 1):
+            table, counts = ClassCards()[rank_n - 1]
+            if category in ("royal flush", "straight flush"):
+                value = 13 - rank_n
+            elif category == "straight":
+                value = 12 - (rank_n - low)
+            elif table == "dupe":
+                value = max(counts, key = lambda value : (counts[value], value))
+            else:
+                value = max(counts)
+            if (category, value) != last:
+                labels.append(f"{category}, {values[value]}")
+                last = (category, value)
+            classes[rank_n] = len(labels) - 1
+    return classes, labels
+
+
+def Class(rank_n : int) -> int:
+    """Provides the class of a numerical rating, where five of a kind joins the best class."""
+    return Classes()[0][rank_n] if rank_n > 0 else 0
+
+
+@lru_cache(maxsize = None)
+def Prior() -> array:
+    """Provides the share of five card hands in each class."""
+    classes, labels = Classes()
+    prior = array("d", [0.0]) * len(labels)
+    for rank_n, n in enumerate(RankCounts()):
+        if rank_n:
+            prior[classes[rank_n]] += n / HANDS
+    return prior
+
+
+@lru_cache(maxsize = None)
+def ClassPercentiles() -> array:
+    """Provides the mean percentile of the hands of each class."""
+    classes, labels = Classes()
+    counts, percentiles = RankCounts(), Percentiles()
+    totals = array("d", [0.0]) * len(labels)
+    for rank_n in range(1, RATINGS + 1):
+        totals[classes[rank_n]] += counts[rank_n] * percentiles[rank_n]
+    return array("d", [total / (share * HANDS) for total, share in zip(totals, Prior())])
+
+
+@lru_cache(maxsize = None)
+def DrawLikelihoods() -> list[array]:
+    """
+    Finds how likely each class is to draw each amount of cards.
+
+    Hands are assumed to draw typically, standing pat with a straight or better, keeping cards of the same value,
+    drawing to four cards of a suit, and otherwise keeping their two highest cards, as in drawtable.TypicalDiscards.
+
+    Returns
+    -------
+        The likelihood of each class, for each amount of cards drawn.
+
+    """
+    typical = {"three of a kind" : {2 : 1.0}, "two pair" : {1 : 1.0}, "pair" : {3 : 1.0},
+               "high card" : {1 : FOUR_FLUSHES, 3 : 1 - FOUR_FLUSHES}}
+    categories = [label.split(",")[0] for label in Classes()[1]]
+    return [array("d", [(1 - EPSILON) * typical.get(category, {0 : 1.0}).get(count, 0.0) + EPSILON / len(DRAWS)
+                        for category in categories]) for count in DRAWS]
+
+
+@lru_cache(maxsize = None)
+def BetLikelihoods(phase : str) -> dict[str, array]:
+    """
+    Finds how likely each class is to check, call or raise in a betting phase, by the percentile of the class.
+
+    Parameters
+    ----------
+        phase : "preflop" or "postflop"
+
+    Returns
+    -------
+        The likelihood of each class, for each action.
+
+    """
+    slope = SLOPES[phase]
+    raising = [1 / (1 + exp(-slope * (percentile - RAISING))) for percentile in ClassPercentiles()]
+    calling = [1 / (1 + exp(-slope * (percentile - CALLING))) for percentile in ClassPercentiles()]
+    actions = {"raise" : raising,
+               "call" : [max(call - raise_, 0.0) for call, raise_ in zip(calling, raising)],
+               "check" : [1 - raise_ for raise_ in raising]}
+    return {action : array("d", [(1 - EPSILON) * p + EPSILON for p in ps]) for action, ps in actions.items()}
+
+
+class RangeTracker(object):
+    """
+    A class to track the range of hands each player could hold, from how many cards they draw and how they bet.
+
+    Each range is a probability vector over the classes of hands before the draw, starting from the share of hands
+    in each class and multiplied by the likelihood of each class taking each observed action. Ranges of players who
+    fold are dropped, so a table never holds more than a vector per seat.
+
+    Attributes
+    ----------
+        ranges : dict
+            the probability of each class, by player
+        strengths : dict
+            the expected percentile of each range, by player
+        phase : str
+            the betting phase, "preflop" until someone draws and "postflop" after
+
+    Methods
+    -------
+        NewHand :
+            Start a range for each player dealt in.
+        Discard :
+            Update a range by how many cards the player drew.
+        Bet :
+            Update a range by how the player bet.
+        Range :
+            Get the range of a player.
+        Strength :
+            Get the expected percentile of the range of a player.
+
+    """
+
+    def __init__(self):
+        """Constructs all the necessary attributes for the range tracker object."""
+        self.ranges = {}
+        self.strengths = {}
+        self.phase = "preflop"
+
+    def NewHand(self, names):
+        """Starts a range for each player dealt in, from the share of hands in each class."""
+        prior = Prior()
+        strength = sum(map(mul, prior, ClassPercentiles()))
+        self.ranges = {name : prior[:] for name in names}
+        self.strengths = {name : strength for name in names}
+        self.phase = "preflop"
+
+    def Update(self, name : str, likelihood : array):
+        """Multiplies the range of a player by the likelihood of their action, then normalises it."""
+        if name not in self.ranges:
+            return
+        weights = array("d", map(mul, self.ranges[name], likelihood))
+        scale = 1 / sum(weights)
+        self.ranges[name] = weights = array("d", map(scale.__mul__, weights))
+        self.strengths[name] = sum(map(mul, weights, ClassPercentiles()))
+
+    def Discard(self, name : str, count : int):
+        """Updates the range of a player by how many cards they drew, which also ends the first betting phase."""
+        self.phase = "postflop"
+        self.Update(name, DrawLikelihoods()[min(count, DRAWS[-1])])
+
+    def Bet(self, name : str, amount : int, status : dict):
+        """
+        Updates the range of a player by how they bet.
+
+        Parameters
+        ----------
+            name : name of the player
+            amount : chips they put in
+            status : details of the bet, as from ChipTracker.BetDetails
+
+        """
+        if status["has_folded"]:
+            self.ranges.pop(name, None)
+            self.strengths.pop(name, None)
+            return
+        action = "raise" if status["has_raised"] else "check" if not amount else "call"
+        self.Update(name, BetLikelihoods(self.phase)[action])
+
+    def Range(self, name : str) -> array:
+        """Provides the probability of each class for a player, or None if they aren't in the hand."""
+        return self.ranges.get(name)
+
+    def Strength(self, name : str) -> float:
+        """Provides the expected percentile of the hand of a player, or None if they aren't in the hand."""
+        return self.strengths.get(name)
@@ -0,0 +1,261 @@
+import os
+import struct
+import sys
+from array import array
+from functools import reduce
+from itertools import combinations, combinations_with_replacement
+
+
+# hand ranking data is found next to this file, wherever the game is run from
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+# path of the binary rank tables, built by running this module
+RANKS = os.path.join(DATA, "ranks.bin")
+
+# file layout: magic, then the amount of hands with duplicate card values, then the flush and unique5 tables
+# indexed by the sum of powers of two of their card values, then the duplicate hands' products of primes and ratings
+MAGIC = b"FCDR\x01"
+COUNT = struct.Struct("<I")
+# sums of 13 distinct powers of two fit in 13 bits, so ratings are stored by index, with 0 for impossible hands
+SIZE = 1 << 13
+# the prime encoding of each card value, as in Card.PRIMES
+PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def Straights() -> list[tuple]:
+    """Provides the card values of each straight, from best to worst, where the wheel is five high."""
+    return [tuple(range(top, top - 5, -1)) for top in range(12, 3, -1)] + [(12, 3, 2, 1, 0)]
+
+
+def Classes(straights : list[tuple]) -> list[tuple]:
+    """
+    Provides every distinct five card hand from best to worst, in the order of Cactus Kev's evaluator.
+
+    Parameters
+    ----------
+        straights : card values of each hand that counts as a straight, from best to worst
+
+    Returns
+    -------
+        The table and key of each hand, where flushes and hands with 5 unique values are keyed by their sum of
+        powers of two, and hands with duplicate values by their product of primes.
+
+    """
+    values = range(12, -1, -1)
+    straights = [reduce(lambda x, y : x | 1 << y, straight, 0) for straight in straights]
+    # combinations of values from best to worst, which aren't straights
+    highs = [reduce(lambda x, y : x | 1 << y, hand, 0) for hand in combinations(values, 5)]
+    highs = [key for key in highs if key not in straights]
+
+    def Dupes(groups):
+        # key hands made from groups of (value, amount of cards)
+        return [("dupe", reduce(lambda x, y : x * PRIMES[y[0]] ** y[1], group, 1)) for group in groups]
+
+    return (
+        # straight flushes, four of a kind and full houses
+        [("flush", key) for key in straights]
+        + Dupes([(quad, 4), (kicker, 1)] for quad in values for kicker in values if kicker != quad)
+        + Dupes([(trip, 3), (pair, 2)] for trip in values for pair in values if pair != trip)
+        # flushes and straights
+        + [("flush", key) for key in highs]
+        + [("unique5", key) for key in straights]
+        # three of a kind, two pair and pair, with kickers from best to worst
+        + Dupes([(trip, 3)] + [(kicker, 1) for kicker in kickers] for trip in values for kickers in combinations([v for v in values if v != trip], 2))
+        + Dupes([(high, 2), (low, 2), (kicker, 1)] for high, low in combinations(values, 2) for kicker in values if kicker not in (high, low))
+        + Dupes([(pair, 2)] + [(kicker, 1) for kicker in kickers] for pair in values for kickers in combinations([v for v in values if v != pair], 3))
+        # high cards
+        + [("unique5", key) for key in highs])
+
+
+def Number(classes : list[tuple]) -> tuple[array, array, dict]:
+    """Rates each class of hand by its position, from 1 for the first class."""
+    tables = {"flush" : array("H", [0]) * SIZE, "unique5" : array("H", [0]) * SIZE, "dupe" : {}}
+    for n, (table, key) in enumerate(classes, 1):
+        tables[table][key] = n
+    return tables["flush"], tables["unique5"], tables["dupe"]
+
+
+def GenerateRanks() -> tuple[array, array, dict]:
+    """
+    Enumerates every distinct five card hand from best to worst, numbering them as in Cactus Kev's evaluator.
+
+    Returns
+    -------
+        The flush and unique5 ratings indexed by their sum of powers of two, and the ratings of hands with
+        duplicate card values by their product of primes.
+
+    """
+    return Number(Classes(Straights()))
+
+
+def GenerateLowballRanks(aces_low : bool = False) -> tuple[array, array, dict]:
+    """
+    Enumerates every distinct five card hand from best to worst for lowball, keyed as in GenerateRanks.
+
+    Parameters
+    ----------
+        aces_low : rank for ace to five lowball, where aces are low and straights and flushes don't count,
+            rather than deuce to seven lowball, where aces are high and the wheel isn't a straight
+
+    """
+    if not aces_low:
+        # the worst hand in deuce to seven is the best without the wheel straight
+        return Number(Classes(Straights()[:-1])[::-1])
+
+    # with aces low, hands are compared from their highest value down, so combinations of positions in the
+    # order A, 2, ..., K are sorted by their highest position first
+    values = range(13)
+    Lows = lambda positions, k : sorted(combinations(positions, k), key = lambda x : x[::-1])
+    Others = lambda *groups : [v for v in values if v not in groups]
+    Key = lambda groups : reduce(lambda x, y : x * PRIMES[(y[0] - 1) % 13] ** y[1], groups, 1)
+    classes = (
+        # hands without pairs, then pair, two pair and three of a kind, with kickers from best to worst
+        [("unique5", reduce(lambda x, y : x | 1 << (y - 1) % 13, hand, 0)) for hand in Lows(values, 5)]
+        + [("dupe", Key([(pair, 2)] + [(kicker, 1) for kicker in kickers])) for pair in values for kickers in Lows(Others(pair), 3)]
+        + [("dupe", Key([(high, 2), (low, 2), (kicker, 1)])) for low, high in Lows(values, 2) for kicker in Others(high, low)]
+        + [("dupe", Key([(trip, 3)] + [(kicker, 1) for kicker in kickers])) for trip in values for kickers in Lows(Others(trip), 2)]
+        # full houses and four of a kind
+        + [("dupe", Key([(trip, 3), (pair, 2)])) for trip in values for pair in Others(trip)]
+        + [("dupe", Key([(quad, 4), (kicker, 1)])) for quad in values for kicker in Others(quad)])
+    _, unique5_ranks, dupe_ranks = Number(classes)
+    # flushes don't count, so suited hands rate as unsuited
+    return array("H", unique5_ranks), unique5_ranks, dupe_ranks
+
+
+def GenerateWildRanks(tables : tuple = None) -> tuple[array, array, dict]:
+    """
+    Finds the best rating of every hand with wild cards, by trying each substitution for the wild cards.
+
+    Hands are keyed by their natural cards alone, since the amount of wild cards follows from how many natural
+    cards there are. Five of a kind is possible with wild cards, and is rated 0 for deuces down to -12 for aces.
+
+    Parameters
+    ----------
+        tables : the flush, unique5 and duplicate ratings of hands without wild cards, defaulting to generated tables
+
+    Returns
+    -------
+        The ratings of natural cards of one suit and of several suits with unique values, indexed by their sum of
+        powers of two, and the ratings of natural cards with duplicate values by their product of primes.
+
+    """
+    flush_ranks, unique5_ranks, dupe_ranks = tables or GenerateRanks()
+    wild_flush_ranks = array("h", [0]) * SIZE
+    wild_unique5_ranks = array("h", [0]) * SIZE
+    wild_dupe_ranks = {}
+    # hands with five natural cards are rated by the tables without wild cards
+    for n in range(5):
+        # substitutions for the wild cards, best first so five of a kind is found by the first value
+        substitutions = [*combinations_with_replacement(range(12, -1, -1), 5 - n)]
+        for naturals in combinations_with_replacement(range(13), n):
+            suited, unsuited = 7463, 7463
+            for substitution in substitutions:
+                values = naturals + substitution
+                key = reduce(lambda x, y : x | 1 << y, values, 0)
+                if bin(key).count("1") == 5:
+                    # the wild cards can always match the suit of natural cards with unique values
+                    suited = min(suited, flush_ranks[key])
+                    unsuited = min(unsuited, unique5_ranks[key])
+                elif len(set(values)) == 1:
+                    unsuited = min(unsuited, -values[0])
+                else:
+                    unsuited = min(unsuited, dupe_ranks[reduce(lambda x, y : x * PRIMES[y], values, 1)])
+            if len(set(naturals)) == n:
+                key = reduce(lambda x, y : x | 1 << y, naturals, 0)
+                wild_flush_ranks[key] = min(suited, unsuited)
+                wild_unique5_ranks[key] = unsuited
+            else:
+                wild_dupe_ranks[reduce(lambda x, y : x * PRIMES[y], naturals, 1)] = unsuited
+    return wild_flush_ranks, wild_unique5_ranks, wild_dupe_ranks
+
+
+def ParseRanks(directory : str = DATA) -> tuple[array, array, dict]:
+    """
+    Reads the rank tables scraped from Cactus Kev's list of five card hands.
+
+    Parameters
+    ----------
+        directory : folder containing flushes.txt, uniquefive.txt and dupes.txt
+
+    """
+    # create ciphers for reading and encoding hands for fast hand ranking
+    DV = {char : 2 ** i for i, char in enumerate("23456789TJQKA")}
+    DP = {char : PRIMES[i] for i, char in enumerate("23456789TJQKA")}
+    tables = []
+    for name in ["flushes.txt", "uniquefive.txt"]:
+        table = array("H", [0]) * SIZE
+        with open(os.path.join(directory, name), "r") as file:
+            for line in file:
+                # locate and encode hand as sum of powers of two
+                hand = reduce(lambda x, y : x+y, map(lambda x : DV[line[int(x)]], "45678"))
+                table[hand] = int(line[11:])
+        tables.append(table)
+    dupe_ranks = {}
+    with open(os.path.join(directory, "dupes.txt"), "r") as file:
+        for line in file:
+            # locate and encode hand as product of primes
+            hand = reduce(lambda x, y : x*y, map(lambda x : DP[line[int(x)]], "45678"))
+            dupe_ranks[hand] = int(line[11:])
+    return tables[0], tables[1], dupe_ranks
+
+
+def WriteRanks(path : str = RANKS, tables : tuple = None):
+    """
+    Writes rank tables to the binary format, defaulting to generated tables.
+
+    Parameters
+    ----------
+        path : path of binary rank tables
+        tables : the flush, unique5 and duplicate ratings
+
+    """
+    flush_ranks, unique5_ranks, dupe_ranks = tables or GenerateRanks()
+    keys = array("I", sorted(dupe_ranks))
+    ranks = array("H", [dupe_ranks[key] for key in keys])
+    columns = [flush_ranks, unique5_ranks, keys, ranks]
+    if sys.byteorder == "big":
+        columns = [array(column.typecode, column) for column in columns]
+        for column in columns:
+            column.byteswap()
+    with open(path + ".tmp", "wb") as file:
+        file.write(MAGIC + COUNT.pack(len(keys)))
+        for column in columns:
+            column.tofile(file)
+    os.replace(path + ".tmp", path)
+
+
+def ReadRanks(path : str = RANKS) -> tuple[array, array, dict]:
+    """
+    Reads rank tables from the binary format.
+
+    Parameters
+    ----------
+        path : path of binary rank tables
+
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} isn't a rank table file.")
+        n, = COUNT.unpack(file.read(COUNT.size))
+        columns = []
+        for typecode, length in [("H", SIZE), ("H", SIZE), ("I", n), ("H", n)]:
+            column = array(typecode)
+            column.fromfile(file, length)
+            if sys.byteorder == "big":
+                column.byteswap()
+            columns.append(column)
+    flush_ranks, unique5_ranks, keys, ranks = columns
+    return flush_ranks, unique5_ranks, dict(zip(keys, ranks))
+
+
+def LoadRanks(path : str = RANKS) -> tuple[array, array, dict]:
+    """Reads the binary rank tables if they have been built, and generates them otherwise."""
+    if os.path.exists(path):
+        return ReadRanks(path)
+    return GenerateRanks()
+
+
+if __name__ == "__main__":
+    # build the binary rank tables, such as at install time
+    path = sys.argv[1] if len(sys.argv) > 1 else RANKS
+    WriteRanks(path)
+    print(f"[RANKS] Wrote rank tables to {path}.")
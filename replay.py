@@ -0,0 +1,213 @@
+import sys
+from multiprocessing import Pool
+
+from fivecarddraw import Dealer
+from handhistory import ANTE, BET, DEAL, DISCARD, PAYOUT, SHOWDOWN, BetFlags, HistoryReader, HistoryFiles, ReadVariant
+
+
+class Replayer(object):
+    """
+    A class to deterministically re-run recorded hands by the rules of a dealer.
+
+    Antes and bets are replayed on the dealer's ChipTracker, each bet checked by ChipTracker.BetDetails as
+    Dealer.TakeBet checks it and asserted to have been recorded with the same flags. Recorded deck orders and
+    discards are replayed on plain per-hand state, checked by HandTracker.AllowDiscards, and pots are paid out
+    by Dealer.CalculateRewards, then the resulting antes, ranks, rewards and stacks are asserted to match the
+    record. Nothing else a live table keeps for its players, such as logs, table views, statuses and range
+    tracking, is kept, since a replay only checks outcomes, and only the hands still in at the showdown are
+    evaluated.
+
+    Attributes
+    ----------
+        variant : str
+            the variant of five card draw hands are replayed by
+        dealer : Dealer
+            the dealer whose rules hands are replayed by, reused between hands
+        CARDS : list[Card]
+            the cards of the dealers deck, indexed by their hand history encoding
+
+    Methods
+    -------
+        ReplayHand :
+            Replay a recorded hand.
+        ReplayFile :
+            Replay every hand in a hand history.
+
+    """
+
+    def __init__(self, variant : str = "standard"):
+        """
+        Constructs all the necessary attributes for the replayer object.
+
+        Parameters
+        ----------
+            variant : the variant of five card draw the hands were played in
+
+        """
+        self.variant = variant
+        self.dealer = Dealer(variant=variant)
+        # an unshuffled deck is ordered by value then suit, then any jokers, matching the card encoding
+        self.CARDS = list(self.dealer.cards.DECK.state)
+
+    def ReplayHand(self, hand) -> dict:
+        """
+        Replays a recorded hand and returns the stacks after the hand.
+
+        Parameters
+        ----------
+            hand : recorded hand
+
+        """
+        # cards are kept as their hand history encoding, so they are only decoded to be evaluated
+        tracker, chips, card = self.dealer.cards, self.dealer.chips, self.CARDS.__getitem__
+        names = [name for name, _, _ in hand.players]
+        chips.players = players = {name : {"stack" : stack, "contribution" : 0} for name, _, stack in hand.players}
+        details, bet = chips.BetDetails, chips.Bet
+        hands, folded = {}, set()
+        deck, t, anted, rewards, ranks = b"", 0, False, None, None
+        # events are checked from the most common, since most of a hand is bets and antes
+        for event in hand.events:
+            code = event[0]
+            if code == BET:
+                _, name, amount, flags = event
+                # a bet is legal if it calls, goes all-in, or folds by betting nothing, as Dealer.TakeBet decides
+                status = details(name, amount)
+                if amount > players[name]["stack"] or not (status["has_mincalled"] or status["has_allin"] or status["has_folded"]):
+                    raise AssertionError(f"Hand {hand.hand_id}: {name} couldn't bet {amount}.")
+                if BetFlags(status) != flags:
+                    raise AssertionError(f"Hand {hand.hand_id}: {name} bet {amount} with different flags.")
+                if status["has_folded"]:
+                    folded.add(name)
+                bet(name, amount)
+            elif code == ANTE:
+                # the first ante collects every ante, where antes are recorded first, one per player, and are only
+                # less than the ante when players are all-in for less
+                if not anted:
+                    ante = max(e[2] for e in hand.events[:len(names)] if e[0] == ANTE)
+                    for player in players.values():
+                        player["contribution"] = min(ante, player["stack"])
+                        player["stack"] -= player["contribution"]
+                    anted = True
+                if players[event[1]]["contribution"] != event[2]:
+                    raise AssertionError(f"Hand {hand.hand_id}: {event[1]} paid a different ante.")
+            elif code == DISCARD:
+                _, name, discards = event
+                held, k = hands[name], len(discards)
+                # cards are unique bytes, so every discard was held if deleting them leaves the rest, and only drawing
+                # four or more cards can be refused by the rules of the draw
+                kept = held.translate(None, discards)
+                if len(kept) != len(held) - k or (k > 3 and not tracker.AllowDiscards([*map(card, held)], [*map(card, discards)])):
+                    raise AssertionError(f"Hand {hand.hand_id}: {name} couldn't discard {list(discards)}.")
+                # a deck that runs dry is reshuffled, which is recorded as a new deck order before the discard
+                if len(deck) - t < k:
+                    raise AssertionError(f"Hand {hand.hand_id}: the deck ran out without being reshuffled.")
+                hands[name] = kept + deck[t : t + k]
+                t += k
+            elif code == SHOWDOWN or code == PAYOUT:
+                # showdowns and payouts are all recorded by a single payout
+                if rewards is None:
+                    rewards, ranks = self.Payout(names, hands, folded)
+                if code == SHOWDOWN and ranks.get(event[1]) != event[2]:
+                    raise AssertionError(f"Hand {hand.hand_id}: {event[1]} has a different rank.")
+                if code == PAYOUT and rewards.get(event[1]) != event[2]:
+                    raise AssertionError(f"Hand {hand.hand_id}: {event[1]} won a different amount.")
+            elif code == DEAL:
+                deck, t = event[2], event[1]
+                # later deck orders are from the muck being reshuffled during the draw
+                if not hands:
+                    if len(deck) - t < 5 * len(names):
+                        raise AssertionError(f"Hand {hand.hand_id}: there aren't enough cards to deal.")
+                    for name in names:
+                        hands[name] = deck[t : t + 5]
+                        t += 5
+        # assert resulting stacks match the record
+        stacks = {name : players[name]["stack"] for name in names}
+        if stacks != hand.stacks:
+            raise AssertionError(f"Hand {hand.hand_id}: stacks {stacks} don't match {hand.stacks}.")
+        return stacks
+
+    def Payout(self, names : list[str], hands : dict, folded : set) -> tuple[dict, dict]:
+        """
+        Pays out the pot of a replayed hand by the dealers rules, evaluating only hands still in at the showdown.
+
+        Parameters
+        ----------
+            names : players in the order hands were dealt to them
+            hands : encoded cards each player holds
+            folded : players who folded
+
+        Returns
+        -------
+            The rewards paid to each player, and the rank of each hand evaluated.
+
+        """
+        dealer = self.dealer
+        players = dealer.chips.players
+        showdown = [name for name in names if name not in folded]
+        card = self.CARDS.__getitem__
+        ranks = {name : dealer.cards.EvaluateHand([*map(card, hands[name])]) for name in showdown} if len(showdown) > 1 else {}
+        best = min(ranks.values(), default = 0)
+        winners = [name for name in showdown if ranks.get(name, 0) == best]
+        # a lone winner who put in as much as anyone takes the whole pot, so there are no side pots to split
+        if len(winners) == 1 and players[winners[0]]["contribution"] == max(player["contribution"] for player in players.values()):
+            rewards = {winners[0] : dealer.chips.PotAmount()}
+            players[winners[0]]["stack"] += rewards[winners[0]]
+            return rewards, ranks
+        # players who folded can't win, so only the players still in are given to the dealer
+        status = {"has_folded" : False}
+        info = {name : {"hand" : {"rank_n" : ranks.get(name, 0)}, "chips" : players[name], "status" : status}
+                for name in showdown}
+        return dealer.CalculateRewards(info), ranks
+
+    def ReplayFile(self, path : str) -> int:
+        """
+        Replays every hand in a hand history and returns the amount of hands replayed.
+
+        Parameters
+        ----------
+            path : path of the hand history, which must record the replayers variant
+
+        """
+        reader = HistoryReader(path)
+        if reader.variant != self.variant:
+            raise ValueError(f"{path} records {reader.variant}, not {self.variant}.")
+        count = 0
+        for hand in reader:
+            self.ReplayHand(hand)
+            count += 1
+        return count
+
+
+def ReplayFile(path : str) -> int:
+    """Replays every hand in a hand history with a new replayer of the variant it records."""
+    return Replayer(ReadVariant(path)).ReplayFile(path)
+
+
+def ReplayFiles(paths : list[str], processes : int = None) -> int:
+    """
+    Replays hand histories in parallel, one file per task, each by the variant it records, and returns the amount of
+    hands replayed.
+
+    Parameters
+    ----------
+        paths : paths of hand histories
+        processes : amount of worker processes, defaults to the amount of cores
+
+    """
+    if processes == 1 or len(paths) < 2:
+        # reuse a replayer for each variant
+        replayers, count = {}, 0
+        for path in paths:
+            variant = ReadVariant(path)
+            if variant not in replayers:
+                replayers[variant] = Replayer(variant)
+            count += replayers[variant].ReplayFile(path)
+        return count
+    with Pool(processes) as pool:
+        return sum(pool.imap_unordered(ReplayFile, paths))
+
+
+if __name__ == "__main__":
+    # replay hand histories and any files they were rotated into
+    paths = [path for arg in sys.argv[1:] for path in HistoryFiles(arg)]
+    print(f"[REPLAY] Replayed {ReplayFiles(paths)} hands from {len(paths)} files.")
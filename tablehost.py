@@ -0,0 +1,449 @@
+import argparse
+import asyncio
+import inspect
+import os
+import sys
+from time import perf_counter, process_time
+
+from fivecarddraw import LOGS, Dealer
+
+
+# hands a table with human players deals an hour, for estimating how many tables a core can host
+HANDS_PER_HOUR = 60
+# seconds a human has to make each decision before checking or folding
+TIMEOUT = 30.0
+# what a human is taken to have decided when their time runs out, checking or folding and standing pat
+DEFAULTS = {"amount" : 0, "discards" : []}
+
+
+class AsyncTable(object):
+    """
+    A class to play five card draw at a table sharing an event loop with other tables.
+
+    Decisions of humans are awaited, so a slow human only stalls their own table, while bots decide
+    inline as they do in PlayGame. A table yields to the other tables between hands, so tables of bots
+    take turns rather than running to completion one at a time.
+
+    Attributes
+    ----------
+        name : str
+            the name of the table
+        dealer : Dealer
+            the dealer running the table
+        timeout : float
+            seconds a human has to make each decision
+        prompt : callable
+            called with the table, a human, the kind of decision and their table view when a decision is needed,
+            and awaited within the timeout if it returns an awaitable
+        workers : PolicyBatcher
+            the batcher bots decide through, such as a botworkers.BotChannel deciding out of process, or None
+            for bots to decide inline
+        pending : dict
+            the kind of decision, table view and future of each human being waited on
+        hands : int
+            the amount of hands played
+        decisions : int
+            the amount of decisions made by humans
+        timeouts : int
+            the amount of decisions humans ran out of time for
+
+    Methods
+    -------
+        Submit :
+            Give the decision of a human being waited on.
+        Decide :
+            Get a decision from a player.
+        Play :
+            Play hands until the game is over.
+
+    """
+
+    def __init__(self, name : str, humans : list[str], bots : list[str], chips : int = 500, ante : int = 5,
+                 timeout : float = TIMEOUT, prompt = None, variant : str = "standard", writer = None, workers = None):
+        """
+        Constructs all the necessary attributes for the asynctable object.
+
+        Parameters
+        ----------
+            name : the name of the table
+            humans : names of players whose decisions are submitted
+            bots : names of players who decide inline
+            chips : starting chips of each player
+            ante : the ante
+            timeout : seconds a human has to make each decision
+            prompt : called with the table, a human, the kind of decision and their table view when a decision is needed
+            variant : the variant of five card draw played
+            writer : a handhistory.HistoryWriter to record hands with
+            workers : a PolicyBatcher or botworkers.BotChannel for bots to decide through in batches
+
+        """
+        self.name = name
+        self.dealer = Dealer(len(humans) + len(bots), variant)
+        self.dealer.InitializeTable(humans, bots, chips)
+        self.dealer.UpdateAnte(ante)
+        self.dealer.RecordHistory(writer)
+        self.timeout = timeout
+        self.prompt = prompt
+        self.workers = workers
+        self.pending = {}
+        self.hands = 0
+        self.decisions = 0
+        self.timeouts = 0
+
+    def Submit(self, name : str, decision) -> bool:
+        """
+        Gives the decision of a human being waited on.
+
+        Parameters
+        ----------
+            name : name of human
+            decision : an amount to bet, or the cards to discard
+
+        Returns
+        -------
+            Whether the human was being waited on.
+
+        """
+        if name not in self.pending:
+            return False
+        future = self.pending[name][2]
+        if future.done():
+            return False
+        future.set_result(decision)
+        return True
+
+    async def Decide(self, name : str, kind : str, info) -> object:
+        """
+        Gets a decision from a player, waiting for humans and deciding inline for bots, unless they decide in batches.
+
+        Parameters
+        ----------
+            name : name of player
+            kind : "amount" to bet or "discards" to swap
+            info : the table view of the player
+
+        Side effects
+        ------------
+            The pending attribute holds the human while they are waited on. \\n
+            The decisions and timeouts attributes are increased for humans.
+
+        """
+        action = self.dealer.action
+        if name not in action.beings["humans"]:
+            if self.workers:
+                return await self.workers.Decide(name, kind, info)
+            if kind == "amount":
+                return action.SelectAmount(name, info)
+            return action.SelectDiscards(name, info)
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[name] = (kind, info, future)
+        self.decisions += 1
+
+        async def Wait():
+            if self.prompt:
+                prompted = self.prompt(self, name, kind, info)
+                # prompts may need awaiting, such as to send the table view over a socket
+                if inspect.isawaitable(prompted):
+                    await prompted
+            return await future
+
+        try:
+            return await asyncio.wait_for(Wait(), self.timeout)
+        except asyncio.TimeoutError:
+            # check or fold, and stand pat
+            self.timeouts += 1
+            LOGS["ACTION"].info("%s ran out of time.", name)
+            return DEFAULTS[kind]
+        finally:
+            del self.pending[name]
+
+    def NewHand(self) -> bool:
+        # kick players with few chips
+        self.dealer.KickPlayers(self.dealer.SkintPlayers())
+
+        # check amount of players remaining
+        if len(self.dealer.TrackedPlayers()) < 2:
+            LOGS["END"].info("%s has won at %s!", self.dealer.TrackedPlayers()[0], self.name)
+            return False
+
+        # begin new round
+        LOGS["NEW ROUND"].info("")
+        self.dealer.ShuffleDeck()
+        self.dealer.MoveButton()
+        self.dealer.TakeAnte()
+        self.dealer.DealHands()
+        return True
+
+    async def BettingPhase(self, phase : str):
+        # determine betting order
+        if phase == "preflop":
+            action_order = self.dealer.PreflopOrder()
+        if phase == "postflop":
+            action_order = self.dealer.DealingOrder()
+
+        # determine if betting phase can be skipped
+        if len(self.dealer.action.ActingPlayers(action_order)) < 2:
+            return
+
+        # begin betting loop
+        unfinished = True
+        while unfinished:
+            for name in action_order:
+                # skip player if no action is needed
+                if self.dealer.action.PlayerHasActed(name):
+                    continue
+                # get action from player, checking or folding if their time runs out
+                info = self.dealer.TableView(name)
+                while not self.dealer.TakeBet(name, await self.Decide(name, "amount", info)):
+                    pass
+            # track if more actions are needed
+            unfinished = not all(self.dealer.action.PlayerHasActed(name) for name in action_order)
+
+        # update player statuses for next round
+        self.dealer.action.ExtendRound()
+
+    async def SwitchingPhase(self):
+        # determine if switching phase can be skipped
+        dealing_order = self.dealer.seats
+        if len(self.dealer.action.ShowdownPlayers(dealing_order)) < 2:
+            return
+
+        for name in dealing_order:
+            # check if player is allowed to switch cards
+            if self.dealer.action.players[name]["has_folded"]:
+                continue
+            # get discards from player, standing pat if their time runs out
+            info = self.dealer.TableView(name)
+            while not self.dealer.EditHand(name, await self.Decide(name, "discards", info)):
+                pass
+
+    def EvaluationPhase(self):
+        # reward players, collect cards and log player standings
+        self.dealer.Payout()
+        self.dealer.CollectCards()
+        self.dealer.Summary()
+
+    async def Play(self, hands : int = None):
+        """
+        Plays hands until one player is left, or some amount of hands have been played.
+
+        Parameters
+        ----------
+            hands : most hands to play, defaulting to no limit
+
+        Side effects
+        ------------
+            The dealer attribute runs the hands. \\n
+            The hands attribute is increased.
+
+        """
+        played = 0
+        while (hands is None or played < hands) and self.NewHand():
+            await self.BettingPhase("preflop")
+            await self.SwitchingPhase()
+            await self.BettingPhase("postflop")
+            self.EvaluationPhase()
+            self.hands += 1
+            played += 1
+            # let other tables play, since bots never wait
+            await asyncio.sleep(0)
+
+
+class PolicyBatcher(object):
+    """
+    A class to decide for the bots of many tables at once with a policy, in process.
+
+    Requests are queued until the tables sharing the batcher have had their turn, then decided with one
+    call to the batch methods of the policy, which is how vectorised policies amortise their overhead.
+
+    Attributes
+    ----------
+        policy : Policy
+            the policy deciding for the bots
+        queued : list[tuple]
+            the name, kind, view and future of each request waiting for the next batch
+        round_trips : int
+            the amount of calls to the batch methods of the policy
+        decisions : int
+            the amount of decisions made
+
+    Methods
+    -------
+        Decide :
+            Await a decision, batched with other decisions made at the same time.
+
+    """
+
+    def __init__(self, policy):
+        """Constructs all the necessary attributes for the policybatcher object."""
+        self.policy = policy
+        self.queued = []
+        self.round_trips = 0
+        self.decisions = 0
+
+    async def Decide(self, name : str, kind : str, info) -> object:
+        """
+        Awaits a decision, decided in one batch with every other decision requested in the same turn of the loop.
+
+        Parameters
+        ----------
+            name : name of bot
+            kind : "amount" to bet or "discards" to swap
+            info : the table view of the bot
+
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.queued.append((name, kind, info, future))
+        # wait for the other tables to make their requests before deciding them together
+        if len(self.queued) == 1:
+            loop.call_soon(self.Flush)
+        return await future
+
+    def Flush(self):
+        # decide every queued bet in one call and every queued draw in another, skipping requests of tables
+        # cancelled while they waited
+        batch, self.queued = self.queued, []
+        for kind, Select in [("amount", self.policy.SelectAmountBatch), ("discards", self.policy.SelectDiscardsBatch)]:
+            requests = [request for request in batch if request[1] == kind and not request[3].done()]
+            if requests:
+                for (_, _, _, future), decision in zip(requests, Select([(name, info) for name, _, info, _ in requests])):
+                    if not future.done():
+                        future.set_result(decision)
+                self.round_trips += 1
+                self.decisions += len(requests)
+
+
+class TableHost(object):
+    """
+    A class to run many tables concurrently in one event loop, and report how many tables a core can host.
+
+    Attributes
+    ----------
+        tables : dict
+            the tables being hosted by name
+        cpu_seconds : float
+            processor time spent running tables
+        wall_seconds : float
+            time spent running tables
+
+    Methods
+    -------
+        Open :
+            Open a new table.
+        Close :
+            Stop hosting a table.
+        Run :
+            Play hands at every table concurrently.
+        Report :
+            Get the hosting capacity.
+
+    """
+
+    def __init__(self):
+        """Constructs all the necessary attributes for the tablehost object."""
+        self.tables = {}
+        self.cpu_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    def Open(self, name : str, humans : list[str], bots : list[str], **kwargs) -> AsyncTable:
+        """
+        Opens a new table, taking the same arguments as AsyncTable.
+
+        Side effects
+        ------------
+            The tables attribute gets an additional item.
+
+        """
+        if name in self.tables:
+            raise KeyError(f"{name} is already being hosted.")
+        table = AsyncTable(name, humans, bots, **kwargs)
+        self.tables[name] = table
+        return table
+
+    def Close(self, name : str):
+        """
+        Stops hosting a table.
+
+        Side effects
+        ------------
+            The tables attribute loses an item.
+
+        """
+        try:
+            del self.tables[name]
+        except KeyError:
+            raise KeyError(f"{name} is not being hosted.")
+
+    async def Run(self, hands : int = None):
+        """
+        Plays hands at every table concurrently, until each game is over or has played some amount of hands.
+
+        Parameters
+        ----------
+            hands : most hands to play at each table, defaulting to no limit
+
+        Side effects
+        ------------
+            The cpu_seconds and wall_seconds attributes are increased.
+
+        """
+        cpu, wall = process_time(), perf_counter()
+        try:
+            await asyncio.gather(*(table.Play(hands) for table in self.tables.values()))
+        finally:
+            self.cpu_seconds += process_time() - cpu
+            self.wall_seconds += perf_counter() - wall
+
+    def Report(self, hands_per_hour : int = HANDS_PER_HOUR) -> dict:
+        """
+        Provides the hosting capacity, from the processor time spent per hand.
+
+        Parameters
+        ----------
+            hands_per_hour : hands a table deals an hour
+
+        Returns
+        -------
+            The amount of tables, hands, human decisions and timeouts, the time spent running tables, and the
+            amount of tables one core could host dealing hands_per_hour hands an hour.
+
+        """
+        hands = sum(table.hands for table in self.tables.values())
+        cpu_per_hand = self.cpu_seconds / hands if hands else 0.0
+        return {
+            "tables" : len(self.tables),
+            "hands" : hands,
+            "decisions" : sum(table.decisions for table in self.tables.values()),
+            "timeouts" : sum(table.timeouts for table in self.tables.values()),
+            "cpu_seconds" : self.cpu_seconds,
+            "wall_seconds" : self.wall_seconds,
+            "cpu_per_hand" : cpu_per_hand,
+            "tables_per_core" : 3600 / (hands_per_hour * cpu_per_hand) if cpu_per_hand else 0.0,
+            "cores" : os.cpu_count()}
+
+
+def Main(argv : list[str] = None) -> int:
+    """Hosts tables of bots from the command line and reports the hosting capacity."""
+    parser = argparse.ArgumentParser(description="Host tables of fivecarddraw bots and report how many tables a core can host.")
+    parser.add_argument("--tables", type=int, default=100, help="tables to host")
+    parser.add_argument("--seats", type=int, default=6, help="bots at each table")
+    parser.add_argument("--hands", type=int, default=20, help="most hands to play at each table")
+    parser.add_argument("--hands-per-hour", type=int, default=HANDS_PER_HOUR, help="hands a table deals an hour")
+    args = parser.parse_args(argv)
+
+    host = TableHost()
+    for i in range(args.tables):
+        host.Open(f"Table {i}", [], [f"Bot {j}" for j in range(args.seats)])
+    asyncio.run(host.Run(args.hands))
+    report = host.Report(args.hands_per_hour)
+    print(f"[HOST] Played {report['hands']} hands at {report['tables']} tables in {report['wall_seconds']:.2f} s.")
+    print(f"[HOST] {report['cpu_per_hand'] * 1e6:.0f} us of processor time per hand.")
+    print(f"[HOST] One core can host about {report['tables_per_core']:.0f} tables at {args.hands_per_hour} hands an hour, "
+          f"{report['tables_per_core'] * report['cores']:.0f} tables on {report['cores']} cores.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
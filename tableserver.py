@@ -0,0 +1,588 @@
+import argparse
+import asyncio
+import math
+import os
+import socket
+import sys
+import tempfile
+from struct import Struct, error as PackingError
+from time import perf_counter
+
+from handhistory import CardCode, FLAGS
+from tablehost import DEFAULTS, TIMEOUT, TableHost
+
+
+# frames are a little endian payload length followed by the payload, led by its message code
+FRAME = Struct("<H")
+# longest payload either side accepts, beyond which the connection is dropped
+MAX_FRAME = 1024
+# bytes buffered for a client before sending to them waits for it to read, and posting to them drops them
+HIGH_WATER = 1 << 16
+
+# client message codes
+JOIN, BET, DISCARD = range(1, 4)
+# server message codes
+SEATED, ACT, DRAW, RESULT, END, ERROR = range(16, 22)
+
+# message layouts
+BET_MESSAGE = Struct("<BI")
+DISCARD_MESSAGE = Struct("<BB")
+STACK_MESSAGE = Struct("<BI")
+VIEW = Struct("<BBIIB5sIIB")
+OTHER = Struct("<BIIB")
+
+
+def PackString(text : str) -> bytes:
+    """Encodes a string as its length in a byte followed by its utf-8 bytes."""
+    data = text.encode()
+    if len(data) > 255:
+        raise ValueError(f"{text} is too long to send.")
+    return bytes([len(data)]) + data
+
+
+def UnpackString(payload : bytes, i : int) -> tuple[str, int]:
+    """Decodes a string packed at an offset, returning it and the offset after it."""
+    n = payload[i]
+    return bytes(payload[i+1:i+1+n]).decode(), i + 1 + n
+
+
+def StatusFlags(status) -> int:
+    """Encodes the status of a player from ActionTracker as the bet flags of handhistory."""
+    return sum(flag for key, flag in FLAGS if status.get(key))
+
+
+def EncodeView(code : int, info) -> bytes:
+    """
+    Encodes a table view from Dealer.TableView, with cards as in handhistory and others by seat.
+
+    Parameters
+    ----------
+        code : ACT for a bet, or DRAW for discards
+        info : table view of the player deciding
+
+    """
+    me, game = info["self"], info["game"]
+    payload = VIEW.pack(code, me["seat"], me["chips"]["stack"], me["chips"]["contribution"], StatusFlags(me["status"]),
+                        bytes(CardCode(card) for card in me["hand"]["cards"]), game["call"], game["pot"], len(info["others"]))
+    for other in info["others"].values():
+        payload += OTHER.pack(other["seat"], other["chips"]["stack"], other["chips"]["contribution"], StatusFlags(other["status"]))
+    return payload
+
+
+def DecodeView(payload : bytes) -> dict:
+    """Decodes a table view encoded by EncodeView."""
+    code, seat, stack, contribution, flags, cards, call, pot, n = VIEW.unpack_from(payload)
+    others = [OTHER.unpack_from(payload, VIEW.size + i * OTHER.size) for i in range(n)]
+    return {
+        "seat" : seat, "stack" : stack, "contribution" : contribution, "flags" : flags, "cards" : list(cards),
+        "call" : call, "pot" : pot,
+        "others" : [{"seat" : s, "stack" : st, "contribution" : c, "flags" : f} for s, st, c, f in others]}
+
+
+class ProtocolError(Exception):
+    """Raised when a peer sends a frame that breaks the protocol."""
+
+
+class Connection(object):
+    """
+    A class to send and receive frames over a stream.
+
+    Attributes
+    ----------
+        reader : asyncio.StreamReader
+            the stream frames are received from
+        writer : asyncio.StreamWriter
+            the stream frames are sent to
+        table : str
+            the table the peer has joined
+        name : str
+            the player the peer has joined as
+
+    Methods
+    -------
+        Send :
+            Send a frame, waiting while the peer is behind on reading.
+        Post :
+            Send a frame without waiting, dropping a peer that has stopped reading.
+        Receive :
+            Receive a frame.
+        Close :
+            Close the stream and wait for it to close.
+
+    """
+
+    def __init__(self, reader : asyncio.StreamReader, writer : asyncio.StreamWriter):
+        """Constructs all the necessary attributes for the connection object."""
+        self.reader = reader
+        self.writer = writer
+        self.table = None
+        self.name = None
+        writer.transport.set_write_buffer_limits(high=HIGH_WATER)
+
+    def Post(self, payload : bytes) -> bool:
+        """
+        Sends a frame without waiting, for small messages that don't need backpressure.
+
+        Returns
+        -------
+            Whether the frame was sent, which it isn't once the stream is closing, or once more than HIGH_WATER
+            bytes are buffered for the peer, which drops them.
+
+        """
+        if self.writer.is_closing():
+            return False
+        if self.writer.transport.get_write_buffer_size() > HIGH_WATER:
+            # abort rather than close, since closing would wait for the peer to read what's buffered
+            self.writer.transport.abort()
+            return False
+        self.writer.write(FRAME.pack(len(payload)) + payload)
+        return True
+
+    async def Send(self, payload : bytes):
+        """Sends a frame, waiting while the peer is behind on reading."""
+        self.Post(payload)
+        await self.writer.drain()
+
+    async def Receive(self) -> bytes:
+        """
+        Receives a frame.
+
+        Returns
+        -------
+            The payload, or None once the stream is closed between frames.
+
+        """
+        try:
+            n, = FRAME.unpack(await self.reader.readexactly(FRAME.size))
+        except asyncio.IncompleteReadError as error:
+            if error.partial:
+                raise ProtocolError("The stream closed within a frame.")
+            return None
+        if not n or n > MAX_FRAME:
+            raise ProtocolError(f"A frame of {n} bytes isn't allowed.")
+        return await self.reader.readexactly(n)
+
+    async def Close(self):
+        """Closes the stream and waits for it to close."""
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            # the peer had already reset the connection
+            pass
+
+
+class TableServer(object):
+    """
+    A class to host tables for clients connected over TCP or Unix sockets.
+
+    Each table is played by its own actor task, which owns its dealer. Connections only hand decisions to
+    the table they joined, so tables never share state. A table starts once each of its humans has joined,
+    and a human who disconnects checks or folds and stands pat from then on.
+
+    Attributes
+    ----------
+        host : TableHost
+            the tables being hosted
+        hands : int
+            most hands to play at each table, defaulting to no limit
+        max_connections : int
+            most clients connected at once
+        clients : dict
+            the task handling each connected client, by connection
+        humans : dict
+            the humans seated at each table, by table
+        connections : dict
+            the connection of each joined human, by table and name
+        ready : dict
+            an event set once every human at a table has joined, by table
+        actors : list[asyncio.Task]
+            the task playing each table
+        server : asyncio.Server
+            the listening socket
+
+    Methods
+    -------
+        Open :
+            Open a table, to be played once its humans join.
+        Start :
+            Start listening and playing tables.
+        Stop :
+            Stop listening and playing tables.
+
+    """
+
+    def __init__(self, hands : int = None, timeout : float = TIMEOUT, max_connections : int = 1024):
+        """
+        Constructs all the necessary attributes for the tableserver object.
+
+        Parameters
+        ----------
+            hands : most hands to play at each table, defaulting to no limit
+            timeout : seconds a human has to make each decision
+            max_connections : most clients connected at once
+
+        """
+        self.host = TableHost()
+        self.hands = hands
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.clients = {}
+        self.humans = {}
+        self.connections = {}
+        self.ready = {}
+        self.actors = []
+        self.server = None
+
+    def Open(self, name : str, humans : list[str], bots : list[str], **kwargs):
+        """Opens a table, taking the same arguments as AsyncTable, to be played once its humans join."""
+        kwargs.setdefault("timeout", self.timeout)
+        table = self.host.Open(name, humans, bots, prompt=self.Prompt, **kwargs)
+        # humans are remembered as they were seated, since busted humans are no longer tracked
+        self.humans[name] = list(humans)
+        self.ready[name] = asyncio.Event()
+        if not humans:
+            self.ready[name].set()
+        return table
+
+    async def Start(self, address):
+        """
+        Starts listening and playing tables.
+
+        Parameters
+        ----------
+            address : a (host, port) pair for TCP, or the path of a Unix socket
+
+        """
+        # queue as many connections as can be handled, so clients connecting at once aren't refused
+        if isinstance(address, str):
+            self.server = await asyncio.start_unix_server(self.Handle, path=address, backlog=self.max_connections)
+        else:
+            self.server = await asyncio.start_server(self.Handle, *address, backlog=self.max_connections)
+        self.actors = [asyncio.create_task(self.Actor(table)) for table in self.host.tables.values()]
+
+    async def Stop(self):
+        """Stops listening and playing tables, closing every connection."""
+        for actor in self.actors:
+            actor.cancel()
+        await asyncio.gather(*self.actors, return_exceptions=True)
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        # disconnect every client, waiting for them to leave their tables
+        await asyncio.gather(*(connection.Close() for connection in list(self.clients)), return_exceptions=True)
+        await asyncio.gather(*self.clients.values(), return_exceptions=True)
+
+    def Address(self):
+        """Provides the address being listened on, as given to TableClient.Connect."""
+        address = self.server.sockets[0].getsockname()
+        return address if isinstance(address, str) else address[:2]
+
+    async def Actor(self, table):
+        # wait for the humans, then introduce the players by seat
+        await self.ready[table.name].wait()
+        seated = bytes([SEATED, len(table.dealer.seats.players)])
+        for name, seat in table.dealer.seats.players.items():
+            seated += bytes([seat]) + PackString(name)
+        self.Broadcast(table, lambda name : seated)
+
+        # play hands one at a time, telling humans their stack after each
+        while self.hands is None or table.hands < self.hands:
+            hands = table.hands
+            await table.Play(1)
+            if table.hands == hands:
+                break
+            self.Broadcast(table, lambda name : STACK_MESSAGE.pack(RESULT, self.Stack(table, name)))
+        self.Broadcast(table, lambda name : STACK_MESSAGE.pack(END, self.Stack(table, name)))
+        for name in self.humans[table.name]:
+            connection = self.connections.get((table.name, name))
+            if connection:
+                await connection.Close()
+
+    def Stack(self, table, name : str) -> int:
+        # busted humans have left the chip tracker with nothing
+        return table.dealer.chips.players[name]["stack"] if name in table.dealer.chips.players else 0
+
+    def Broadcast(self, table, Payload):
+        # post a message to each connected human at a table, dropping any who have stopped reading
+        for name in self.humans[table.name]:
+            connection = self.connections.get((table.name, name))
+            if connection:
+                connection.Post(Payload(name))
+
+    def Prompt(self, table, name : str, kind : str, info):
+        connection = self.connections.get((table.name, name))
+        # decide at once for humans who have disconnected, or are dropped for not reading what they were sent
+        if connection is None or not connection.Post(EncodeView(ACT if kind == "amount" else DRAW, info)):
+            table.Submit(name, DEFAULTS[kind])
+
+    async def Handle(self, reader : asyncio.StreamReader, writer : asyncio.StreamWriter):
+        connection = Connection(reader, writer)
+        # refuse clients beyond capacity
+        if len(self.clients) >= self.max_connections:
+            connection.Post(bytes([ERROR]) + PackString("The server is full."))
+            await connection.Close()
+            return
+        self.clients[connection] = asyncio.current_task()
+        try:
+            while True:
+                payload = await connection.Receive()
+                if payload is None:
+                    break
+                self.Dispatch(connection, payload)
+        except (ProtocolError, PackingError, KeyError, ValueError, IndexError, ConnectionError, asyncio.IncompleteReadError) as error:
+            connection.Post(bytes([ERROR]) + PackString(str(error)[:255]))
+        finally:
+            del self.clients[connection]
+            self.Leave(connection)
+            await connection.Close()
+
+    def Dispatch(self, connection : Connection, payload : bytes):
+        code = payload[0]
+        if code == JOIN:
+            self.Join(connection, payload)
+            return
+        if connection.table is None:
+            raise ProtocolError("Join a table before acting.")
+        table = self.host.tables[connection.table]
+        pending = table.pending.get(connection.name)
+        if code == BET:
+            kind = "amount"
+            _, decision = BET_MESSAGE.unpack(payload)
+        elif code == DISCARD:
+            kind = "discards"
+            _, mask = DISCARD_MESSAGE.unpack(payload)
+            # only a player being waited on to draw is sure to hold cards, since busted players aren't dealt in
+            hand = table.dealer.cards.Hand(connection.name) if pending and pending[0] == kind else []
+            decision = [card for i, card in enumerate(hand) if mask >> i & 1]
+        else:
+            raise ProtocolError(f"{code} isn't a message code.")
+        # decisions arriving out of turn, such as after timing out, are answered without dropping the client
+        if not pending or pending[0] != kind or not table.Submit(connection.name, decision):
+            connection.Post(bytes([ERROR]) + PackString("It isn't your turn."))
+
+    def Join(self, connection : Connection, payload : bytes):
+        table_name, i = UnpackString(payload, 1)
+        name, _ = UnpackString(payload, i)
+        table = self.host.tables.get(table_name)
+        if connection.table is not None or table is None or name not in self.humans[table_name]:
+            raise ProtocolError(f"{name} can't join {table_name}.")
+        if (table_name, name) in self.connections or self.ready[table_name].is_set():
+            raise ProtocolError(f"{name} has already joined {table_name}.")
+        connection.table, connection.name = table_name, name
+        self.connections[(table_name, name)] = connection
+        # start the table once every human has joined
+        if all((table_name, human) in self.connections for human in self.humans[table_name]):
+            self.ready[table_name].set()
+
+    def Leave(self, connection : Connection):
+        if connection.table is None:
+            return
+        del self.connections[(connection.table, connection.name)]
+        # stop waiting on a decision from the client
+        table = self.host.tables[connection.table]
+        if connection.name in table.pending:
+            table.Submit(connection.name, DEFAULTS[table.pending[connection.name][0]])
+
+
+class TableClient(object):
+    """
+    A class to play at a served table, timing how long the server takes to respond to each decision.
+
+    Attributes
+    ----------
+        connection : Connection
+            the connection to the server
+        seats : dict
+            the name of each player by seat
+        stack : int
+            the stack of the client after the last hand
+        latencies : list[float]
+            seconds from sending each decision to receiving the next message
+
+    Methods
+    -------
+        Connect :
+            Connect to a server.
+        Join :
+            Join a table.
+        Play :
+            Make decisions until the table is over.
+
+    """
+
+    def __init__(self):
+        """Constructs all the necessary attributes for the tableclient object."""
+        self.connection = None
+        self.seats = {}
+        self.stack = None
+        self.latencies = []
+
+    async def Connect(self, address):
+        """Connects to a server at a (host, port) pair, or the path of a Unix socket."""
+        if isinstance(address, str):
+            reader, writer = await asyncio.open_unix_connection(address)
+        else:
+            reader, writer = await asyncio.open_connection(*address)
+        self.connection = Connection(reader, writer)
+
+    async def Join(self, table : str, name : str):
+        """Joins a table as one of its humans."""
+        await self.connection.Send(bytes([JOIN]) + PackString(table) + PackString(name))
+
+    def Bet(self, view : dict) -> int:
+        """Decides an amount to bet, calling whatever it costs up to going all-in."""
+        return min(view["call"], view["stack"])
+
+    def Discard(self, view : dict) -> int:
+        """Decides which cards to discard, as a mask of positions in the hand, standing pat."""
+        return 0
+
+    async def Play(self) -> int:
+        """
+        Makes decisions until the table is over.
+
+        Returns
+        -------
+            The stack of the client when the table ended.
+
+        """
+        sent = None
+        while True:
+            payload = await self.connection.Receive()
+            if sent is not None:
+                self.latencies.append(perf_counter() - sent)
+                sent = None
+            if payload is None:
+                raise ConnectionError("The server closed the connection.")
+            code = payload[0]
+            if code == SEATED:
+                i = 2
+                for _ in range(payload[1]):
+                    seat = payload[i]
+                    self.seats[seat], i = UnpackString(payload, i + 1)
+            elif code == ACT:
+                sent = perf_counter()
+                await self.connection.Send(BET_MESSAGE.pack(BET, self.Bet(DecodeView(payload))))
+            elif code == DRAW:
+                sent = perf_counter()
+                await self.connection.Send(DISCARD_MESSAGE.pack(DISCARD, self.Discard(DecodeView(payload))))
+            elif code == RESULT:
+                _, self.stack = STACK_MESSAGE.unpack(payload)
+            elif code == END:
+                _, self.stack = STACK_MESSAGE.unpack(payload)
+                await self.connection.Close()
+                return self.stack
+            elif code == ERROR:
+                raise ProtocolError(UnpackString(payload, 1)[0])
+
+
+def Percentile(values : list[float], q : float) -> float:
+    """Provides the value below which a fraction q of values fall, by the nearest rank."""
+    values = sorted(values)
+    return values[max(0, math.ceil(len(values) * q) - 1)] if values else 0.0
+
+
+def OpenTables(server : TableServer, tables : int, humans : int, bots : int):
+    """Opens tables named "Table i", each with humans named "Player j" and bots named "Bot j"."""
+    for i in range(tables):
+        server.Open(f"Table {i}", [f"Player {j}" for j in range(humans)], [f"Bot {j}" for j in range(bots)])
+
+
+async def LoadTest(clients : int = 200, bots : int = 5, hands : int = 10, address = None) -> dict:
+    """
+    Connects clients to tables of their own and measures how quickly the server responds to their decisions.
+
+    Parameters
+    ----------
+        clients : amount of clients, each joining "Table i" as "Player 0"
+        bots : bots at each table, when serving in process
+        hands : most hands to play at each table, when serving in process
+        address : address of a running server, defaulting to serving tables in process over a Unix socket
+
+    Returns
+    -------
+        The amount of clients and decisions, the seconds taken, the decisions per second, and the median
+        and 99th percentile seconds from a client sending a decision to the server responding.
+
+    """
+    server, directory = None, None
+    if address is None:
+        server = TableServer(hands)
+        OpenTables(server, clients, 1, bots)
+        if hasattr(socket, "AF_UNIX"):
+            directory = tempfile.TemporaryDirectory()
+            address = os.path.join(directory.name, "tables.sock")
+        else:
+            address = ("127.0.0.1", 0)
+        await server.Start(address)
+        address = server.Address()
+    try:
+        start = perf_counter()
+        players = [TableClient() for _ in range(clients)]
+        await asyncio.gather(*(player.Connect(address) for player in players))
+        await asyncio.gather(*(player.Join(f"Table {i}", "Player 0") for i, player in enumerate(players)))
+        await asyncio.gather(*(player.Play() for player in players))
+        seconds = perf_counter() - start
+    finally:
+        if server:
+            await server.Stop()
+        if directory:
+            directory.cleanup()
+    latencies = [latency for player in players for latency in player.latencies]
+    return {
+        "clients" : clients,
+        "decisions" : len(latencies),
+        "seconds" : seconds,
+        "decisions_per_second" : len(latencies) / seconds,
+        "p50" : Percentile(latencies, 0.5),
+        "p99" : Percentile(latencies, 0.99)}
+
+
+def ParseAddress(text : str):
+    """Parses "host:port" as a TCP address, and anything else as the path of a Unix socket."""
+    host, _, port = text.rpartition(":")
+    return (host, int(port)) if host and port.isdigit() else text
+
+
+async def Serve(address, tables : int, humans : int, bots : int, hands : int):
+    # serve tables until interrupted
+    server = TableServer(hands)
+    OpenTables(server, tables, humans, bots)
+    await server.Start(address)
+    print(f"[SERVER] Hosting {tables} tables at {server.Address()}.")
+    try:
+        await asyncio.gather(*server.actors)
+    finally:
+        await server.Stop()
+
+
+def Main(argv : list[str] = None) -> int:
+    """Serves tables, or load tests a server, from the command line."""
+    parser = argparse.ArgumentParser(description="Serve fivecarddraw tables over a socket, or load test a server.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="serve tables until every game is over")
+    serve.add_argument("address", type=ParseAddress, help="host:port, or the path of a Unix socket")
+    serve.add_argument("--tables", type=int, default=100, help="tables to serve")
+    serve.add_argument("--humans", type=int, default=1, help="humans to wait for at each table")
+    serve.add_argument("--bots", type=int, default=5, help="bots at each table")
+    serve.add_argument("--hands", type=int, help="most hands to play at each table")
+    load = commands.add_parser("loadtest", help="connect clients to a server and measure its responsiveness")
+    load.add_argument("--address", type=ParseAddress, help="server to connect to, defaulting to serving in process")
+    load.add_argument("--clients", type=int, default=200, help="clients to connect, one per table")
+    load.add_argument("--bots", type=int, default=5, help="bots at each table when serving in process")
+    load.add_argument("--hands", type=int, default=10, help="most hands to play at each table when serving in process")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        asyncio.run(Serve(args.address, args.tables, args.humans, args.bots, args.hands))
+        return 0
+    report = asyncio.run(LoadTest(args.clients, args.bots, args.hands, args.address))
+    print(f"[LOAD] {report['clients']} clients made {report['decisions']} decisions in {report['seconds']:.2f} s, "
+          f"{report['decisions_per_second']:.0f} decisions a second.")
+    print(f"[LOAD] Responses took {report['p50'] * 1e3:.2f} ms at the median and {report['p99'] * 1e3:.2f} ms at the 99th percentile.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
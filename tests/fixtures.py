@@ -0,0 +1,13 @@
+# tables of bots playing a hand at a time, shared with the benchmarks and mcts.py
+from fivecarddraw import HeadlessTable, SpectateGame
+
+
+class RecordedGame(SpectateGame):
+    def __init__(self, writer):
+        # record every hand of a humanless game
+        self.WRITER = writer
+        super().__init__()
+
+    def Configuration(self):
+        super().Configuration()
+        self.dealer.RecordHistory(self.WRITER)
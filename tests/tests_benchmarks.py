@@ -0,0 +1,58 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from benchmarks.benchmarks import BENCHMARKS, BUDGETS, REPLAY_HANDS, REPLAY_RATE, Main, OverBudget, Regressions, RunBenchmark, RunBenchmarks
+
+
+class BenchmarksTest(unittest.TestCase):
+    def testRunning(self):
+        # check benchmarks are timed and reproducible
+        result = RunBenchmark("hand_2_seats", repeats=1)
+        self.assertGreater(result["seconds"], 0)
+        results = RunBenchmarks(["seattracker_iteration", "split_contributions"], repeats=1)
+        self.assertEqual([*results["results"]], ["seattracker_iteration", "split_contributions"])
+
+        # check engine errors are recorded instead of raised
+        BENCHMARKS["broken"] = (lambda: None, 1)
+        self.addCleanup(BENCHMARKS.pop, "broken")
+        self.assertIn("error", RunBenchmark("broken", repeats=1))
+
+        # check a run with errors fails, and isn't saved as a baseline
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "baseline.json")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(Main(["seattracker_iteration", "broken", "--repeats", "1", "--save", path]), 1)
+            self.assertFalse(os.path.exists(path))
+            self.assertEqual(Main(["seattracker_iteration", "--repeats", "1", "--save", path]), 0)
+        self.assertTrue(os.path.exists(path))
+
+
+    def testRegressions(self):
+        baseline = {"results" : {"a" : {"seconds" : 1.0}, "b" : {"seconds" : 1.0}, "c" : {"error" : "Exception"}}}
+        results = {"results" : {"a" : {"seconds" : 1.2}, "b" : {"seconds" : 1.5}, "c" : {"seconds" : 9.0}, "d" : {"seconds" : 9.0}}}
+
+        # check only benchmarks slower than the threshold allows regress
+        self.assertEqual(Regressions(results, baseline, 0.25), {"b" : 1.5})
+        self.assertEqual([*Regressions(results, baseline, 0.1)], ["a", "b"])
+
+
+    def testBudgets(self):
+        # check only benchmarks with a budget can exceed it
+        budget = BUDGETS["startup"]
+        results = {"results" : {"startup" : {"seconds" : 2 * budget}, "deck_next" : {"seconds" : 9.0}}}
+        self.assertEqual(OverBudget(results), {"startup" : 2 * budget})
+
+        # check a worker can start away from the repository
+        result = RunBenchmark("startup", repeats=1)
+        self.assertNotIn("error", result)
+
+        # check recorded hands are replayed within the time the target rate allows
+        self.assertAlmostEqual(BUDGETS["replay_file"] * REPLAY_RATE, REPLAY_HANDS)
+        self.assertNotIn("error", RunBenchmark("replay_file", repeats=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
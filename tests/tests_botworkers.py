@@ -0,0 +1,108 @@
+import asyncio
+import os
+import random
+import unittest
+from fivecarddraw import Dealer, RandomPolicy
+from botworkers import DISCARDS, REQUEST_SIZE, RESPONSE, BotChannel, PackRequest, Ring, UnpackRequest, WorkerError
+from tablehost import TableHost
+
+
+class CrashingPolicy(RandomPolicy):
+    # stop the worker without answering
+    def SelectAmountBatch(self, requests):
+        os._exit(1)
+
+
+class BotWorkersTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so games are reproducible
+        random.seed(8)
+        # deal a full table
+        self.dealer = Dealer(10)
+        self.names = [f"Bot {i}" for i in range(10)]
+        self.dealer.InitializeTable([], self.names, 500)
+        self.dealer.UpdateAnte(5)
+        self.dealer.ShuffleDeck()
+        self.dealer.MoveButton()
+        self.dealer.TakeAnte()
+        self.dealer.DealHands()
+
+
+    def testRecords(self):
+        # check views of a full table fit in a record and survive packing
+        buffer = bytearray(2 * REQUEST_SIZE)
+        for i, name in enumerate(self.names):
+            info = self.dealer.TableView(name)
+            PackRequest(buffer, REQUEST_SIZE, i, DISCARDS, info)
+            j, kind, view = UnpackRequest(buffer, REQUEST_SIZE)
+            self.assertEqual((j, kind), (i, DISCARDS))
+            # check views are shaped like table views
+            self.assertEqual(view["self"]["hand"]["cards"], info["self"]["hand"]["cards"])
+            self.assertEqual(view["self"]["chips"], dict(info["self"]["chips"]))
+            self.assertEqual(view["self"]["status"], dict(info["self"]["status"]))
+            self.assertEqual(view["game"], dict(info["game"]))
+            self.assertEqual(sorted(view["others"]), sorted(other["seat"] for other in info["others"].values()))
+
+
+    def testRing(self):
+        ring = Ring(RESPONSE.size, 4)
+        self.addCleanup(ring.Close, True)
+        # check records wrap around the ring in order
+        for start in range(0, 30, 3):
+            self.assertEqual(ring.Free(), 4)
+            for i in range(3):
+                RESPONSE.pack_into(ring.memory.buf, ring.WriteOffset(i), start + i, 0)
+            ring.Publish(3)
+            self.assertEqual((ring.Free(), ring.Unread()), (1, 3))
+            self.assertEqual([RESPONSE.unpack_from(ring.memory.buf, ring.ReadOffset(i))[0] for i in range(3)], [start, start + 1, start + 2])
+            ring.Release(3)
+            self.assertEqual(ring.Unread(), 0)
+
+
+    def testBatching(self):
+        with BotChannel(capacity=4) as channel:
+            # check a batch bigger than the rings takes as few round trips as they allow
+            batch = [("amount", self.dealer.TableView(name)) for name in self.names]
+            batch += [("discards", self.dealer.TableView(name)) for name in self.names]
+            decisions = channel.DecideBatch(batch)
+            self.assertEqual(channel.round_trips, 5)
+            self.assertEqual(channel.decisions, 20)
+
+            # check decisions are the ones ActionTracker bots could make
+            for (kind, info), decision in zip(batch, decisions):
+                if kind == "amount":
+                    self.assertIn(decision, [0, 495, 0, 50, 100, 0])
+                else:
+                    self.assertTrue(set(decision).issubset(info["self"]["hand"]["cards"]))
+
+
+    def testTables(self):
+        with BotChannel() as channel:
+            # host tables whose bots decide out of process
+            host = TableHost()
+            for i in range(10):
+                host.Open(f"Table {i}", [], [f"Bot {j}" for j in range(6)], workers=channel)
+            asyncio.run(host.Run(3))
+
+            # check tables played, sharing round trips
+            for table in host.tables.values():
+                self.assertTrue(table.hands)
+                self.assertEqual(sum(table.dealer.chips.Stack(name) for name in table.dealer.TrackedPlayers()), 3000)
+            self.assertLess(channel.round_trips, channel.decisions)
+            self.assertFalse(channel.queued or channel.in_flight)
+
+
+    def testCrashes(self):
+        with BotChannel(CrashingPolicy()) as channel:
+            # check requests waiting on a worker that stops fail, as do later requests
+            name = self.names[0]
+            async def Decide():
+                return await asyncio.wait_for(channel.Decide(name, "amount", self.dealer.TableView(name)), 10)
+            self.assertRaises(WorkerError, asyncio.run, Decide())
+            self.assertFalse(channel.queued or channel.in_flight)
+            self.assertRaises(WorkerError, asyncio.run, Decide())
+            self.assertRaises(WorkerError, channel.DecideBatch, [("amount", self.dealer.TableView(name))])
+
+
+if __name__ == "__main__":
+    unittest.main()
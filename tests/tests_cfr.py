@@ -0,0 +1,74 @@
+import os
+import random
+import tempfile
+import unittest
+from fivecarddraw import Card, Dealer
+from cfr import BUCKETS, Actions, CFRPolicy, Discards, InformationSets, Solver, Train
+from tests.fixtures import HeadlessTable
+
+
+class CFRTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so games are reproducible
+        random.seed(12)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = os.path.join(directory.name, "cfr.bin")
+        self.strategy = os.path.join(directory.name, "strategy.bin")
+
+
+    def testAbstraction(self):
+        # check betting allows a bet and a raise, and information sets are unique
+        self.assertEqual([Actions(history) for history in ["", "k", "b", "kb", "br", "kbr"]], ["kb", "kb", "fcr", "fcr", "fc", "fc"])
+        keys = [key for key, _ in InformationSets()]
+        self.assertEqual(len(keys), len(set(keys)))
+        # check draws keep cards sharing a value, then the highest cards
+        hand = [Card(3, 0), Card(12, 1), Card(3, 2), Card(7, 3), Card(9, 0)]
+        self.assertEqual(set(Discards(hand, 2)), {Card(7, 3), Card(9, 0)})
+        self.assertEqual(Discards(hand, 0), [])
+
+
+    def testTraining(self):
+        solver = Solver(seed = 12)
+        solver.Train(2000)
+        # check every average strategy is a distribution
+        for key in solver.sets:
+            self.assertAlmostEqual(sum(solver.Average(key)), 1)
+        # check the best hands bet more often than the worst, and fold to a bet less often
+        self.assertGreater(solver.Average((0, BUCKETS - 1, -1, ""))[1], solver.Average((0, 0, -1, ""))[1])
+        self.assertLess(solver.Average((0, BUCKETS - 1, -1, "b"))[0], solver.Average((0, 0, -1, "b"))[0])
+
+
+    def testResuming(self):
+        # check training interrupted after an epoch resumes to the same tables as training without interruption
+        Train(self.checkpoint, 200, processes = 1, epoch = 100)
+        resumed = Train(self.checkpoint, 400, processes = 1, epoch = 100)
+        os.remove(self.checkpoint)
+        uninterrupted = Train(self.checkpoint, 400, processes = 1, epoch = 100)
+        self.assertEqual(resumed.iterations, 400)
+        self.assertEqual((resumed.regrets, resumed.strategy), (uninterrupted.regrets, uninterrupted.strategy))
+
+        # check training across processes sums the work of each
+        solver = Train(self.checkpoint, 600, processes = 2, epoch = 50)
+        self.assertEqual(solver.iterations, 600)
+        self.assertTrue(all(regret >= 0 for regret in solver.regrets))
+
+
+    def testPolicy(self):
+        solver = Solver(seed = 12)
+        solver.Train(500)
+        solver.Export(self.strategy)
+        # check the strategy plays hands, keeping every chip at the table
+        table = HeadlessTable(3)
+        for name in table.dealer.TrackedPlayers():
+            table.dealer.SetPolicy(name, CFRPolicy(table.dealer, self.strategy, seed = 12))
+        for _ in range(10):
+            table.PlayHand()
+            self.assertEqual(abs(table.dealer.chips), 1500)
+        # check tables of other variants are refused, since hands are bucketed as standard five card draw
+        for variant in ("joker", "deuces", "deuce to seven"):
+            self.assertRaises(ValueError, CFRPolicy, Dealer(3, variant=variant), self.strategy)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,210 @@
+import io
+import logging
+import unittest
+from operator import setitem
+import fivecarddraw
+from fivecarddraw import ConfigureLogging, Dealer, JokerHandTracker, Policy, RandomPolicy
+
+class DealerTest(unittest.TestCase):
+    def setUp(self):
+        # create dealer with a seated table
+        self.names = [f"{i}" for i in range(6)]
+        self.dealer = Dealer(len(self.names))
+        self.dealer.InitializeTable([], self.names, 500)
+        self.dealer.UpdateAnte(5)
+
+
+    def testTableView(self):
+        # begin a hand
+        self.dealer.MoveButton()
+        self.dealer.TakeAnte()
+        self.dealer.DealHands()
+
+        # check views are reused while the table is unchanged
+        for name in self.names:
+            view = self.dealer.TableView(name)
+            self.assertIs(view, self.dealer.TableView(name))
+
+            # check viewer can see their own hand but not others hands
+            self.assertEqual(len(view["self"]["hand"]["cards"]), 5)
+            for other in view["others"].values():
+                self.assertFalse(other["hand"])
+
+            # check views are read-only
+            self.assertRaises(TypeError, setitem, view["game"], "pot", 0)
+            self.assertRaises(TypeError, setitem, view["self"]["chips"], "stack", 0)
+
+            # check the viewers cards can't be edited through the view
+            hand = self.dealer.cards.Hand(name)[:]
+            cards = view["self"]["hand"]["cards"]
+            self.assertRaises(AttributeError, getattr, cards, "clear")
+            self.assertRaises(TypeError, setitem, cards, 0, None)
+            self.assertEqual(self.dealer.cards.Hand(name), hand)
+            self.assertEqual(list(cards), hand)
+
+            # check the viewers hand is rated after the deal
+            self.assertEqual(view["self"]["hand"]["rank_n"], self.dealer.cards.EvaluateHand(hand))
+
+        # check views are rebuilt after a bet
+        name = self.dealer.PreflopOrder()[0]
+        view = self.dealer.TableView(name)
+        self.assertTrue(self.dealer.TakeBet(name, 10))
+        self.assertIsNot(view, self.dealer.TableView(name))
+        self.assertEqual(self.dealer.TableView(name)["game"]["pot"], self.dealer.chips.PotAmount())
+        self.assertEqual(self.dealer.TableView(name)["self"]["chips"]["stack"], 485)
+
+        # check views are rebuilt after a draw
+        view = self.dealer.TableView(name)
+        self.assertTrue(self.dealer.EditHand(name, view["self"]["hand"]["cards"][:2]))
+        self.assertIsNot(view, self.dealer.TableView(name))
+
+        # check the viewers rating is current after the swap
+        hand = self.dealer.TableView(name)["self"]["hand"]
+        self.assertEqual(hand["rank_n"], self.dealer.cards.EvaluateHand(list(hand["cards"])))
+
+        # check views are unchanged by failed requests
+        view = self.dealer.TableView(name)
+        self.assertFalse(self.dealer.TakeBet(name, 10000))
+        self.assertIs(view, self.dealer.TableView(name))
+
+
+    def testLogging(self):
+        # log only warnings and rewards
+        stream = io.StringIO()
+        ConfigureLogging(logging.WARNING, {"REWARDS" : logging.INFO}, stream)
+        self.addCleanup(self.ResetLogging)
+
+        # play a hand where everyone checks to showdown
+        self.dealer.MoveButton()
+        self.dealer.TakeAnte()
+        self.dealer.DealHands()
+        for name in self.dealer.PreflopOrder():
+            self.dealer.TakeBet(name, 0)
+        self.dealer.Payout()
+        self.dealer.CollectCards()
+        self.dealer.PlayerInfo()
+
+        # check only ungated categories were logged, with their tags
+        lines = stream.getvalue().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            self.assertTrue(line.startswith("[REWARDS] ") or line.startswith("[WARNING] "))
+        self.assertIn("[WARNING] Nobody has a hand.", lines)
+
+        # check logs can be written asynchronously
+        stream = io.StringIO()
+        listener = ConfigureLogging(stream=stream, asynchronous=True)
+        self.dealer.UpdateAnte(10)
+        listener.stop()
+        self.assertEqual(stream.getvalue(), "[SETUP] The ante has been set to 10 chips.\n")
+
+
+    def ResetLogging(self):
+        # restore silent table logs
+        for handler in list(fivecarddraw.LOG.handlers):
+            fivecarddraw.LOG.removeHandler(handler)
+        fivecarddraw.LOG.addHandler(logging.NullHandler())
+        fivecarddraw.LOG.propagate = True
+        for log in fivecarddraw.LOGS.values():
+            log.setLevel(logging.NOTSET)
+
+
+    def testFolding(self):
+        # begin a hand, where everyone folds to a bet but the last player, who calls
+        self.dealer.ShuffleDeck()
+        self.dealer.MoveButton()
+        self.dealer.TakeAnte()
+        self.dealer.DealHands()
+        order = self.dealer.PreflopOrder()
+        folded = [card for name in order[1:-1] for card in self.dealer.cards.Hand(name)]
+        self.assertTrue(self.dealer.TakeBet(order[0], 10))
+        for name in order[1:-1]:
+            self.assertTrue(self.dealer.TakeBet(name, 0))
+            # check folded hands are mucked
+            self.assertEqual(self.dealer.cards.Hand(name), [])
+        self.assertTrue(self.dealer.TakeBet(order[-1], 10))
+        self.assertEqual(self.dealer.cards.DECK.muck, folded)
+
+        # check the muck reshuffled when the deck runs dry includes the folded hands
+        deck = self.dealer.cards.DECK
+        while len(deck) > 1:
+            next(deck)
+        hand = self.dealer.cards.Hand(order[0])[:]
+        self.assertTrue(self.dealer.EditHand(order[0], hand[:3]))
+        drawn = [card for card in self.dealer.cards.Hand(order[0]) if card not in hand]
+        self.assertTrue(set(folded) <= set(deck.RemainingCards() + drawn))
+        self.assertEqual(len(deck), 1 + len(folded) - 3)
+        self.assertEqual(len(set(deck.state)), 52)
+
+        # check the hand pays out without the folded players
+        rewards = self.dealer.Payout()
+        self.assertEqual(sum(rewards.values()), 6 * 5 + 20)
+
+
+    def testVariants(self):
+        # check variants are selected per dealer
+        dealer = Dealer(len(self.names), variant="joker")
+        self.assertIsInstance(dealer.cards, JokerHandTracker)
+        self.assertRaises(KeyError, Dealer, len(self.names), "razz")
+
+        # check a hand can be paid out with wild cards
+        dealer.InitializeTable([], self.names, 500)
+        dealer.UpdateAnte(5)
+        dealer.ShuffleDeck()
+        dealer.MoveButton()
+        dealer.TakeAnte()
+        dealer.DealHands()
+        rewards = dealer.Payout()
+        self.assertEqual(sum(rewards.values()), 5 * len(self.names))
+        self.assertEqual(abs(dealer.chips), 500 * len(self.names))
+
+
+    def testPolicies(self):
+        class CallingPolicy(Policy):
+            # call everything, stand pat, and count calls of each method
+            def __init__(self):
+                self.calls = {"single" : 0, "batch" : 0}
+            def SelectAmount(self, name, info):
+                self.calls["single"] += 1
+                return info["game"]["call"]
+            def SelectDiscards(self, name, info):
+                self.calls["single"] += 1
+                return []
+            def SelectAmountBatch(self, requests):
+                self.calls["batch"] += 1
+                return super().SelectAmountBatch(requests)
+
+        # begin a hand
+        self.dealer.MoveButton()
+        self.dealer.TakeAnte()
+        self.dealer.DealHands()
+
+        # check bots decide at random by default, sharing one policy
+        policies = {id(self.dealer.action.policies[name]) for name in self.names}
+        self.assertEqual(len(policies), 1)
+        self.assertIsInstance(self.dealer.action.policies[self.names[0]], RandomPolicy)
+        self.assertTrue(set(self.dealer.SelectDiscards(self.names[0])).issubset(self.dealer.cards.Hand(self.names[0])))
+
+        # check the dealer asks each players policy, with their own view
+        policy = CallingPolicy()
+        for name in self.names[:3]:
+            self.dealer.SetPolicy(name, policy)
+        self.assertEqual(self.dealer.SelectAmount(self.names[0]), self.dealer.TableView(self.names[0])["game"]["call"])
+        self.assertEqual(self.dealer.SelectDiscards(self.names[1]), [])
+        self.assertEqual(policy.calls, {"single" : 2, "batch" : 0})
+
+        # check batches ask each policy once for all of its players, in order
+        amounts = self.dealer.SelectAmountBatch(self.names)
+        self.assertEqual(policy.calls, {"single" : 5, "batch" : 1})
+        self.assertEqual(amounts[:3], [0, 0, 0])
+        discards = self.dealer.SelectDiscardsBatch(self.names[::-1])
+        self.assertEqual(discards[-3:], [[], [], []])
+        for name, cards in zip(self.names[::-1], discards):
+            self.assertTrue(set(cards).issubset(self.dealer.cards.Hand(name)))
+
+        # check the base policy must be subclassed
+        self.assertRaises(NotImplementedError, Policy().SelectAmount, self.names[0], self.dealer.TableView(self.names[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -101,5 +101,33 @@ class DeckTest(unittest.TestCase):
             self.assertEqual(len(self.deck), 52)
 
 
+    def testReshuffling(self):
+        # deal five hands and muck some of their cards
+        self.deck.Shuffle()
+        hands = [[next(self.deck) for _ in range(5)] for _ in range(5)]
+        for hand in hands[:4]:
+            self.deck.Muck(hand[:3])
+        # deal the rest of the deck
+        stub = [next(self.deck) for _ in range(len(self.deck))]
+        held = [card for hand in hands for card in hand[3:]] + hands[4][:3] + stub
+
+        # reshuffle muck
+        self.deck.Reshuffle()
+
+        # check held cards stay departed and mucked cards are returned to the deck
+        self.assertEqual(set(self.deck.DepartedCards()), set(held))
+        self.assertEqual(set(self.deck.RemainingCards()), {card for hand in hands[:4] for card in hand[:3]})
+        self.assertEqual(len(self.deck), 12)
+        self.assertEqual(self.deck.muck, [])
+        # check each card is unique
+        self.assertEqual(len(set(self.deck.state)), 52)
+
+        # check collecting empties the muck
+        self.deck.Muck([next(self.deck)])
+        self.deck.CollectCards()
+        self.assertEqual(self.deck.muck, [])
+        self.assertEqual(len(self.deck), 52)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
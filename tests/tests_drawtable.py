@@ -0,0 +1,89 @@
+import os
+import random
+import tempfile
+import unittest
+from fivecarddraw import Card, Dealer, HandTracker
+from drawtable import Build, Canonical, CanonicalHands, DrawTable, DrawTablePolicy, Hand, Layout
+
+
+class DrawTableTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so games are reproducible
+        random.seed(9)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "draws.bin")
+
+
+    def testCanonicalHands(self):
+        keys = CanonicalHands()
+        self.assertEqual(len(keys), 134459)
+        # check hands differing only by suit share a key, and canonical hands are their own canonical form
+        hand = [Card(12, 0), Card(12, 1), Card(3, 2), Card(7, 3), Card(9, 0)]
+        relabelled = [Card(card.value_i, (card.suit_i + 1) % 4) for card in hand]
+        self.assertEqual(Canonical(hand)[0], Canonical(relabelled)[0])
+        for key in keys[::1000]:
+            self.assertEqual(Canonical(Hand(key))[0], key)
+
+
+    def testResuming(self):
+        # solve the first chunk, as if the build was interrupted
+        keys = CanonicalHands()
+        chunks = -(-len(keys) // 8)
+        self.assertEqual(Build(self.path, samples=10, processes=1, chunks=1, chunk=8), chunks - 1)
+        layout = Layout(len(keys), 8)
+        with open(self.path, "rb") as file:
+            first = file.read()[layout["records"] : layout["records"] + 8 * 128]
+
+        # check resuming solves only the chunks left, across processes, without changing solved chunks
+        self.assertEqual(Build(self.path, samples=10, processes=2, chunks=2, chunk=8), chunks - 3)
+        with open(self.path, "rb") as file:
+            self.assertEqual(file.read()[layout["records"] : layout["records"] + 8 * 128], first)
+
+        # check solved hands have a legal best option, winning at least as often as the others
+        tracker = HandTracker()
+        with DrawTable(self.path) as table:
+            for key in keys[:24]:
+                hand = Hand(key)
+                random.shuffle(hand)
+                discards = table.BestDiscards(hand)
+                self.assertTrue(tracker.AllowDiscards(hand, discards))
+                options = table.Options(hand)
+                self.assertEqual(max(win for *_, win in options), [win for cards, _, win in options if cards == discards][0])
+            # check unsolved hands aren't answered
+            self.assertIsNone(table.BestDiscards(Hand(keys[24])))
+            self.assertEqual(table.Options(Hand(keys[-1])), [])
+
+
+    def testPolicy(self):
+        Build(self.path, samples=10, processes=1, chunks=1, chunk=8)
+        with DrawTable(self.path) as table:
+            policy = DrawTablePolicy(table)
+            dealer = Dealer(4)
+            dealer.InitializeTable([], ["A", "B", "C", "D"], 500, policy=policy)
+            dealer.UpdateAnte(5)
+            dealer.ShuffleDeck()
+            dealer.MoveButton()
+            dealer.TakeAnte()
+            dealer.DealHands()
+            # check hands the table hasn't solved are decided by the fallback policy
+            for name in dealer.TrackedPlayers():
+                discards = dealer.SelectDiscards(name)
+                self.assertTrue(set(discards).issubset(dealer.cards.Hand(name)))
+            # check solved hands are looked up
+            hand = Hand(CanonicalHands()[0])
+            info = {"self" : {"hand" : {"cards" : hand}}}
+            self.assertEqual(policy.SelectDiscards("A", info), table.BestDiscards(hand))
+
+            # check hands with a joker aren't looked up, and tables of other variants are refused
+            dealer = Dealer(4, variant="joker")
+            hand = hand[:4] + [dealer.cards.DECK.state[-1]]
+            self.assertRaises(ValueError, Canonical, hand)
+            info = {"self" : {"hand" : {"cards" : hand}}, "game" : {}}
+            self.assertTrue(set(policy.SelectDiscards("A", info)).issubset(hand))
+            self.assertRaises(ValueError, DrawTablePolicy, table, tracker=dealer.cards)
+            self.assertEqual(DrawTablePolicy(table, tracker=Dealer(4).cards).table, table)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+import os
+import random
+import tempfile
+import unittest
+import handhistory
+from fivecarddraw import VARIANTS, Dealer
+from handhistory import HistoryIndex, HistoryReader, HistoryWriter, HistoryFiles
+from tests.fixtures import RecordedGame
+
+
+class HandHistoryTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so games are reproducible
+        random.seed(0)
+        # create a directory for hand histories
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "hands.fcdh")
+
+
+    def testRoundTrip(self):
+        # check recording with and without compression
+        for compress in [False, True]:
+            path = f"{self.path}.{int(compress)}"
+            with HistoryWriter(path, compress=compress, block_size=512) as writer:
+                game = RecordedGame(writer)
+            hands = list(HistoryReader(path))
+
+            # check every hand was recorded in order
+            self.assertEqual(len(hands), writer.hand_id)
+            self.assertEqual([hand.hand_id for hand in hands], list(range(len(hands))))
+
+            for hand in hands:
+                codes = [event[0] for event in hand.events]
+                # check every hand has an ante for each player, a deal and a payout
+                self.assertEqual(codes.count(handhistory.ANTE), len(hand.players))
+                self.assertEqual(codes.count(handhistory.DEAL), 1)
+                self.assertTrue(codes.count(handhistory.PAYOUT))
+
+                # check chips are conserved
+                before = sum(stack for _, _, stack in hand.players)
+                self.assertEqual(before, sum(hand.stacks.values()))
+
+                # check stacks are explained by the events
+                stacks = {name : stack for name, _, stack in hand.players}
+                for event in hand.events:
+                    if event[0] in (handhistory.ANTE, handhistory.BET):
+                        stacks[event[1]] -= event[2]
+                    elif event[0] == handhistory.PAYOUT:
+                        stacks[event[1]] += event[2]
+                self.assertEqual(stacks, hand.stacks)
+
+            # check the last hand matches the final standings
+            self.assertEqual(hands[-1].stacks[game.dealer.TrackedPlayers()[0]], 2000)
+
+
+    def testRandomAccess(self):
+        # record hands
+        with HistoryWriter(self.path, compress=True, block_size=256) as writer:
+            RecordedGame(writer)
+
+        # check each hand can be read from its position
+        reader = HistoryReader(self.path)
+        for offset, position, payload in reader.Records():
+            hand = handhistory.DecodeHand(payload)
+            self.assertEqual(reader.HandAt(offset, position).events, hand.events)
+
+
+    def testRotation(self):
+        # record hands into small files
+        with HistoryWriter(self.path, block_size=64, max_bytes=256) as writer:
+            RecordedGame(writer)
+
+        # check files were rotated and found
+        paths = HistoryFiles(self.path)
+        self.assertEqual(paths, writer.paths)
+        self.assertGreater(len(paths), 1)
+
+        # check hands continue across files
+        hand_ids = [hand.hand_id for path in paths for hand in HistoryReader(path)]
+        self.assertEqual(hand_ids, list(range(writer.hand_id)))
+
+        # check appending to an existing file
+        with HistoryWriter(self.path, hand_id=writer.hand_id) as appender:
+            RecordedGame(appender)
+        hand_ids = [hand.hand_id for hand in HistoryReader(self.path)]
+        self.assertEqual(hand_ids[-1], appender.hand_id - 1)
+
+
+    def testIndexing(self):
+        # record hands with an index
+        with HistoryWriter(self.path, compress=True, block_size=256, index=True) as writer:
+            for _ in range(10):
+                RecordedGame(writer)
+        hands = list(HistoryReader(self.path))
+
+        with HistoryIndex(self.path) as index:
+            # check every hand is indexed
+            self.assertEqual(len(index), len(hands))
+
+            # check hands are fetched by id
+            for hand in hands:
+                self.assertEqual(index.Hand(hand.hand_id).events, hand.events)
+            self.assertRaises(KeyError, index.Hand, len(hands))
+
+            # check filters match a full scan
+            pots = {hand.hand_id : sum(event[2] for event in hand.events if event[0] in (handhistory.ANTE, handhistory.BET)) for hand in hands}
+            pot = sorted(pots.values())[len(pots) // 2]
+            self.assertEqual(index.Filter(pot=(pot, None)), [hand_id for hand_id in pots if pots[hand_id] >= pot])
+
+            name = hands[-1].players[0][0]
+            dealt = [hand.hand_id for hand in hands if name in hand.stacks]
+            self.assertEqual(index.Filter(players=[name]), dealt)
+
+            shown = {}
+            for hand in hands:
+                ranks = [event[2] for event in hand.events if event[0] == handhistory.SHOWDOWN]
+                if ranks:
+                    shown[hand.hand_id] = min(ranks)
+            pairs = [hand_id for hand_id, rank_n in shown.items() if 2468 <= rank_n <= 3325]
+            self.assertTrue(pairs)
+            self.assertEqual(index.Filter(rank_c="two pair"), pairs)
+            self.assertEqual(index.Filter(rank_c="two pair", players=[name]), [hand_id for hand_id in pairs if hand_id in dealt])
+
+            # check filtered hands are fetched in order
+            self.assertEqual([hand.hand_id for hand in index.Hands(dealt)], dealt)
+
+        # check categories are looked up by the rules of the variant played
+        low, high = VARIANTS["ace to five"].CATEGORIES["pair"]
+        with HistoryIndex(self.path, variant="ace to five") as index:
+            self.assertEqual(index.Filter(rank_c="pair"), [hand_id for hand_id in shown if low <= shown[hand_id] <= high])
+
+        # check appending continues the index and its ids, and the index is written as blocks are
+        with HistoryWriter(self.path, block_size=64, index=True) as appender:
+            self.assertEqual(appender.hand_id, len(hands))
+            RecordedGame(appender)
+            # check written blocks are appended to a tail, which lookups and filters merge
+            self.assertTrue(os.path.exists(handhistory.TailPath(self.path)))
+            written = list(HistoryReader(self.path))
+            with HistoryIndex(self.path) as index:
+                self.assertGreater(len(index), len(hands))
+                self.assertEqual(len(index), len(written))
+                self.assertEqual(index.Hand(written[-1].hand_id).events, written[-1].events)
+                self.assertEqual(index.Filter(players=[name]), [hand.hand_id for hand in written if name in hand.stacks])
+                self.assertEqual(index.Filter(pot=(0, None)), [hand.hand_id for hand in written])
+            # check an index is continued from its tail
+            builder = handhistory.IndexBuilder(self.path)
+            builder.Load()
+            self.assertEqual(list(builder.hand_ids), [hand.hand_id for hand in written])
+            self.assertEqual(sum(map(len, builder.players.values())), sum(len(hand.players) for hand in written))
+        # check closing sorts the tail into the index
+        self.assertFalse(os.path.exists(handhistory.TailPath(self.path)))
+        with HistoryIndex(self.path) as index:
+            self.assertEqual(len(index), appender.hand_id)
+            self.assertEqual(list(index.hand_ids), list(range(appender.hand_id)))
+            self.assertEqual(index.Hand(appender.hand_id - 1).hand_id, appender.hand_id - 1)
+            rows = index.Filter(players=[name])
+
+        # check a missing index is rebuilt from the hands when appending
+        os.remove(handhistory.IndexPath(self.path))
+        with HistoryWriter(self.path, index=True) as appender:
+            RecordedGame(appender)
+        hands = list(HistoryReader(self.path))
+        with HistoryIndex(self.path) as index:
+            self.assertEqual(list(index.hand_ids), [hand.hand_id for hand in hands])
+            self.assertEqual(index.Filter(players=[name])[:len(rows)], rows)
+            self.assertEqual(index.Filter(rank_c="two pair")[:len(pairs)], pairs)
+
+        # check ids must increase
+        builder = handhistory.IndexBuilder(self.path)
+        builder.Add(1, 0, 0, handhistory.NO_SHOWDOWN, [name])
+        self.assertRaises(ValueError, builder.Add, 1, 0, 0, handhistory.NO_SHOWDOWN, [name])
+
+
+    def testVariants(self):
+        # check the variant is recorded in the header
+        with HistoryWriter(self.path, index=True, variant="deuce to seven") as writer:
+            dealer = Dealer(3, variant="deuce to seven")
+            dealer.RecordHistory(writer)
+        self.assertEqual(HistoryReader(self.path).variant, "deuce to seven")
+        with HistoryIndex(self.path) as index:
+            self.assertEqual(index.variant, "deuce to seven")
+
+        # check hands of another variant can't be recorded or appended
+        with HistoryWriter(f"{self.path}.2") as writer:
+            self.assertRaises(ValueError, Dealer(3, variant="joker").RecordHistory, writer)
+        self.assertRaises(ValueError, HistoryWriter, self.path)
+        self.assertRaises(KeyError, HistoryWriter, self.path, variant="razz")
+
+
+
+if __name__ == "__main__":
+    unittest.main()
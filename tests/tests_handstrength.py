@@ -0,0 +1,78 @@
+import os
+import random
+import tempfile
+import unittest
+from itertools import combinations
+from math import comb
+from fivecarddraw import Card, HandTracker
+from drawtable import Canonical, CanonicalHands, Hand
+from handstrength import HANDS, RATINGS, SCALE, Build, Distribution, HandStrength, Percentiles, RankCounts, SolveEquity, StrengthPolicy
+
+
+class HandStrengthTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so games are reproducible
+        random.seed(10)
+        self.tracker = HandTracker()
+
+
+    def testPercentiles(self):
+        # check every hand is counted, with four royal flushes and 1020 of the worst high cards
+        counts = RankCounts()
+        self.assertEqual(sum(counts), HANDS)
+        self.assertEqual((counts[1], counts[RATINGS]), (4, 1020))
+        # check percentiles fall as hands get worse, and split the hands evenly
+        percentiles = Percentiles()
+        self.assertTrue(all(percentiles[rank_n] > percentiles[rank_n + 1] for rank_n in range(1, RATINGS)))
+        self.assertAlmostEqual(sum(percentiles[rank_n] * counts[rank_n] for rank_n in range(1, RATINGS + 1)) / HANDS, 50)
+
+
+    def testDistributions(self):
+        # check hands counted from the ratings agree with enumerating them
+        cards = [Card(12, 2), Card(11, 2)]
+        ranks, better = Distribution(Canonical(cards)[0])
+        deck = [Card(value, suit) for value in range(13) for suit in range(4)]
+        counted = {}
+        for others in combinations([card for card in deck if card not in cards], 3):
+            rank_n = self.tracker.EvaluateHand(cards + [*others])
+            counted[rank_n] = counted.get(rank_n, 0) + 1
+        self.assertEqual([*ranks], sorted(counted))
+        self.assertEqual([better[i + 1] - better[i] for i in range(len(ranks))], [counted[rank_n] for rank_n in ranks])
+
+
+    def testEquity(self):
+        # check a royal flush only ties with the other royal flushes
+        royal = [Card(value, 1) for value in range(8, 13)]
+        self.assertAlmostEqual(SolveEquity(self.tracker, royal), 1 - 1.5 / comb(47, 5))
+
+        # check equities are looked up by canonical hand, and hands left unsolved aren't answered
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "equity.bin")
+        keys = CanonicalHands()
+        Build(path, 20)
+        strength = HandStrength(path)
+        for key in keys[:20]:
+            hand = [Card(card.value_i, (card.suit_i + 2) % 4) for card in Hand(key)]
+            self.assertEqual(round(SCALE * strength.Equity(hand)), round(SCALE * SolveEquity(self.tracker, Hand(key))))
+        self.assertIsNone(strength.Equity(Hand(keys[20])))
+        self.assertIsNone(HandStrength(os.path.join(directory.name, "missing.bin")).Equity(Hand(keys[0])))
+
+
+    def testPolicy(self):
+        policy = StrengthPolicy(calling = 50, raising = 90)
+        info = {"self" : {"hand" : {"cards" : None}, "chips" : {"stack" : 500}}, "game" : {"call" : 10, "pot" : 40}}
+        # check strong hands bet the pot, middling hands call and weak hands fold
+        for cards, amount in [([Card(12, 0), Card(12, 1), Card(12, 2), Card(3, 0), Card(5, 1)], 40),
+                              ([Card(2, 0), Card(2, 1), Card(9, 2), Card(3, 0), Card(5, 1)], 10),
+                              ([Card(0, 0), Card(1, 1), Card(2, 2), Card(3, 0), Card(5, 1)], 0)]:
+            info["self"]["hand"]["cards"] = cards
+            self.assertEqual(policy.SelectAmount("A", info), amount)
+        # check bets beyond the stack go all-in
+        info["self"]["chips"]["stack"] = 25
+        info["self"]["hand"]["cards"] = [Card(12, 0), Card(12, 1), Card(12, 2), Card(3, 0), Card(5, 1)]
+        self.assertEqual(policy.SelectAmount("A", info), 25)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,7 @@
+import os
+import tempfile
 import unittest
-from fivecarddraw import Card, HandTracker
+from fivecarddraw import CATEGORIES, Card, HandTracker, Ratings
 
 class HandTrackerTest(unittest.TestCase):
     def setUp(self):
@@ -248,6 +250,42 @@ class HandTrackerTest(unittest.TestCase):
                     self.assertEqual(self.tracker.DECK.DepartedCards().count(card), 1)
 
 
+    def testReshuffling(self):
+        # check dealing more hands than the deck holds fails
+        self.tracker.ShuffleDeck()
+        self.tracker.TrackPlayers([f"{i}" for i in range(11)])
+        self.assertRaises(Exception, self.tracker.DealPlayersIn)
+        self.tracker.CollectCards()
+
+        # deal a full table, leaving 2 cards in the deck
+        names = [f"{i}" for i in range(10)]
+        self.tracker.TrackPlayers(names)
+        self.tracker.ShuffleDeck()
+        self.tracker.DealPlayersIn()
+
+        # cycle tests through every player drawing two cards
+        for name in names:
+            discards = self.tracker.Hand(name)[:2]
+            # check the muck is only reshuffled once the deck runs dry
+            self.assertEqual(self.tracker.SwapPlayersCards(name, discards), name != "0")
+
+            # check each card in play is unique
+            cards = [card for name in names for card in self.tracker.Hand(name)]
+            self.assertEqual(len(set(cards)), 50)
+            # check players don't draw their own discards
+            self.assertFalse(set(discards).intersection(set(self.tracker.Hand(name))))
+            # check cards in hands are departed and the deck and muck hold the rest
+            self.assertTrue(set(cards).issubset(set(self.tracker.DECK.DepartedCards())))
+            self.assertFalse(set(cards).intersection(set(self.tracker.DECK.RemainingCards() + self.tracker.DECK.muck)))
+            self.assertEqual(len(self.tracker.DECK.state), 52)
+
+        # check players can draw more cards than the muck holds, by reshuffling their own discards too
+        self.assertTrue(self.tracker.SwapPlayersCards("0", self.tracker.Hand("0")[:4]))
+        cards = [card for name in names for card in self.tracker.Hand(name)]
+        self.assertEqual(len(set(cards)), 50)
+        self.assertEqual(self.tracker.DECK.muck, [])
+
+
     def testEncoding(self):
         # create selected hands
         hands = [
@@ -304,24 +342,16 @@ class HandTrackerTest(unittest.TestCase):
 
         
     def testHandRankDicts(self):
-        # check each hand ranking attribute has correct amount of keys
+        # check each hand ranking attribute has correct amount of hands
         self.assertEqual(len(self.tracker.DUPE_RANKS), 4888)
-        self.assertEqual(len(self.tracker.UNIQUE5_RANKS), 1287)
-        self.assertEqual(len(self.tracker.FLUSH_RANKS), 1287)
+        self.assertEqual(len([v for v in self.tracker.UNIQUE5_RANKS if v]), 1287)
+        self.assertEqual(len([v for v in self.tracker.FLUSH_RANKS if v]), 1287)
 
-        # check each entry in each hand ranking attribute has correct structure
+        # check each entry in each hand ranking attribute is a numerical rating
         for v in self.tracker.DUPE_RANKS.values():
-            self.assertEqual(len(v), 2)
-            self.assertIsInstance(v[0], int)
-            self.assertIsInstance(v[1], str)
-        for v in self.tracker.UNIQUE5_RANKS.values():
-            self.assertEqual(len(v), 2)
-            self.assertIsInstance(v[0], int)
-            self.assertIsInstance(v[1], str)
-        for v in self.tracker.FLUSH_RANKS.values():
-            self.assertEqual(len(v), 2)
-            self.assertIsInstance(v[0], int)
-            self.assertIsInstance(v[1], str)
+            self.assertIsInstance(v, int)
+        ratings = [*self.tracker.DUPE_RANKS.values()] + [v for v in self.tracker.UNIQUE5_RANKS if v] + [v for v in self.tracker.FLUSH_RANKS if v]
+        self.assertEqual(sorted(ratings), list(range(1, 7463)))
 
         # create selected hands
         hands = [
@@ -339,13 +369,34 @@ class HandTrackerTest(unittest.TestCase):
         # check hands are accounted for in the correct hand ranking attribute 
         for i, hand in enumerate(hands):
             if i in [5, 8, 9]:
-                self.assertIn(self.tracker.TwosEncoding(hand), self.tracker.FLUSH_RANKS)
+                self.assertTrue(self.tracker.FLUSH_RANKS[self.tracker.TwosEncoding(hand)])
             elif i in [0, 4]:
-                self.assertIn(self.tracker.TwosEncoding(hand), self.tracker.UNIQUE5_RANKS)
+                self.assertTrue(self.tracker.UNIQUE5_RANKS[self.tracker.TwosEncoding(hand)])
             else:
                 self.assertIn(self.tracker.PrimesEncoding(hand), self.tracker.DUPE_RANKS)
     
 
+    def testLazyLoading(self):
+        # create a tracker class whose ratings haven't been loaded by other tests
+        class FreshHandTracker(HandTracker):
+            FLUSH_RANKS, UNIQUE5_RANKS, DUPE_RANKS = Ratings(), Ratings(), Ratings()
+
+        # check ratings aren't loaded by creating a tracker
+        tracker = FreshHandTracker()
+        self.assertIsInstance(vars(FreshHandTracker)["FLUSH_RANKS"], Ratings)
+
+        # check ratings load on first evaluation, from outside the repository
+        cwd = os.getcwd()
+        self.addCleanup(os.chdir, cwd)
+        os.chdir(tempfile.gettempdir())
+        hand = [Card(12,0), Card(11,0), Card(10,0), Card(9,0), Card(8,0)]
+        self.assertEqual(tracker.EvaluateHand(hand), 1)
+
+        # check ratings are shared by trackers
+        self.assertIs(FreshHandTracker().FLUSH_RANKS, tracker.FLUSH_RANKS)
+        self.assertIs(vars(FreshHandTracker)["FLUSH_RANKS"], tracker.FLUSH_RANKS)
+
+
     def testEvaluating(self):
         # create selected hands
         hands = [
@@ -374,9 +425,9 @@ class HandTrackerTest(unittest.TestCase):
         # untracked hands
         for i, hand in enumerate(hands):
             # check hand is numerically ranked correctly
-            self.assertEqual(self.tracker.EvaluateHand(hand)[0], numbers[i])
+            self.assertEqual(self.tracker.EvaluateHand(hand), numbers[i])
             # check hand is categorised correctly
-            self.assertEqual(self.tracker.EvaluateHand(hand)[1], categories[i])
+            self.assertEqual(self.tracker.Category(self.tracker.EvaluateHand(hand)), categories[i])
 
         # tracked hands
         names = [f"{j}" for j in range(10)]
@@ -389,7 +440,46 @@ class HandTrackerTest(unittest.TestCase):
             # check hand is numerically ranked correctly
             self.assertEqual(self.tracker.players[name]["rank_n"], numbers[int(i)])
             # check hand is categorised correctly
-            self.assertEqual(self.tracker.players[name]["rank_c"], categories[int(i)])
+            self.assertEqual(self.tracker.Category(self.tracker.players[name]["rank_n"]), categories[int(i)])
+
+        # check categories cover their whole range of numerical ratings
+        for category, (best, worst) in CATEGORIES.items():
+            self.assertEqual(self.tracker.Category(best), category)
+            self.assertEqual(self.tracker.Category(worst), category)
+
+
+    def testDirtyTracking(self):
+        # track players and deal them hands
+        self.tracker.ShuffleDeck()
+        names = [f"{j}" for j in range(6)]
+        self.tracker.TrackPlayers(names)
+
+        # check players without cards don't need evaluating
+        self.assertFalse(self.tracker.dirty)
+
+        # check dealt hands need evaluating
+        self.tracker.DealPlayersIn()
+        self.assertEqual(self.tracker.dirty, set(names))
+
+        # check evaluating clears every flag
+        self.tracker.EvaluatePlayersIn()
+        self.assertFalse(self.tracker.dirty)
+
+        # check swapping only flags the swapping player
+        name = names[0]
+        hand = self.tracker.Hand(name)
+        self.tracker.SwapPlayersCards(name, hand[:3])
+        self.assertEqual(self.tracker.dirty, {name})
+
+        # check ranks are evaluated when read
+        rank_n = self.tracker.Rank(name)
+        self.assertEqual(rank_n, self.tracker.EvaluateHand(self.tracker.Hand(name)))
+        self.assertFalse(self.tracker.dirty)
+
+        # check untracking forgets flags
+        self.tracker.SwapPlayersCards(name, self.tracker.Hand(name)[:1])
+        self.tracker.UntrackPlayers([name])
+        self.assertFalse(self.tracker.dirty)
 
 
 if __name__ == "__main__":
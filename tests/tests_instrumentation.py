@@ -0,0 +1,90 @@
+import os
+import random
+import tempfile
+import unittest
+from fivecarddraw import HeadlessTable, SpectateGame
+from instrumentation import DEALER_METHODS, PHASES, TableProfiler
+
+
+class TableProfilerTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so games are reproducible
+        random.seed(3)
+        # profile a humanless game
+        self.profiler = TableProfiler("test")
+        self.game = SpectateGame(profiler=self.profiler)
+
+
+    def testTimings(self):
+        snapshot = self.profiler.Snapshot()
+        self.assertEqual(snapshot["table"], "test")
+
+        # check every phase was timed, once per hand for the evaluation phase
+        hands = snapshot["phase"]["EvaluationPhase"]["count"]
+        self.assertTrue(hands)
+        self.assertEqual(snapshot["phase"]["NewHand"]["count"], hands + 1)
+        self.assertEqual(snapshot["phase"]["BettingPhase"]["count"], 2 * hands)
+        self.assertEqual(snapshot["dealer"]["Payout"]["count"], hands)
+
+        # check bucket counts add up
+        for histograms in (snapshot["phase"], snapshot["dealer"]):
+            for histogram in histograms.values():
+                self.assertEqual(sum(histogram["buckets"].values()), histogram["count"])
+                self.assertGreaterEqual(histogram["total"], 0)
+
+        # check each bots decisions were timed
+        for name in self.game.OPPONENTS:
+            self.assertIn(name, snapshot["decision"]["SelectDiscards"])
+
+        # check bots deciding in a batch are each timed for the whole batch
+        table = HeadlessTable(4)
+        profiler = TableProfiler("batch")
+        profiler.Attach(table)
+        table.dealer.ShuffleDeck()
+        table.dealer.MoveButton()
+        table.dealer.TakeAnte()
+        table.dealer.DealHands()
+        table.dealer.SelectDiscardsBatch(table.OPPONENTS)
+        batches = profiler.Snapshot()["decision"]["SelectDiscardsBatch"]
+        self.assertEqual(sorted(batches), table.OPPONENTS)
+        self.assertEqual(len({histogram["total"] for histogram in batches.values()}), 1)
+        profiler.Detach()
+        self.assertNotIn("SelectDiscardsBatch", vars(table.dealer.action))
+
+        # check detaching restores the original methods
+        self.profiler.Detach()
+        for method in PHASES:
+            self.assertNotIn(method, vars(self.game))
+        for method in DEALER_METHODS:
+            self.assertNotIn(method, vars(self.game.dealer))
+
+
+    def testPrometheus(self):
+        # check text format has a type, buckets, sum and count for each histogram
+        text = self.profiler.Prometheus()
+        self.assertIn("# TYPE fivecarddraw_phase_seconds histogram", text)
+        self.assertIn('fivecarddraw_dealer_seconds_count{table="test",method="TakeAnte"}', text)
+        self.assertIn('fivecarddraw_phase_seconds_bucket{table="test",method="NewHand",le="+Inf"}', text)
+
+        # check buckets are cumulative
+        counts = [int(line.split()[-1]) for line in text.splitlines() if line.startswith('fivecarddraw_phase_seconds_bucket{table="test",method="NewHand"')]
+        self.assertEqual(counts, sorted(counts))
+
+        # check label values are escaped
+        profiler = TableProfiler('a "b"\\c\nd')
+        profiler.Histogram("decision", "SelectAmount", 'Bot "1"').Observe(0.001)
+        text = profiler.Prometheus()
+        self.assertIn('{table="a \\"b\\"\\\\c\\nd",method="SelectAmount",player="Bot \\"1\\"",le="+Inf"} 1', text)
+        self.assertEqual(len(text.splitlines()), len(profiler.histograms) * 24 + 1)
+        text = self.profiler.Prometheus()
+
+        # check text file is written
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "table.prom")
+            self.profiler.WritePrometheus(path)
+            with open(path) as file:
+                self.assertEqual(file.read(), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
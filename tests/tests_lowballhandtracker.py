@@ -0,0 +1,74 @@
+import random
+import unittest
+from fivecarddraw import AceToFiveHandTracker, Card, Dealer, DeuceToSevenHandTracker, HandTracker
+
+
+class LowballHandTrackerTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so hands are reproducible
+        random.seed(5)
+        # create trackers
+        self.tracker = HandTracker()
+        self.deuce_to_seven = DeuceToSevenHandTracker()
+        self.ace_to_five = AceToFiveHandTracker()
+        self.cards = [Card(v, s) for v in range(13) for s in range(4)]
+
+
+    def Ratings(self, tracker):
+        # gather every rating in the tables of a tracker
+        return sorted({*tracker.DUPE_RANKS.values(), *(v for v in tracker.UNIQUE5_RANKS if v), *(v for v in tracker.FLUSH_RANKS if v)})
+
+
+    def testEvaluating(self):
+        # check selected hands
+        hands = [
+            ([Card(5,0), Card(3,1), Card(2,2), Card(1,3), Card(0,0)], self.deuce_to_seven, 1, "high card"),
+            ([Card(12,0), Card(3,1), Card(2,2), Card(1,3), Card(0,0)], self.deuce_to_seven, 785, "high card"),
+            ([Card(12,2), Card(11,2), Card(10,2), Card(9,2), Card(8,2)], self.deuce_to_seven, 7462, "royal flush"),
+            ([Card(12,0), Card(3,0), Card(2,0), Card(1,0), Card(0,0)], self.ace_to_five, 1, "high card"),
+            ([Card(12,0), Card(12,1), Card(0,2), Card(1,3), Card(2,0)], self.ace_to_five, 1288, "pair"),
+            ([Card(11,0), Card(11,1), Card(11,2), Card(11,3), Card(10,0)], self.ace_to_five, 6175, "four of a kind")]
+        for hand, tracker, rank_n, rank_c in hands:
+            self.assertEqual(tracker.EvaluateHand(hand), rank_n)
+            self.assertEqual(tracker.Category(rank_n), rank_c)
+
+        # check every class of hand is rated once, and categories cover the ratings
+        for tracker, n in [(self.deuce_to_seven, 7462), (self.ace_to_five, 6175)]:
+            self.assertEqual(self.Ratings(tracker), list(range(1, n + 1)))
+            ranges = [*tracker.CATEGORIES.values()]
+            self.assertEqual([best for best, _ in ranges[1:]], [worst + 1 for _, worst in ranges[:-1]])
+            self.assertEqual(ranges[-1][1], n)
+
+        # check deuce to seven reverses five card draw, apart from the wheel
+        for _ in range(200):
+            a, b = random.sample(self.cards, 5), random.sample(self.cards, 5)
+            if {12, 0, 1, 2, 3} in [{card.value_i for card in hand} for hand in [a, b]]:
+                continue
+            high = self.tracker.EvaluateHand(a) - self.tracker.EvaluateHand(b)
+            low = self.deuce_to_seven.EvaluateHand(a) - self.deuce_to_seven.EvaluateHand(b)
+            self.assertEqual(high > 0, low < 0 or high == low == 0)
+
+        # check ace to five ignores suits
+        for _ in range(200):
+            hand = random.sample(self.cards, 5)
+            unsuited = [Card(card.value_i, i) for i, card in enumerate(hand)]
+            self.assertEqual(self.ace_to_five.EvaluateHand(hand), self.ace_to_five.EvaluateHand(unsuited))
+
+
+    def testPayout(self):
+        # check the lowest hand wins at a lowball table
+        names = [f"{i}" for i in range(6)]
+        dealer = Dealer(len(names), variant="ace to five")
+        dealer.InitializeTable([], names, 500)
+        dealer.UpdateAnte(5)
+        dealer.ShuffleDeck()
+        dealer.MoveButton()
+        dealer.TakeAnte()
+        dealer.DealHands()
+        rewards = dealer.Payout()
+        best = min(dealer.cards.Rank(name) for name in names)
+        self.assertEqual({name for name in names if rewards.get(name)}, {name for name in names if dealer.cards.Rank(name) == best})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import random
+import unittest
+from fivecarddraw import Dealer
+from mcts import MCTSPolicy, Simulation
+from tests.fixtures import HeadlessTable
+
+
+class MCTSTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so games are reproducible
+        random.seed(11)
+        # deal a table
+        self.dealer = Dealer(4, "deuces")
+        self.names = ["A", "B", "C", "D"]
+        self.dealer.InitializeTable([], self.names, 500)
+        self.dealer.UpdateAnte(5)
+        self.dealer.ShuffleDeck()
+        self.dealer.MoveButton()
+        self.dealer.TakeAnte()
+        self.dealer.DealHands()
+
+
+    def testCloning(self):
+        hands = {name : self.dealer.cards.Hand(name)[:] for name in self.names}
+        t, stacks = self.dealer.cards.DECK.t, {name : self.dealer.chips.Stack(name) for name in self.names}
+        seats = self.dealer.seats.seats[:]
+
+        # check playing on a clone logs nothing and leaves the table as it was
+        clone = self.dealer.Clone()
+        self.assertIs(type(clone.cards), type(self.dealer.cards))
+        with self.assertNoLogs("fivecarddraw"):
+            order = clone.PreflopOrder()
+            clone.TakeBet(order[0], 100)
+            clone.TakeBet(order[1], 0)
+            clone.EditHand(order[2], clone.cards.Hand(order[2])[:3])
+            clone.KickPlayers([order[1]])
+        self.assertEqual({name : self.dealer.cards.Hand(name) for name in self.names}, hands)
+        self.assertEqual({name : self.dealer.chips.Stack(name) for name in self.names}, stacks)
+        self.assertEqual((self.dealer.cards.DECK.t, self.dealer.cards.DECK.muck, self.dealer.drawn), (t, [], {}))
+        self.assertEqual(self.dealer.seats.seats, seats)
+        self.assertFalse(any(any(status.values()) for status in self.dealer.action.players.values()))
+        # check the table still logs
+        with self.assertLogs("fivecarddraw", "INFO"):
+            self.dealer.TakeBet(order[0], 0)
+
+
+    def testSimulation(self):
+        # check a hand plays out through each phase, without losing chips
+        simulation = Simulation(self.dealer.Clone(), "preflop")
+        phases = []
+        while (decision := simulation.Next()):
+            name, kind = decision
+            phases.append(simulation.phase)
+            simulation.Apply(name, kind, random.choice(simulation.Actions(name, kind)))
+        self.assertEqual(phases[0], "preflop")
+        self.assertEqual(sum(simulation.Rewards().values()), 2000)
+
+
+    def testSearching(self):
+        policy = MCTSPolicy(self.dealer, iterations = 50, seed = 1)
+        name = self.dealer.PreflopOrder()[0]
+        # check cards the searcher can't see are dealt again, keeping the deck whole
+        clone = self.dealer.Clone()
+        policy.Determinise(clone, name)
+        deck = clone.cards.DECK
+        self.assertEqual(clone.cards.Hand(name), self.dealer.cards.Hand(name))
+        self.assertEqual(len(set(deck.state)), 52)
+        self.assertEqual(deck.t, self.dealer.cards.DECK.t)
+        self.assertNotEqual([clone.cards.Hand(other) for other in self.names], [self.dealer.cards.Hand(other) for other in self.names])
+
+        # check a search picks an abstract bet, and searching again reuses the tree
+        amount = policy.SelectAmount(name, self.dealer.TableView(name))
+        self.assertIn(amount, Simulation(self.dealer, "preflop").Actions(name, "amount"))
+        root = max(policy.nodes.values(), key = lambda node : node["visits"])
+        self.assertEqual(root["visits"], 50)
+        policy.SelectAmount(name, self.dealer.TableView(name))
+        self.assertEqual(root["visits"], 100)
+        self.assertEqual(policy.searched, 100)
+
+
+    def testPlaying(self):
+        # check a searching bot plays complete hands within a time budget
+        table = HeadlessTable(4)
+        policy = MCTSPolicy(table.dealer, seconds = 0.002, seed = 2)
+        table.dealer.SetPolicy("Bot 0", policy)
+        for _ in range(3):
+            table.PlayHand()
+            self.assertEqual(abs(table.dealer.chips), 2000)
+        self.assertGreater(policy.Rate(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
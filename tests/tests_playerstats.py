@@ -0,0 +1,87 @@
+import os
+import random
+import tempfile
+import unittest
+from handhistory import HistoryTee, HistoryWriter, HistoryReader
+from playerstats import AggregateFiles, PlayerStats
+from tests.fixtures import RecordedGame
+
+
+class PlayerStatsTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so games are reproducible
+        random.seed(2)
+        # record games while aggregating them live
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.live = PlayerStats()
+        self.paths = []
+        for i in range(3):
+            path = os.path.join(self.directory.name, f"hands{i}.fcdh")
+            with HistoryWriter(path) as writer:
+                for _ in range(3):
+                    RecordedGame(HistoryTee(writer, self.live))
+            self.paths.append(path)
+
+
+    def testAggregating(self):
+        # aggregate hand histories
+        stats = PlayerStats()
+        seats = 0
+        for path in self.paths:
+            for hand in HistoryReader(path):
+                stats.Update(hand)
+                seats += len(hand.players)
+
+        # check live and recorded hands give the same statistics
+        self.assertEqual(stats.Summary(), self.live.Summary())
+
+        summary = stats.Summary()
+        for name in summary:
+            # check frequencies are frequencies
+            for key in ["vpip", "aggression", "showdown_win_rate"]:
+                self.assertGreaterEqual(summary[name][key], 0)
+                self.assertLessEqual(summary[name][key], 1)
+            # check draws are legal
+            self.assertLessEqual(summary[name]["cards_drawn"], 4)
+
+        # check each hand is counted once per player dealt in
+        self.assertEqual(sum(s["hands"] for s in summary.values()), seats)
+        # check chips are conserved
+        self.assertAlmostEqual(sum(s["chips_per_100"] * s["hands"] for s in summary.values()), 0)
+
+
+    def testMerging(self):
+        # aggregate each file separately and merge
+        merged = PlayerStats()
+        for path in self.paths:
+            partial = PlayerStats()
+            for hand in HistoryReader(path):
+                partial.Update(hand)
+            merged.Merge(partial)
+
+        # check merging matches aggregating everything at once
+        self.assertEqual(merged.Summary(), self.live.Summary())
+
+        # check aggregating in worker processes
+        self.assertEqual(AggregateFiles(self.paths, processes=2).Summary(), self.live.Summary())
+
+
+    def testCheckpointing(self):
+        # aggregate some files with a checkpoint
+        checkpoint = os.path.join(self.directory.name, "stats.json")
+        AggregateFiles(self.paths[:2], processes=1, checkpoint=checkpoint)
+
+        # check the checkpoint restores the counters
+        restored = PlayerStats()
+        restored.Load(checkpoint)
+        self.assertEqual(restored.sources, set(self.paths[:2]))
+
+        # check resuming only aggregates the remaining file
+        resumed = AggregateFiles(self.paths, processes=1, checkpoint=checkpoint)
+        self.assertEqual(resumed.sources, set(self.paths))
+        self.assertEqual(resumed.Summary(), self.live.Summary())
+
+
+if __name__ == "__main__":
+    unittest.main()
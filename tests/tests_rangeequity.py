@@ -0,0 +1,74 @@
+import os
+import random
+import tempfile
+import unittest
+from drawtable import CanonicalHands
+from fivecarddraw import CATEGORIES, Card, HandTracker
+from handstrength import HANDS
+from ranges import Class, Classes
+from rangeequity import OPPONENT_HANDS, SCALE, Build, Layout, Multiplicity, RangeEquity, Sizes
+
+
+class RangeEquityTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so games are reproducible
+        random.seed(14)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "rangeequity.bin")
+        self.classes = len(Classes()[1])
+
+
+    def testMultiplicity(self):
+        # check canonical hands stand for every hand once
+        self.assertEqual(sum(Multiplicity(key) for key in CanonicalHands()), HANDS)
+        self.assertEqual(sum(Sizes()), HANDS)
+
+
+    def testBlocking(self):
+        royal, kings = Class(1), Class(2)
+        aces = Class(CATEGORIES["four of a kind"][0])
+        # check resuming solves only the rows left, without changing solved rows
+        self.assertEqual(Build(self.path, [royal, aces], processes = 1), self.classes - 2)
+        with open(self.path, "rb") as file:
+            before = file.read()
+        self.assertEqual(Build(self.path, [royal, kings], processes = 1), self.classes - 3)
+        with RangeEquity(self.path) as matrix:
+            # check royal flushes tie each other, beat straight flushes, and only fit alongside those of other suits
+            self.assertAlmostEqual(matrix.pairs[royal][royal] / SCALE, 12 / 16, 4)
+            self.assertAlmostEqual(matrix.Equity(royal, royal), 0.5, 4)
+            self.assertAlmostEqual(matrix.Equity(royal, kings), 1, 4)
+            self.assertAlmostEqual(matrix.Equity(kings, royal), 0, 4)
+            # check a royal flush blocks four aces, and every row counts every hand an opponent can hold
+            self.assertIsNone(matrix.Equity(royal, aces))
+            start = Layout(self.classes)["rows"] + 4 * self.classes * aces
+            self.assertEqual(matrix.rows[aces].tobytes(), before[start : start + 4 * self.classes])
+            for a in (royal, kings, aces):
+                self.assertAlmostEqual(sum(matrix.pairs[a][b] / SCALE * Sizes()[b] for b in range(self.classes)) / OPPONENT_HANDS, 1, 4)
+
+
+    def testEquity(self):
+        # check a class against a small class agrees with enumerating every pair of hands
+        tracker = HandTracker()
+        aces, kings = Class(CATEGORIES["four of a kind"][0]), Class(CATEGORIES["four of a kind"][0] + 12)
+        deck = [Card(value, suit) for value in range(13) for suit in range(4)]
+        hands = {a : [hand for hand in ([Card(value, suit) for suit in range(4)] + [card] for card in deck if card.value_i != value)]
+                 for a, value in ((aces, 12), (kings, 11))}
+        pairs = [(h1, h2) for h1 in hands[kings] for h2 in hands[aces] if not set(h1) & set(h2)]
+        wins = sum(tracker.EvaluateHand(h1) < tracker.EvaluateHand(h2) for h1, h2 in pairs)
+        Build(self.path, [kings], processes = 1)
+        with RangeEquity(self.path) as matrix:
+            self.assertAlmostEqual(matrix.pairs[kings][aces] / SCALE, len(pairs) / (48 * 48), 4)
+            self.assertAlmostEqual(matrix.Equity(kings, aces), wins / len(pairs), 4)
+            # check ranges are weighted by how likely their hands are to be dealt together, and unsolved rows aren't answered
+            hero, villain = [0.0] * self.classes, [0.0] * self.classes
+            hero[kings] = 1.0
+            villain[aces], villain[Class(6)] = 0.5, 0.5
+            pairs = [matrix.pairs[kings][b] for b in (aces, Class(6))]
+            expected = sum(matrix.Equity(kings, b) * n for b, n in zip((aces, Class(6)), pairs)) / sum(pairs)
+            self.assertAlmostEqual(matrix.Versus(hero, villain), expected)
+            self.assertIsNone(matrix.Versus(villain, hero))
+
+
+if __name__ == "__main__":
+    unittest.main()
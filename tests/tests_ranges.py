@@ -0,0 +1,67 @@
+import random
+import unittest
+from fivecarddraw import CATEGORIES
+from handstrength import RATINGS
+from ranges import Class, Classes, Prior, RangeTracker
+from tests.fixtures import HeadlessTable
+
+
+class RangesTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so games are reproducible
+        random.seed(13)
+        self.tracker = RangeTracker()
+        self.tracker.NewHand(["A", "B"])
+
+
+    def testClasses(self):
+        # check every rating has a class, classes are runs of ratings from the best, and shares of hands add up
+        classes, labels = Classes()
+        self.assertEqual(len(labels), 100)
+        self.assertEqual([Class(rank_n) for rank_n in range(-12, 2)], [0] * 14)
+        self.assertTrue(all(0 <= classes[rank_n + 1] - classes[rank_n] <= 1 for rank_n in range(1, RATINGS)))
+        self.assertEqual(labels[Class(CATEGORIES["pair"][0])], "pair, A")
+        self.assertAlmostEqual(sum(Prior()), 1)
+
+
+    def testDrawing(self):
+        # check standing pat makes a made hand likelier, and drawing three makes a pair or high card likelier
+        straight = Class(CATEGORIES["straight"][0])
+        pair, trips = Class(CATEGORIES["pair"][0]), Class(CATEGORIES["three of a kind"][0])
+        self.tracker.Discard("A", 0)
+        self.tracker.Discard("B", 3)
+        self.assertGreater(self.tracker.Range("A")[straight], 10 * Prior()[straight])
+        self.assertGreater(self.tracker.Range("B")[pair], Prior()[pair])
+        self.assertLess(self.tracker.Range("B")[trips], Prior()[trips] / 10)
+        self.assertGreater(self.tracker.Strength("A"), self.tracker.Strength("B"))
+        self.assertAlmostEqual(sum(self.tracker.Range("B")), 1)
+
+
+    def testBetting(self):
+        status = {"has_raised" : False, "has_allin" : False, "has_mincalled" : True, "has_folded" : False}
+        # check raising makes a range stronger than checking
+        self.tracker.Bet("A", 0, status)
+        self.tracker.Bet("B", 20, dict(status, has_raised = True))
+        self.assertLess(self.tracker.Strength("A"), 50)
+        self.assertGreater(self.tracker.Strength("B"), 50)
+        # check folding drops the range
+        self.tracker.Bet("A", 0, dict(status, has_mincalled = False, has_folded = True))
+        self.assertIsNone(self.tracker.Range("A"))
+        self.assertEqual([*self.tracker.ranges], ["B"])
+
+
+    def testTable(self):
+        # check the dealer tracks a range per player still in the hand, and clones don't track
+        table = HeadlessTable(4)
+        table.dealer.TrackRanges(self.tracker)
+        for _ in range(5):
+            table.PlayHand()
+            self.assertLessEqual(len(self.tracker.ranges), 4)
+            for name in self.tracker.ranges:
+                self.assertAlmostEqual(sum(self.tracker.Range(name)), 1)
+                self.assertFalse(table.dealer.action.players[name]["has_folded"])
+        self.assertIsNone(table.dealer.Clone().ranges)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import time
+import unittest
+from fivecarddraw import CATEGORIES, HandTracker
+from ranktables import GenerateRanks, ParseRanks, ReadRanks, WriteRanks
+
+
+class RankTablesTest(unittest.TestCase):
+    def setUp(self):
+        # time generating the rank tables
+        start = time.perf_counter()
+        self.tables = GenerateRanks()
+        self.seconds = time.perf_counter() - start
+
+
+    def testGenerating(self):
+        # check generated tables match the scraped tables exactly
+        flush_ranks, unique5_ranks, dupe_ranks = self.tables
+        self.assertEqual(self.tables, ParseRanks())
+
+        # check every equivalence class is numbered once
+        ratings = [*dupe_ranks.values()] + [v for v in unique5_ranks if v] + [v for v in flush_ranks if v]
+        self.assertEqual(sorted(ratings), list(range(1, 7463)))
+
+        # check each category has the expected amount of classes, where five of a kind needs wild cards
+        counts, tracker = {category : 0 for category in CATEGORIES}, HandTracker()
+        for rank_n in ratings:
+            counts[tracker.Category(rank_n)] += 1
+        self.assertEqual([*counts.values()], [0, 1, 9, 156, 156, 1277, 10, 858, 858, 2860, 1277])
+
+        # check generating is quick enough to run at install time
+        self.assertLess(self.seconds, 1)
+
+
+    def testBinaryFormat(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # check tables survive a round trip
+            path = os.path.join(directory, "ranks.bin")
+            WriteRanks(path, self.tables)
+            self.assertEqual(ReadRanks(path), self.tables)
+
+            # check other files are rejected
+            with open(path, "wb") as file:
+                file.write(b"not ranks")
+            self.assertRaises(ValueError, ReadRanks, path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import random
+import tempfile
+import unittest
+from fivecarddraw import Dealer
+from handhistory import BET, DEAL, DISCARD, HistoryReader, HistoryWriter
+from replay import Replayer, ReplayFiles
+from tests.fixtures import HeadlessTable, RecordedGame
+
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so games are reproducible
+        random.seed(1)
+        # record a few games into separate files
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.paths = []
+        for i in range(3):
+            path = os.path.join(self.directory.name, f"hands{i}.fcdh")
+            with HistoryWriter(path, compress=bool(i % 2)) as writer:
+                RecordedGame(writer)
+            self.paths.append(path)
+        self.hands = sum(len(list(HistoryReader(path))) for path in self.paths)
+
+
+    def testReplaying(self):
+        # check every recorded hand replays to the recorded stacks
+        replayer = Replayer()
+        for path in self.paths:
+            for hand in HistoryReader(path):
+                self.assertEqual(replayer.ReplayHand(hand), hand.stacks)
+
+        # check files can be replayed serially and in parallel
+        self.assertEqual(ReplayFiles(self.paths, processes=1), self.hands)
+        self.assertEqual(ReplayFiles(self.paths, processes=2), self.hands)
+
+
+    def testMismatches(self):
+        replayer = Replayer()
+        hand = next(iter(HistoryReader(self.paths[0])))
+
+        # check a different outcome is detected
+        name = [*hand.stacks][0]
+        hand.stacks[name] += 1
+        self.assertRaises(AssertionError, replayer.ReplayHand, hand)
+
+        # check a different deck order is detected by a hand with discards
+        for hand in HistoryReader(self.paths[0]):
+            if any(event[0] == DISCARD and event[2] for event in hand.events):
+                break
+        for i, event in enumerate(hand.events):
+            if event[0] == DEAL:
+                hand.events[i] = (DEAL, event[1], event[2][::-1])
+        self.assertRaises(Exception, replayer.ReplayHand, hand)
+
+
+    def testReshuffling(self):
+        # record hands at a full table, where the muck is reshuffled during the draw
+        path = os.path.join(self.directory.name, "full.fcdh")
+        with HistoryWriter(path) as writer:
+            table = HeadlessTable(10)
+            table.dealer.RecordHistory(writer)
+            for _ in range(20):
+                table.PlayHand()
+        hands = list(HistoryReader(path))
+
+        # check some hands reshuffled the muck, and every hand replays to the recorded stacks
+        self.assertTrue(any(sum(event[0] == DEAL for event in hand.events) > 1 for hand in hands))
+        replayer = Replayer()
+        for hand in hands:
+            self.assertEqual(replayer.ReplayHand(hand), hand.stacks)
+
+
+    def testVariants(self):
+        # record hands of deuce to seven
+        path = os.path.join(self.directory.name, "lowball.fcdh")
+        with HistoryWriter(path, variant="deuce to seven") as writer:
+            table = HeadlessTable(4)
+            table.dealer = Dealer(4, variant="deuce to seven")
+            table.dealer.InitializeTable([], table.OPPONENTS, table.CHIPS)
+            table.dealer.UpdateAnte(table.ANTE)
+            table.dealer.RecordHistory(writer)
+            for _ in range(20):
+                table.PlayHand()
+
+        # check they're replayed by the variant in the header, and not by another variant's rules
+        self.assertEqual(ReplayFiles([path], processes=1), 20)
+        self.assertRaises(ValueError, Replayer().ReplayFile, path)
+
+
+    def testBetFlags(self):
+        # check a bet recorded with different flags is detected
+        replayer = Replayer()
+        for hand in HistoryReader(self.paths[0]):
+            self.assertEqual(replayer.ReplayHand(hand), hand.stacks)
+            for i, event in enumerate(hand.events):
+                if event[0] == BET:
+                    hand.events[i] = (*event[:3], event[3] ^ 1)
+                    self.assertRaises(AssertionError, replayer.ReplayHand, hand)
+                    return
+        self.fail("no bets recorded")
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import asyncio
+import random
+import unittest
+from fivecarddraw import RandomPolicy
+from tablehost import PolicyBatcher, TableHost
+
+
+class TableHostTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so games are reproducible
+        random.seed(6)
+        self.host = TableHost()
+
+
+    def testBots(self):
+        # host tables of bots
+        for i in range(10):
+            self.host.Open(f"Table {i}", [], [f"Bot {j}" for j in range(6)])
+        self.assertRaises(KeyError, self.host.Open, "Table 0", [], ["Bot 0", "Bot 1"])
+        asyncio.run(self.host.Run(5))
+
+        # check each table played until its game was over or its hands were played, conserving chips
+        for table in self.host.tables.values():
+            self.assertTrue(0 < table.hands <= 5)
+            players = table.dealer.TrackedPlayers()
+            self.assertTrue(table.hands == 5 or len(players) == 1)
+            self.assertEqual(sum(table.dealer.chips.Stack(name) for name in players), 3000)
+
+        # check capacity is reported without any humans to wait for
+        report = self.host.Report()
+        self.assertEqual(report["tables"], 10)
+        self.assertEqual(report["hands"], sum(table.hands for table in self.host.tables.values()))
+        self.assertEqual(report["decisions"], 0)
+        self.assertGreater(report["tables_per_core"], 0)
+
+        # check closing tables
+        self.host.Close("Table 0")
+        self.assertNotIn("Table 0", self.host.tables)
+        self.assertRaises(KeyError, self.host.Close, "Table 0")
+
+
+    def testTimeouts(self):
+        # host a human who never decides
+        table = self.host.Open("Table", ["Human"], ["Bot 0", "Bot 1"], timeout=0.001)
+        asyncio.run(self.host.Run(3))
+
+        # check the human checked or folded and stood pat every time
+        self.assertEqual(table.hands, 3)
+        self.assertTrue(table.decisions)
+        self.assertEqual(table.timeouts, table.decisions)
+        self.assertFalse(table.pending)
+
+
+    def testSubmitting(self):
+        progress = []
+        def Prompt(table, name, kind, info):
+            # track hands played at other tables while the human decides
+            progress.append(sum(other.hands for other in self.host.tables.values() if other is not table))
+            # call or stand pat after a delay, as a human at another table would
+            decision = info["game"]["call"] if kind == "amount" else []
+            asyncio.get_running_loop().call_later(0.001, table.Submit, name, decision)
+
+        # host a slow human beside tables of bots
+        human = self.host.Open("Human", ["Human"], ["Bot 0"], prompt=Prompt)
+        for i in range(3):
+            self.host.Open(f"Table {i}", [], [f"Bot {j}" for j in range(4)])
+        asyncio.run(self.host.Run(5))
+
+        # check the human made every decision in time
+        self.assertEqual(human.decisions, len(progress))
+        self.assertEqual(human.timeouts, 0)
+        # check tables of bots didn't wait for the human
+        self.assertGreater(progress[-1], progress[0])
+
+        # check decisions can't be submitted unless a human is being waited on
+        self.assertFalse(human.Submit("Human", 0))
+        self.assertFalse(human.Submit("Bot 0", 0))
+
+
+    def testBatching(self):
+        # host tables whose bots share a policy deciding in batches
+        batcher = PolicyBatcher(RandomPolicy())
+        for i in range(10):
+            self.host.Open(f"Table {i}", [], [f"Bot {j}" for j in range(6)], workers=batcher)
+        asyncio.run(self.host.Run(3))
+
+        # check tables played, with the policy deciding for many tables each call
+        for table in self.host.tables.values():
+            self.assertTrue(table.hands)
+            self.assertEqual(sum(table.dealer.chips.Stack(name) for name in table.dealer.TrackedPlayers()), 3000)
+        self.assertLess(2 * batcher.round_trips, batcher.decisions)
+        self.assertFalse(batcher.queued)
+
+        # check requests cancelled before their batch is decided are skipped
+        async def Cancel():
+            dealer = [*self.host.tables.values()][0].dealer
+            dealer.ShuffleDeck()
+            dealer.MoveButton()
+            dealer.TakeAnte()
+            dealer.DealHands()
+            name = [*dealer.cards.players][0]
+            waiting = asyncio.create_task(batcher.Decide(name, "amount", dealer.TableView(name)))
+            deciding = asyncio.create_task(batcher.Decide(name, "discards", dealer.TableView(name)))
+            await asyncio.sleep(0)
+            waiting.cancel()
+            return await asyncio.wait_for(deciding, 1)
+        decisions = batcher.decisions
+        self.assertIsInstance(asyncio.run(Cancel()), list)
+        self.assertEqual(batcher.decisions, decisions + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
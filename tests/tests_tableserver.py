@@ -0,0 +1,130 @@
+import asyncio
+import random
+import unittest
+from fivecarddraw import Dealer
+from handhistory import CardCode
+from tableserver import ACT, BET, BET_MESSAGE, DISCARD, DISCARD_MESSAGE, ERROR, FRAME, MAX_FRAME
+from tableserver import DecodeView, EncodeView, LoadTest, ProtocolError, TableClient, TableServer, UnpackString
+
+
+class TableServerTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so games are reproducible
+        random.seed(7)
+
+
+    def testViews(self):
+        # deal a table
+        dealer = Dealer(4)
+        dealer.InitializeTable([], ["A", "B", "C", "D"], 500)
+        dealer.UpdateAnte(5)
+        dealer.ShuffleDeck()
+        dealer.MoveButton()
+        dealer.TakeAnte()
+        dealer.DealHands()
+        dealer.TakeBet(dealer.PreflopOrder()[0], 0)
+
+        # check views survive encoding
+        for name in dealer.TrackedPlayers():
+            info = dealer.TableView(name)
+            view = DecodeView(EncodeView(ACT, info))
+            self.assertEqual(view["seat"], info["self"]["seat"])
+            self.assertEqual(view["stack"], 495)
+            self.assertEqual(view["cards"], [CardCode(card) for card in info["self"]["hand"]["cards"]])
+            self.assertEqual((view["call"], view["pot"]), (info["game"]["call"], info["game"]["pot"]))
+            self.assertEqual(sorted(other["seat"] for other in view["others"]), sorted(other["seat"] for other in info["others"].values()))
+
+
+    def testLoadTest(self):
+        # check clients play their tables to the end and their decisions are timed
+        report = asyncio.run(LoadTest(clients=20, bots=3, hands=3))
+        self.assertEqual(report["clients"], 20)
+        self.assertTrue(report["decisions"])
+        self.assertGreater(report["decisions_per_second"], 0)
+        self.assertLessEqual(report["p50"], report["p99"])
+
+
+    def testConnections(self):
+        async def Run():
+            server = TableServer(hands=3, timeout=60, max_connections=3)
+            table = server.Open("Table", ["Alice", "Bob"], ["Bot 0"])
+            slow = server.Open("Slow", ["Carol"], ["Bot 0"])
+            await server.Start(("127.0.0.1", 0))
+            address = server.Address()
+
+            async def Error(client):
+                # read until the server reports an error
+                while True:
+                    payload = await client.connection.Receive()
+                    if payload[0] == ERROR:
+                        return UnpackString(payload, 1)[0]
+
+            # check acting before joining and joining as a stranger drop the client
+            stranger = TableClient()
+            await stranger.Connect(address)
+            await stranger.connection.Send(BET_MESSAGE.pack(BET, 0))
+            self.assertIn("Join", await Error(stranger))
+            self.assertIsNone(await stranger.connection.Receive())
+            await stranger.connection.Close()
+            stranger = TableClient()
+            await stranger.Connect(address)
+            await stranger.Join("Table", "Eve")
+            self.assertIn("can't join", await Error(stranger))
+            await stranger.connection.Close()
+
+            # check oversized frames drop the client
+            stranger = TableClient()
+            await stranger.Connect(address)
+            stranger.connection.writer.write(FRAME.pack(MAX_FRAME + 1))
+            self.assertIn("isn't allowed", await Error(stranger))
+            await stranger.connection.Close()
+
+            # check the table waits for both humans, then plays on after one disconnects without waiting for them
+            alice, bob = TableClient(), TableClient()
+            await alice.Connect(address)
+            await alice.Join("Table", "Alice")
+            await asyncio.sleep(0.01)
+            self.assertEqual(table.hands, 0)
+
+            # check discarding while not dealt in is out of turn, without dropping the client
+            await alice.connection.Send(DISCARD_MESSAGE.pack(DISCARD, 1))
+            self.assertIn("isn't your turn", await Error(alice))
+            self.assertIn(("Table", "Alice"), server.connections)
+            await bob.Connect(address)
+            await bob.Join("Table", "Bob")
+            await bob.connection.Close()
+            await asyncio.wait_for(alice.Play(), 10)
+
+            # check the players were introduced by seat, and the game ended without timeouts
+            self.assertEqual(sorted(alice.seats.values()), ["Alice", "Bob", "Bot 0"])
+            self.assertEqual(table.timeouts, 0)
+            self.assertTrue(0 < table.hands <= 3)
+            self.assertEqual(alice.stack, table.dealer.chips.players.get("Alice", {"stack" : 0})["stack"])
+
+            # check a human who stops reading is dropped once too much is buffered for them, and their table plays on
+            carol = TableClient()
+            await carol.Connect(address)
+            await carol.Join("Slow", "Carol")
+            await asyncio.sleep(0.01)
+            connection = server.connections[("Slow", "Carol")]
+            self.assertTrue(any(not connection.Post(bytes(MAX_FRAME)) for _ in range(1 << 16)))
+            await asyncio.wait_for(server.actors[1], 10)
+            self.assertNotIn(("Slow", "Carol"), server.connections)
+            self.assertEqual(slow.timeouts, 0)
+            await carol.connection.Close()
+
+            # check a full server refuses clients
+            clients = [TableClient() for _ in range(4)]
+            for client in clients:
+                await client.Connect(address)
+            with self.assertRaises(ProtocolError):
+                await asyncio.wait_for(clients[-1].Play(), 10)
+            await server.Stop()
+            for client in clients:
+                await client.connection.Close()
+
+        asyncio.run(Run())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import random
+import unittest
+from itertools import product
+from fivecarddraw import Card, DeucesHandTracker, HandTracker, Joker, JokerHandTracker
+
+
+class WildHandTrackerTest(unittest.TestCase):
+    def setUp(self):
+        # fix seed so hands are reproducible
+        random.seed(4)
+        # create trackers
+        self.tracker = HandTracker()
+        self.deuces = DeucesHandTracker()
+        self.joker = JokerHandTracker()
+
+
+    def BestSubstitution(self, tracker, hand):
+        # rate a hand by trying every card for each wild card
+        naturals = [card for card in hand if not tracker.IsWild(card)]
+        if len(set(card.value_i for card in naturals)) < 2 and len(naturals) > 1:
+            return -naturals[0].value_i
+        cards = [Card(v, s) for v in range(13) for s in range(4)]
+        hands = [naturals + [*substitution] for substitution in product(cards, repeat=5-len(naturals))]
+        return min(self.tracker.EvaluateHand(hand) for hand in hands if len(set(hand)) == 5)
+
+
+    def testDeck(self):
+        # check jokers are added to the deck
+        self.assertEqual(len(self.joker.DECK), 53)
+        self.assertEqual(len(self.deuces.DECK), 52)
+        self.assertIn(Joker(), self.joker.DECK.state)
+
+        # check which cards are wild
+        self.assertTrue(self.joker.IsWild(Joker()))
+        self.assertFalse(self.joker.IsWild(Card(0,0)))
+        self.assertTrue(self.deuces.IsWild(Card(0,3)))
+        self.assertFalse(self.deuces.IsWild(Card(12,0)))
+
+
+    def testEvaluating(self):
+        # check selected hands
+        hands = [
+            ([Joker(), Card(12,0), Card(12,1), Card(12,2), Card(12,3)], self.joker, -12, "five of a kind"),
+            ([Joker(), Card(0,0), Card(0,1), Card(0,2), Card(0,3)], self.joker, 0, "five of a kind"),
+            ([Joker(), Card(12,0), Card(11,0), Card(10,0), Card(9,0)], self.joker, 1, "royal flush"),
+            ([Joker(), Card(3,1), Card(5,2), Card(7,3), Card(12,0)], self.joker, 3497, "pair"),
+            ([Card(0,0), Card(0,1), Card(0,2), Card(0,3), Card(5,0)], self.deuces, -5, "five of a kind"),
+            ([Card(0,0), Card(12,1), Card(12,2), Card(12,3), Card(5,0)], self.deuces, 17, "four of a kind"),
+            ([Card(0,0), Card(0,1), Card(3,0), Card(4,0), Card(6,0)], self.deuces, 6, "straight flush"),
+            ([Card(1,0), Card(3,1), Card(5,2), Card(7,3), Card(9,0)], self.deuces, 7292, "high card")]
+        for hand, tracker, rank_n, rank_c in hands:
+            self.assertEqual(tracker.EvaluateHand(hand), rank_n)
+            self.assertEqual(tracker.Category(rank_n), rank_c)
+
+        # check hands without wild cards rate as usual
+        cards = [Card(v, s) for v in range(1, 13) for s in range(4)]
+        for _ in range(100):
+            hand = random.sample(cards, 5)
+            self.assertEqual(self.deuces.EvaluateHand(hand), self.tracker.EvaluateHand(hand))
+
+        # check random hands with up to two wild cards against trying every substitution
+        for tracker in [self.deuces, self.joker]:
+            wilds = [card for card in tracker.DECK.state if tracker.IsWild(card)]
+            naturals = [card for card in tracker.DECK.state if not tracker.IsWild(card)]
+            for _ in range(10):
+                for n in range(1, min(len(wilds), 2) + 1):
+                    hand = random.sample(wilds, n) + random.sample(naturals, 5 - n)
+                    self.assertEqual(tracker.EvaluateHand(hand), self.BestSubstitution(tracker, hand))
+
+
+if __name__ == "__main__":
+    unittest.main()